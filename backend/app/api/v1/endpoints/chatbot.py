@@ -1,72 +1,262 @@
 # backend/app/api/v1/endpoints/chatbot.py
 import json
+import logging
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from app.schemas.chatbot import ChatRequest, ChatResponse
-from app.services.nlu_service import classify_intent, client as openai_client
+from app.services.nlu_service import classify_intent
+from app.services.llm_gateway import llm_gateway
 from app.services.magento_wrapper import magento_service
+from app.services.intent_parser import looks_like_question
+from app.services.task_planner import TaskPlanner
+from app.services.session_store import session_store
+from app.services.product_context import product_context
+from app.services.store_registry import store_registry
 from app.core.config import settings
-import traceback
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/chat")
-async def handle_chat(request: ChatRequest):
-    if not request.credentials:
-        return ChatResponse(response_text="Please connect to a store first.")
+SYSTEM_PROMPT = ("You are a friendly and knowledgeable e-commerce expert from Lumenco...")
 
-    params = await classify_intent(request.message)
-    task = params.get("task")
+def _context_sku(context) -> str | None:
+    # Older clients still send the previous turn's data back instead of a context_ref.
+    if isinstance(context, list) and context and isinstance(context[0], dict): return context[0].get('sku')
+    if isinstance(context, dict): return context.get('sku')
+    return None
+
+def _credentials(request: ChatRequest) -> tuple[dict | None, str]:
+    """
+    The store credentials for this turn, from the connection registered by /auth/connect
+    when the client sends its token (no per-request parsing), else from the request body.
+    The second value is the reply to send when there are none.
+    """
+    store = store_registry.get(request.session_token)
+    if store is not None: return store.credentials, ""
+    if request.credentials: return request.credentials.model_dump(), ""
+    if request.session_token: return None, "Your store session has expired. Please connect to the store again."
+    return None, "Please connect to a store first."
+
+def _start_turn(request: ChatRequest, credentials: dict) -> TaskPlanner:
+    """Plans the I/O that doesn't depend on the intent so it overlaps with classification."""
+    planner = TaskPlanner(f"chat:{request.user_id}")
+    planner.add("session", lambda: session_store.load(request.user_id, request.context_ref))
+    intent_after = []
+    if settings.FAST_INTENT_PARSER_ENABLED:
+        planner.add("brands", lambda: magento_service.get_brand_options(credentials))
+        intent_after = ["brands"]
+    planner.add("intent", lambda brands=None: classify_intent(request.message, brands, tenant=credentials['store_url']), after=intent_after)
+    planner.start()
+    return planner
 
+async def _load_session(planner: TaskPlanner, request: ChatRequest, credentials: dict) -> tuple[str, dict, str | None]:
+    """Returns (context_ref, session state, SKU of the product in focus) for this turn."""
+    context_ref, session = await planner.get("session")
+    context_sku = session.get("focus_sku") or _context_sku(request.context)
+    if context_sku and looks_like_question(request.message):
+        # Probably a follow-up about the product just shown: fetch it while the intent is classified.
+        planner.add("prefetch", lambda: magento_service.get_product_details_by_sku(context_sku, credentials))
+    return context_ref, session, context_sku
+
+async def _save_session(context_ref: str, session: dict):
+    try:
+        await session_store.save(context_ref, session)
+    except Exception as e:
+        # Losing follow-up context is better than failing an answer that is already computed.
+        logger.info(f"Could not save chat session {context_ref}. Error: {e}")
+
+async def _classify(planner: TaskPlanner) -> tuple[dict, str]:
+    params = await planner.get("intent")
+    task = params.get("task")
     if task == "details" and not params.get("question"):
         task = "search"
+    return params, task
 
-    if task == "error":
-        return ChatResponse(response_text=f"Sorry, I had an issue understanding that. Details: {params.get('details')}")
+def _count_text(params: dict, count: int) -> str:
+    summary_parts = []
+    if params.get("brand"): summary_parts.append(f"for the brand '{params['brand']}'")
+    if params.get("keywords"): summary_parts.append(f"matching '{params['keywords']}'")
+    summary_text = " ".join(summary_parts)
+    return f"I found a total of **{count}** products {summary_text}."
 
+EXPORT_FILTER_KEYS = ("keywords", "sku", "brand", "on_sale", "attributes")
+
+def _export_reply(params: dict, count: int) -> dict:
+    """Chat answer for an export request; the frontend downloads the file from /export/products with `data`."""
+    filters = {key: params[key] for key in EXPORT_FILTER_KEYS if params.get(key)}
+    if not count: return {"response_text": "I couldn't find any products to export for that request."}
+    return {"response_text": f"Your export of **{count}** products is ready to download.", "intent": "export_products", "data": {"filters": filters, "format": "csv", "total_count": count}}
+
+def _details_sku(params: dict, context_sku: str | None) -> str | None:
+    return params.get("sku") or params.get("keywords") or context_sku
+
+async def _details_product(planner: TaskPlanner, sku: str, context_sku: str | None, credentials: dict) -> dict | None:
+    if "prefetch" in planner and sku == context_sku:
+        return await planner.get("prefetch")
+    # Stages receive the results of the stages they run after, so this one takes `intent`.
+    planner.add("details", lambda intent: magento_service.get_product_details_by_sku(sku, credentials), after=["intent"])
+    return await planner.get("details")
+
+def _details_messages(product_data: dict, question: str, store_url: str) -> list[dict]:
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": product_context.user_prompt(product_data, question, store_url)}]
+
+@router.post("/chat")
+async def handle_chat(request: ChatRequest):
+    credentials, refusal = _credentials(request)
+    if not credentials:
+        return ChatResponse(response_text=refusal)
+
+    planner = _start_turn(request, credentials)
+    context_ref = session = None
     try:
+        context_ref, session, context_sku = await _load_session(planner, request, credentials)
+        params, task = await _classify(planner)
+
+        if task == "error":
+            return ChatResponse(response_text=f"Sorry, I had an issue understanding that. Details: {params.get('details')}", context_ref=context_ref)
+
+        if task == "export":
+            result = await magento_service.product_query({**params, "task": "count"}, credentials, planner=planner, stage="count")
+            session_store.remember(session, params)
+            return ChatResponse(**_export_reply(params, result.get("total_count", 0)), context_ref=context_ref)
+
         if task == "search" or task == "count":
-            # --- THIS IS THE FIX ---
-            # Remove the 'original_message' argument as it's no longer needed.
-            result = magento_service.product_query(params, request.credentials.dict())
-            # --- END OF FIX ---
-            
+            result = await magento_service.product_query(params, credentials, planner=planner, stage=task)
+
             if task == "count":
-                count = result.get("total_count", 0)
-                summary_parts = []
-                if params.get("brand"): summary_parts.append(f"for the brand '{params['brand']}'")
-                if params.get("keywords"): summary_parts.append(f"matching '{params['keywords']}'")
-                summary_text = " ".join(summary_parts)
-                return ChatResponse(response_text=f"I found a total of **{count}** products {summary_text}.")
+                session_store.remember(session, params)
+                return ChatResponse(response_text=_count_text(params, result.get("total_count", 0)), context_ref=context_ref)
             else:
                 products = result.get("items", [])
                 total_count = result.get("total_count", 0)
+                session_store.remember(session, params, products=products)
                 if not products:
-                    return ChatResponse(response_text="I couldn't find any products matching your search.")
+                    return ChatResponse(response_text="I couldn't find any products matching your search.", context_ref=context_ref)
                 response_text = f"Here are the top {len(products)} of {total_count} results:"
-                return ChatResponse(response_text=response_text, intent="search_products_result", data=products)
+                return ChatResponse(response_text=response_text, intent="search_products_result", data=products, context_ref=context_ref)
 
         elif task == "details":
-            # ... (rest of the file is correct and unchanged)
-            sku = params.get("sku") or params.get("keywords")
-            if not sku and request.context:
-                context = request.context
-                if isinstance(context, list) and context: sku = context[0].get('sku')
-                elif isinstance(context, dict): sku = context.get('sku')
+            sku = _details_sku(params, context_sku)
             question = params.get("question", request.message)
-            if not sku: return ChatResponse(response_text="Please specify a product SKU to get details, or ask about a product I just found.")
-            product_data = magento_service.get_product_details_by_sku(sku, request.credentials.dict())
-            if not product_data: return ChatResponse(response_text=f"Sorry, I couldn't find data for SKU '{sku}'.")
-            system_prompt = ("You are a friendly and knowledgeable e-commerce expert from Lumenco...")
-            context_summary = {"name": product_data.get("name"), "sku": product_data.get("sku"), "price": product_data.get("price"), "attributes": { attr.get("attribute_code"): attr.get("value") for attr in product_data.get("custom_attributes", []) if isinstance(attr, dict) }}
-            user_prompt = f"PRODUCT DATA:\n```json\n{json.dumps(context_summary, indent=2)}\n```\n\nUSER QUESTION:\n{question}"
-            response = await openai_client.chat.completions.create(model=settings.LLM_MODEL_NAME, messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}], temperature=0.2)
+            if not sku: return ChatResponse(response_text="Please specify a product SKU to get details, or ask about a product I just found.", context_ref=context_ref)
+            product_data = await _details_product(planner, sku, context_sku, credentials)
+            if not product_data: return ChatResponse(response_text=f"Sorry, I couldn't find data for SKU '{sku}'.", context_ref=context_ref)
+            with planner.measure("answer", after=["details"] if "details" in planner else ["prefetch", "intent"]):
+                response = await llm_gateway.create(tenant=credentials['store_url'], model=settings.LLM_MODEL_NAME, messages=_details_messages(product_data, question, credentials['store_url']), temperature=0.2)
             answer = response.choices[0].message.content
-            return ChatResponse(response_text=answer, data=product_data)
-        
+            session_store.remember(session, params, sku=product_data.get("sku") or sku)
+            # The product card, not the raw Magento product: the session keeps what follow-ups need.
+            return ChatResponse(response_text=answer, intent="product_details", data=magento_service.format_product(product_data, credentials), context_ref=context_ref)
+
         else:
-            return ChatResponse(response_text="I'm not sure how to handle that task.")
+            return ChatResponse(response_text="I'm not sure how to handle that task.", context_ref=context_ref)
 
     except Exception as e:
-        print(f"An unexpected error occurred in the chat endpoint: {e}")
-        traceback.print_exc()
-        return ChatResponse(response_text=f"An error occurred. Please check the server logs for details.")
\ No newline at end of file
+        logger.exception(f"An unexpected error occurred in the chat endpoint: {e}")
+        return ChatResponse(response_text=f"An error occurred. Please check the server logs for details.", context_ref=context_ref)
+    finally:
+        planner.cancel()
+        planner.log()
+        if session is not None: await _save_session(context_ref, session)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _stream_chat(request: ChatRequest):
+    """
+    Server-Sent Events version of handle_chat. Event types:
+      message  - a complete text answer (counts, exports, errors, fallbacks)
+      header   - search summary + total_count, sent before any items
+      items    - a batch of formatted product cards
+      card     - the product card for a details question, sent before the LLM answer
+      token    - a piece of the LLM answer as it is generated
+      done     - end of the response; carries the session context_ref, and the full answer text for details
+    """
+    credentials, refusal = _credentials(request)
+    if not credentials:
+        yield _sse("message", {"response_text": refusal})
+        yield _sse("done", {})
+        return
+
+    planner = _start_turn(request, credentials)
+    context_ref = session = None
+    done = {}
+    try:
+        context_ref, session, context_sku = await _load_session(planner, request, credentials)
+        done["context_ref"] = context_ref
+        params, task = await _classify(planner)
+
+        if task == "error":
+            yield _sse("message", {"response_text": f"Sorry, I had an issue understanding that. Details: {params.get('details')}"})
+
+        elif task == "count":
+            result = await magento_service.product_query(params, credentials, planner=planner, stage="count")
+            session_store.remember(session, params)
+            yield _sse("message", {"response_text": _count_text(params, result.get("total_count", 0))})
+
+        elif task == "export":
+            result = await magento_service.product_query({**params, "task": "count"}, credentials, planner=planner, stage="count")
+            session_store.remember(session, params)
+            yield _sse("message", _export_reply(params, result.get("total_count", 0)))
+
+        elif task == "search":
+            # The cheap count query runs alongside the item query so the header can go out first.
+            planner.add("count", lambda: magento_service.product_query({**params, "task": "count"}, credentials, planner=planner, stage="count"))
+            planner.add("search", lambda: magento_service.product_query(params, credentials, planner=planner, stage="search"))
+            total_count = (await planner.get("count")).get("total_count", 0)
+            if not total_count:
+                session_store.remember(session, params)
+                yield _sse("message", {"response_text": "I couldn't find any products matching your search."})
+            else:
+                shown = min(int(params.get("limit") or 10), total_count)
+                yield _sse("header", {"response_text": f"Here are the top {shown} of {total_count} results:", "intent": "search_products_result", "total_count": total_count})
+                products = (await planner.get("search")).get("items", [])
+                session_store.remember(session, params, products=products)
+                batch_size = settings.CHAT_STREAM_BATCH_SIZE
+                for start in range(0, len(products), batch_size):
+                    yield _sse("items", {"items": products[start:start + batch_size]})
+
+        elif task == "details":
+            sku = _details_sku(params, context_sku)
+            question = params.get("question", request.message)
+            if not sku:
+                yield _sse("message", {"response_text": "Please specify a product SKU to get details, or ask about a product I just found."})
+            else:
+                product_data = await _details_product(planner, sku, context_sku, credentials)
+                if not product_data:
+                    yield _sse("message", {"response_text": f"Sorry, I couldn't find data for SKU '{sku}'."})
+                else:
+                    # The card goes out as soon as Magento answers; the LLM answer follows token by token.
+                    yield _sse("card", {"intent": "product_details", "data": magento_service.format_product(product_data, credentials)})
+                    answer_parts = []
+                    with planner.measure("answer", after=["details"] if "details" in planner else ["prefetch", "intent"]):
+                        stream = await llm_gateway.create(tenant=credentials['store_url'], model=settings.LLM_MODEL_NAME, messages=_details_messages(product_data, question, credentials['store_url']), temperature=0.2, stream=True)
+                        try:
+                            async for chunk in stream:
+                                delta = chunk.choices[0].delta.content if chunk.choices else None
+                                if delta:
+                                    answer_parts.append(delta)
+                                    yield _sse("token", {"text": delta})
+                        finally:
+                            # On a client disconnect this runs as the response is closed: free the LLM connection and slots now.
+                            await stream.aclose()
+                    session_store.remember(session, params, sku=product_data.get("sku") or sku)
+                    done["response_text"] = "".join(answer_parts)
+
+        else:
+            yield _sse("message", {"response_text": "I'm not sure how to handle that task."})
+
+    except Exception as e:
+        logger.exception(f"An unexpected error occurred in the chat stream: {e}")
+        yield _sse("message", {"response_text": "An error occurred. Please check the server logs for details."})
+    finally:
+        planner.cancel()
+        planner.log()
+        if session is not None: await _save_session(context_ref, session)
+
+    yield _sse("done", done)
+
+@router.post("/chat/stream")
+async def handle_chat_stream(request: ChatRequest):
+    return StreamingResponse(_stream_chat(request), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
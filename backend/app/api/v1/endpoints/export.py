@@ -0,0 +1,27 @@
+# backend/app/api/v1/endpoints/export.py
+import httpx
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from app.schemas.export import ExportRequest
+from app.services.magento_wrapper import magento_service
+from app.services.catalog_export import CatalogExport, ExportError
+
+router = APIRouter()
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+@router.post("/products")
+async def export_products(request: ExportRequest):
+    """
+    Streams every product matching `filters` as CSV or NDJSON. The `id` column doubles
+    as the resume cursor: send the last id received as `cursor` to continue.
+    """
+    credentials = request.credentials.model_dump()
+    filters = await magento_service.search_filters(request.filters, credentials)
+    export = CatalogExport(credentials, filters, fmt=request.format, attributes=request.attributes, cursor=request.cursor)
+    try:
+        await export.open()
+    except (ExportError, httpx.RequestError) as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    headers = {"Content-Disposition": f'attachment; filename="products.{request.format}"', "X-Total-Count": str(export.total_count), "Cache-Control": "no-cache"}
+    return StreamingResponse(export.stream(), media_type=MEDIA_TYPES[request.format], headers=headers)
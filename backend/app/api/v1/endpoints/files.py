@@ -1,39 +1,68 @@
 # backend/app/api/v1/endpoints/files.py
+import asyncio
 import shutil
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import uuid
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from pathlib import Path
+from pydantic import ValidationError
+from app.schemas.chatbot import MagentoCredentials
+from app.services.catalog_import import catalog_importer
+from app.core.config import settings
 
 router = APIRouter()
 
 # Create a temporary directory for uploads
-TEMP_UPLOAD_DIR = Path("./temp_uploads")
+TEMP_UPLOAD_DIR = Path(settings.IMPORT_UPLOAD_DIR)
 TEMP_UPLOAD_DIR.mkdir(exist_ok=True)
 
 @router.post("/upload", status_code=201)
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), credentials: Optional[str] = Form(None)):
     """
     Handles file uploads (e.g., CSVs, images).
     - Scans for viruses (placeholder)
     - Stores file temporarily
-    - Returns file metadata
+    - Starts a bulk import job for CSVs when store credentials (JSON) are sent along
+    - Returns file metadata, plus the import job id
     """
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
 
+    store_credentials = None
+    if credentials:
+        try:
+            store_credentials = MagentoCredentials.model_validate_json(credentials).model_dump()
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid credentials: {e}")
+
     # In a real app, you would add a virus scan here.
     # For now, we trust the upload.
 
     try:
-        # Save the file to a temporary location
-        file_location = TEMP_UPLOAD_DIR / file.filename
+        # Save the file to a temporary location. The prefix keeps concurrent uploads of the same
+        # name apart, and only the base name is used so the path can't leave the upload folder.
+        original_name = Path(file.filename).name
+        file_location = TEMP_UPLOAD_DIR / f"{uuid.uuid4().hex}_{original_name}"
         with open(file_location, "wb+") as file_object:
-            shutil.copyfileobj(file.file, file_object)
-
-        return {
-            "message": f"File '{file.filename}' uploaded successfully.",
-            "filename": file.filename,
-            "content_type": file.content_type,
-            "temp_path": str(file_location)
-        }
+            await asyncio.to_thread(shutil.copyfileobj, file.file, file_object, 1024 * 1024)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Could not upload file: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Could not upload file: {e}")
+
+    result = {
+        "message": f"File '{original_name}' uploaded successfully.",
+        "filename": original_name,
+        "content_type": file.content_type,
+        "temp_path": str(file_location)
+    }
+    if store_credentials and original_name.lower().endswith(".csv"):
+        job = catalog_importer.start(original_name, file_location, store_credentials)
+        result["message"] = f"File '{original_name}' uploaded, import started."
+        result["job_id"] = job.id
+    return result
+
+@router.get("/imports/{job_id}")
+async def get_import_status(job_id: str):
+    job = catalog_importer.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.to_dict()
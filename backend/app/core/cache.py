@@ -0,0 +1,87 @@
+# backend/app/core/cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+_MISSING = object()
+
+class AsyncTTLCache:
+    """
+    Small in-process cache with a per-entry TTL, LRU eviction once `maxsize`
+    entries are stored, and single-flight loading: concurrent misses for the
+    same key share one call to the loader instead of each hitting the backend.
+    That call runs as its own task, so a caller that is cancelled stops waiting
+    without failing the others. With `max_bytes` set, entries are also evicted to keep the total of
+    `sizeof(value)` within that budget.
+    """
+    def __init__(self, maxsize: int, ttl: float, max_bytes: int | None = None, sizeof: Callable[[Any], int] | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._data: OrderedDict[Hashable, tuple[float, Any, int]] = OrderedDict()  # key -> (expires_at, value, size)
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None: return default
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self.invalidate(key)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        self.invalidate(key)
+        if ttl <= 0 or (self.max_bytes is not None and size > self.max_bytes): return
+        self._data[key] = (time.monotonic() + ttl, value, size)
+        self.total_bytes += size
+        while len(self._data) > self.maxsize or (self.max_bytes is not None and self.total_bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._data.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+    def invalidate(self, key: Hashable):
+        entry = self._data.pop(key, None)
+        if entry is not None: self.total_bytes -= entry[2]
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        for key in [k for k in self._data if predicate(k)]:
+            self.invalidate(key)
+
+    def clear(self):
+        self._data.clear()
+        self.total_bytes = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float | None = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING: return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            # The load belongs to the cache, not to the caller that started it: cancelling
+            # that caller (a planner cancelling its stages, a client disconnecting) only stops
+            # its own wait, and everyone else coalesced onto the key still gets the result.
+            task = asyncio.ensure_future(self._load(key, loader, ttl))
+            task.add_done_callback(_retrieve_exception)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float | None) -> Any:
+        try:
+            value = await loader()
+            self.set(key, value, ttl)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task(): del self._inflight[key]
+
+def _retrieve_exception(task: asyncio.Future):
+    # Don't warn about a failed load when every caller waiting for it was cancelled.
+    if not task.cancelled(): task.exception()
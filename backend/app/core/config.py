@@ -10,5 +10,108 @@ class Settings(BaseSettings):
     LLM_API_KEY: str
     LLM_MODEL_NAME: str
 
+    # LLM gateway (see llm_gateway.py)
+    LLM_BASE_URL: str = ""  # Any OpenAI-compatible endpoint, e.g. a local fake server; empty = OpenAI
+    LLM_REQUEST_TIMEOUT: float = 30.0  # Per HTTP attempt
+    LLM_DEADLINE: float = 45.0  # Per call, including queueing, retries and hedges
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_MAX_CONCURRENCY_PER_TENANT: int = 8  # Per store
+    LLM_RATE_LIMIT: float = 20.0  # Requests per second; halved on each 429 burst, 0 disables
+    LLM_RATE_BURST: int = 20
+    LLM_MIN_RATE: float = 1.0
+    LLM_RATE_RECOVERY: float = 0.2  # Added back to the rate per successful call
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 8.0
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 95.0  # Hedge once a call is slower than this percentile of recent calls
+    LLM_HEDGE_MIN_DELAY: float = 1.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_STREAM_USAGE: bool = True  # Ask for token usage on streamed answers (stream_options.include_usage)
+
+    # Magento HTTP client (one connection pool per store)
+    MAGENTO_CONNECT_TIMEOUT: float = 5.0
+    MAGENTO_READ_TIMEOUT: float = 30.0
+    MAGENTO_POOL_TIMEOUT: float = 10.0
+    MAGENTO_MAX_CONNECTIONS: int = 20
+    MAGENTO_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    MAGENTO_KEEPALIVE_EXPIRY: float = 30.0
+    MAGENTO_HTTP2: bool = True  # Only used when the optional 'h2' package is installed
+
+    # Per-store resilience (see StoreGuard in magento_client.py)
+    MAGENTO_RATE_LIMIT: float = 50.0  # Requests per second per store; 0 disables the limit
+    MAGENTO_RATE_BURST: int = 100
+    MAGENTO_MAX_CONCURRENCY_PER_STORE: int = 16  # Requests in flight per store; waiting longer than MAGENTO_POOL_TIMEOUT fails fast
+    MAGENTO_MAX_RETRIES: int = 2  # Retries for GETs on 429/502/503/504 and network errors
+    MAGENTO_RETRY_BASE_DELAY: float = 0.25
+    MAGENTO_RETRY_MAX_DELAY: float = 5.0
+    MAGENTO_BREAKER_FAILURE_THRESHOLD: int = 10  # Consecutive failed requests (after retries) before a store's circuit opens; /auth/connect alone sends 5
+    MAGENTO_BREAKER_RESET_TIMEOUT: float = 30.0
+    MAGENTO_MAX_STORES: int = 256  # Stores that keep a pooled client and guard; the least recently used idle one is closed beyond this
+
+    # Attribute option (label -> id) cache, shared across stores
+    ATTRIBUTE_CACHE_TTL: float = 900.0
+    ATTRIBUTE_CACHE_MAX_ENTRIES: int = 256
+
+    # classify_intent result cache
+    INTENT_CACHE_MAX_ENTRIES: int = 5000
+    INTENT_CACHE_SQLITE_PATH: str = ""  # e.g. "./cache/intents.sqlite3"; empty disables the disk tier
+    INTENT_CACHE_SIMILARITY_THRESHOLD: float = 0.0  # 0 disables the near-duplicate tier; ~0.85 is a good start
+
+    # Rule-based intent fast path (skips the LLM for simple queries)
+    FAST_INTENT_PARSER_ENABLED: bool = True
+    FAST_INTENT_MIN_CONFIDENCE: float = 0.8
+
+    # Logging and metrics (see telemetry.py)
+    LOG_LEVEL: str = "INFO"
+    METRICS_ENABLED: bool = True  # Latency histograms and counters on /metrics; request ids are logged either way
+
+    # /chatbot/chat/stream
+    CHAT_STREAM_BATCH_SIZE: int = 5  # Product cards per 'items' event
+
+    # Product data in the details-answer prompt (see product_context.py)
+    DETAILS_CONTEXT_MAX_TOKENS: int = 600  # Estimated tokens of product JSON per prompt
+    DETAILS_CONTEXT_MAX_VALUE_CHARS: int = 600  # Longer attribute values (descriptions) are cut at a word boundary
+    DETAILS_CONTEXT_CACHE_TTL: float = 3600.0  # Entries are also rebuilt when the product's updated_at changes
+    DETAILS_CONTEXT_CACHE_MAX_ENTRIES: int = 2000
+
+    # product_query result cache (TTL 0 disables caching for that task)
+    SEARCH_CACHE_TTL_SEARCH: float = 60.0
+    SEARCH_CACHE_TTL_COUNT: float = 30.0
+    SEARCH_CACHE_MAX_ENTRIES: int = 2000
+    SEARCH_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Optional local catalog mirror (SQLite FTS5) answering search/count without the live API
+    CATALOG_MIRROR_ENABLED: bool = False
+    CATALOG_MIRROR_DIR: str = "./catalog_mirror"
+    CATALOG_MIRROR_PAGE_SIZE: int = 500
+    CATALOG_MIRROR_SYNC_INTERVAL: float = 300.0  # Incremental (updated_at) sync
+    CATALOG_MIRROR_FULL_SYNC_INTERVAL: float = 86400.0  # Full reload, also drops deleted products
+    CATALOG_MIRROR_MAX_STALENESS: float = 900.0  # Older than this, product_query goes back to the live API
+
+    # Validated store connections handed out by /auth/connect (see store_registry.py)
+    STORE_SESSION_TTL: float = 43200.0
+    STORE_SESSION_MAX_ENTRIES: int = 10000
+    MAGENTO_SIGNER_CACHE_MAX_ENTRIES: int = 1024  # OAuth1 signers kept per credential set
+
+    # Server-side chat session state (see session_store.py); set SESSION_REDIS_URL to share it across workers
+    SESSION_TTL: int = 1800
+    SESSION_MAX_ENTRIES: int = 10000
+    SESSION_MAX_RESULTS: int = 20
+    SESSION_REDIS_URL: str = ""  # Needs the optional 'redis' package (pip install redis), which is not in requirements.txt
+
+    # Bulk CSV import (price/stock updates through Magento's async bulk API)
+    IMPORT_UPLOAD_DIR: str = "./temp_uploads"
+    IMPORT_BATCH_SIZE: int = 200  # Products per bulk request
+    IMPORT_MAX_CONCURRENCY: int = 4  # Bulk requests in flight per job
+    IMPORT_MAX_RETRIES: int = 4
+    IMPORT_RETRY_BASE_DELAY: float = 0.5  # Doubles per attempt, with jitter
+    IMPORT_RETRY_MAX_DELAY: float = 10.0
+    IMPORT_MAX_JOBS: int = 50  # Finished jobs kept for the status endpoint
+
+    # Streaming catalog export
+    EXPORT_PAGE_SIZE: int = 200
+    EXPORT_MAX_CONCURRENCY: int = 4  # Pages requested ahead of the one being streamed
+
 # Create a single instance of the settings to be used throughout the app
-settings = Settings()
\ No newline at end of file
+settings = Settings()
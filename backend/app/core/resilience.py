@@ -0,0 +1,121 @@
+# backend/app/core/resilience.py
+import asyncio
+import random
+import time
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, at most `burst` saved up. acquire()
+    waits until a token is available. pause() holds every caller back, e.g. for a
+    Retry-After the server sent. A rate of 0 disables limiting.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0: return
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def try_acquire(self) -> bool:
+        """Takes a token only if one is available right now, for optional work such as a hedged request."""
+        if self.rate <= 0: return True
+        now = time.monotonic()
+        if now < self._paused_until: return False
+        self._refill(now)
+        if self._tokens < 1: return False
+        self._tokens -= 1
+        return True
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate follows the server's throttling (AIMD): every throttled
+    response halves the rate (at most once a second, so one burst of 429s counts once),
+    and every success adds `recovery` back, up to `max_rate`.
+    """
+    def __init__(self, max_rate: float, burst: int, min_rate: float, recovery: float):
+        super().__init__(max_rate, burst)
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self._throttled_at = 0.0
+
+    def on_throttle(self, retry_after: float | None = None):
+        if self.max_rate <= 0: return
+        now = time.monotonic()
+        if now - self._throttled_at >= 1.0:
+            self._throttled_at = now
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+        if retry_after: self.pause(retry_after)
+
+    def on_success(self):
+        if self.rate < self.max_rate: self.rate = min(self.max_rate, self.rate + self.recovery)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds. After that, one trial call is let through (half-open):
+    success closes the circuit again, failure re-opens it for another period.
+    """
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._probe_started: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None: return "closed"
+        return "half_open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed": return True
+        if state == "open": return False
+        # Half-open: a single probe at a time. A probe that never reported back (cancelled) expires.
+        now = time.monotonic()
+        if self._probe_started is None or now - self._probe_started >= self.reset_timeout:
+            self._probe_started = now
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        return 0.0 if self._opened_at is None else max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self):
+        self.failures = 0
+        self._opened_at = self._probe_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self._opened_at is not None or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._probe_started = None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
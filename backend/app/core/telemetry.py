@@ -0,0 +1,144 @@
+# backend/app/core/telemetry.py
+"""
+Request ids, logging and Prometheus-style metrics without extra dependencies.
+
+Every HTTP request gets an id (the caller's X-Request-ID or a new one). It is kept in a
+context variable, so tasks started for the request inherit it. The "app" loggers print
+it, and the response echoes it. With METRICS_ENABLED, counters and histograms are kept
+in memory and rendered in the Prometheus text format on /metrics. When it is off,
+recording is a single attribute check.
+"""
+import logging
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+from app.core.config import settings
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra: pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labelnames: tuple):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, object] = {}
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        if not self.registry.enabled: return
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        return super().render() + [f"{self.name}{_labels(self.labelnames, labels)} {value:g}" for labels, value in self._values.items()]
+
+class Histogram(Metric):
+    """Bucket counts are stored per bucket and made cumulative when rendered."""
+    kind = "histogram"
+
+    def __init__(self, registry, name: str, help: str, labelnames: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        if not self.registry.enabled: return
+        series = self._values.get(labels)
+        if series is None: series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]  # buckets..., +Inf, sum
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, series in self._values.items():
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                total += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {total}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._metrics: dict[str, Metric] = {}
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(self, name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(self, name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics.values() for line in metric.render()) + "\n"
+
+metrics = MetricsRegistry(settings.METRICS_ENABLED)
+
+HTTP_SECONDS = metrics.histogram("http_request_duration_seconds", "HTTP requests by route and status, streaming included.", ("method", "route", "status"))
+STAGE_SECONDS = metrics.histogram("pipeline_stage_duration_seconds", "Chat pipeline stages (TaskPlanner stages and measured blocks).", ("pipeline", "stage"))
+# `store`/`tenant` is the store URL only for stores registered through /auth/connect, "unregistered" otherwise (see StoreMetadataCache.metric_label).
+MAGENTO_SECONDS = metrics.histogram("magento_request_duration_seconds", "Magento REST calls per store, one sample per attempt.", ("store", "method", "status"))
+MAGENTO_ERRORS = metrics.counter("magento_request_errors_total", "Magento attempts that failed with a 5xx/429 or a network error.", ("store", "reason"))
+LLM_SECONDS = metrics.histogram("llm_request_duration_seconds", "LLM calls through the gateway, queueing and retries included.", ("model", "stream"))
+LLM_TOKENS = metrics.counter("llm_tokens_total", "LLM tokens reported by the provider.", ("tenant", "type"))
+LLM_FAILURES = metrics.counter("llm_request_failures_total", "LLM calls that failed after retries.", ("tenant", "reason"))
+
+class RequestContextMiddleware:
+    """Pure ASGI (so streamed responses pass straight through): sets the request id and times the request."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http": return await self.app(scope, receive, send)
+        request_id = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-request-id"), None) or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id[:64])
+        started, status = time.perf_counter(), 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id_var.get().encode("latin-1"))]
+            await send(message)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            route = scope.get("route")
+            # Route templates, not raw paths, keep the label set small; unmatched paths share one label.
+            HTTP_SECONDS.observe(time.perf_counter() - started, scope["method"], getattr(route, "path", "unmatched"), status)
+            request_id_var.reset(token)
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+def configure_logging():
+    """Sends the "app" loggers to stderr with the request id on every line."""
+    logger = logging.getLogger("app")
+    if logger.handlers: return
+    handler = logging.StreamHandler()
+    handler.addFilter(_RequestIdFilter())
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    logger.propagate = False
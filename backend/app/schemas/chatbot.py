@@ -15,12 +15,17 @@ class ChatRequest(BaseModel):
     user_id: str
     message: str
     credentials: Optional[MagentoCredentials] = None
+    # Token from /auth/connect; when it is still valid, `credentials` can be left out
+    session_token: Optional[str] = None
     # vvvvvv THIS IS THE FIX vvvvvv
     context: Optional[Any] = None
     # ^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+    # Reference to the server-side session returned by the previous turn; preferred over `context`
+    context_ref: Optional[str] = None
 
 # The response model
 class ChatResponse(BaseModel):
     response_text: str
     intent: Optional[str] = None
-    data: Optional[Any] = None
\ No newline at end of file
+    data: Optional[Any] = None
+    context_ref: Optional[str] = None
@@ -0,0 +1,14 @@
+# backend/app/schemas/export.py
+from pydantic import BaseModel
+from typing import Optional, Literal
+from app.schemas.chatbot import MagentoCredentials
+
+class ExportRequest(BaseModel):
+    credentials: MagentoCredentials
+    format: Literal["csv", "ndjson"] = "csv"
+    # Same keys as the product_query tool arguments: keywords, sku, brand, on_sale, attributes
+    filters: dict = {}
+    # Extra custom attribute codes to add as columns
+    attributes: list[str] = []
+    # Id of the last product already received, to resume an interrupted export
+    cursor: Optional[int] = None
@@ -0,0 +1,48 @@
+# backend/app/services/attribute_cache.py
+from app.core.cache import AsyncTTLCache
+from app.core.config import settings
+
+def normalize_label(label) -> str:
+    """Case- and whitespace-insensitive form used as the lookup key for option labels."""
+    return " ".join(str(label).split()).casefold()
+
+class AttributeOptions:
+    """
+    Label -> option value index for one attribute of one store, built once from
+    the `/products/attributes/{code}/options` response so lookups are O(1).
+    """
+    __slots__ = ("labels", "max_label_words", "_by_label", "_canonical")
+
+    def __init__(self, options):
+        self.labels: list[str] = []
+        self.max_label_words = 0
+        self._by_label: dict[str, str] = {}
+        self._canonical: dict[str, str] = {}
+        if not isinstance(options, list): return
+        for option in options:
+            if not isinstance(option, dict): continue
+            label, value = str(option.get('label') or '').strip(), option.get('value')
+            if not label or value in (None, ''): continue
+            normalized = normalize_label(label)
+            self.labels.append(label)
+            self._by_label.setdefault(normalized, str(value))
+            self._canonical.setdefault(normalized, label)
+            self.max_label_words = max(self.max_label_words, len(normalized.split()))
+
+    def __len__(self) -> int:
+        return len(self._by_label)
+
+    def resolve(self, label: str) -> str | None:
+        return self._by_label.get(normalize_label(label))
+
+    def canonical_label(self, label: str) -> str | None:
+        """The store's own spelling of `label`, or None if no option matches."""
+        return self._canonical.get(normalize_label(label))
+
+class AttributeOptionCache(AsyncTTLCache):
+    """Per-store cache of attribute option indexes, keyed by (store_url, attribute_code)."""
+    def invalidate_store(self, store_url: str, attribute_code: str | None = None):
+        store_url = store_url.rstrip('/')
+        self.invalidate_where(lambda key: key[0] == store_url and (attribute_code is None or key[1] == attribute_code))
+
+attribute_option_cache = AttributeOptionCache(maxsize=settings.ATTRIBUTE_CACHE_MAX_ENTRIES, ttl=settings.ATTRIBUTE_CACHE_TTL)
@@ -0,0 +1,150 @@
+# backend/app/services/catalog_export.py
+import asyncio
+import csv
+import io
+import json
+import logging
+from typing import AsyncIterator
+from app.services.magento_client import magento_client
+from app.services.product_formatter import strip_html
+from app.services.store_metadata import store_metadata
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = "items[id,sku,name,price,status,updated_at,custom_attributes,media_gallery_entries[file,types]],total_count"
+BASE_COLUMNS = ["id", "sku", "name", "price", "special_price", "status", "updated_at", "short_description", "image_url"]
+
+class ExportError(Exception):
+    """Magento refused or failed a page request."""
+
+class CatalogExport:
+    """
+    Streams every product matching a set of filter groups as CSV or NDJSON. Pages are
+    requested in batches of `EXPORT_MAX_CONCURRENCY` and emitted in order, so at most that
+    many pages are held in memory whatever the catalog size. Products are sorted by
+    entity id, and each batch starts after the last id emitted (keyset paging) rather than
+    at a deeper offset; `cursor` (the id of the last product a client received) resumes an
+    interrupted export the same way. `filters` comes from MagentoService.search_filters;
+    None (an unknown brand) exports an empty file.
+
+    On a catalog that is being edited the export is best-effort: within one batch pages are
+    still offsets, so a product leaving the filter while the batch is in flight can push a
+    neighbour from one page onto the previous one, which was already read.
+    """
+    def __init__(self, credentials: dict, filters: tuple[list[str], int] | None, fmt: str = "csv", attributes: list[str] | None = None, cursor: int | None = None):
+        self.credentials = credentials
+        self.fmt = fmt
+        self.attributes = [code for code in attributes or [] if code not in BASE_COLUMNS]
+        self.columns = BASE_COLUMNS + self.attributes
+        self.media_base_url = store_metadata.media_base_url(credentials["store_url"])
+        self.page_size = settings.EXPORT_PAGE_SIZE
+        self.total_count: int | None = None
+        self.last_id = cursor
+        self._cursor = cursor
+        self._first_page: list | None = None
+        if filters is None:
+            self.total_count, self._first_page = 0, []
+            filters = ([], 0)
+        self._after_group = filters[1]
+        parts = list(filters[0]) + ["searchCriteria[sortOrders][0][field]=entity_id", "searchCriteria[sortOrders][0][direction]=ASC", f"searchCriteria[pageSize]={self.page_size}", f"fields={EXPORT_FIELDS}"]
+        self._query = "?" + "&".join(parts)
+
+    def _query_after(self, after_id: int | None) -> str:
+        if after_id is None: return self._query
+        group = self._after_group
+        return f"{self._query}&searchCriteria[filter_groups][{group}][filters][0][field]=entity_id&searchCriteria[filter_groups][{group}][filters][0][value]={after_id}&searchCriteria[filter_groups][{group}][filters][0][condition_type]=gt"
+
+    async def _fetch_page(self, page: int, after_id: int | None) -> dict:
+        response = await magento_client.request("GET", "/products", self.credentials, query_params=f"{self._query_after(after_id)}&searchCriteria[currentPage]={page}")
+        if response.is_error:
+            raise ExportError(f"Magento API Error: {response.status_code} - {response.reason_phrase}")
+        # Pages can be several MB of JSON; decoding one off the event loop keeps chats responsive.
+        return await asyncio.to_thread(json.loads, response.content)
+
+    async def open(self):
+        """Fetches the first page, so errors surface before the response starts streaming."""
+        if self._first_page is not None: return
+        result = await self._fetch_page(1, self._cursor)
+        self.total_count = result.get("total_count", 0) if isinstance(result, dict) else 0
+        self._first_page = (result.get("items") or []) if isinstance(result, dict) else []
+
+    async def pages(self) -> AsyncIterator[list]:
+        if self._first_page is None: await self.open()
+        items, self._first_page = self._first_page, None
+        yield items
+        # `remaining` is how many products are left after the pages read so far; it comes from the
+        # total_count of the latest batch, so products added with higher ids are still picked up.
+        after_id, next_page, remaining = self._cursor, 2, self.total_count - self.page_size
+        while remaining > 0:
+            # Magento answers a currentPage past the end with the last page again; _new_rows drops the repeats.
+            last_page = next_page + min(settings.EXPORT_MAX_CONCURRENCY, -(-remaining // self.page_size)) - 1
+            tasks = [asyncio.create_task(self._fetch_page(page, after_id)) for page in range(next_page, last_page + 1)]
+            batch_last_id, total_count = None, 0
+            try:
+                for task in tasks:
+                    result = await task
+                    items = (result.get("items") or []) if isinstance(result, dict) else []
+                    if isinstance(result, dict): total_count = result.get("total_count", 0)
+                    ids = [product["id"] for product in items if isinstance(product, dict) and product.get("id") is not None]
+                    if ids: batch_last_id = max(ids) if batch_last_id is None else max(batch_last_id, *ids)
+                    yield items
+            finally:
+                for task in tasks: task.cancel()
+            if batch_last_id is None: return
+            remaining = total_count - last_page * self.page_size
+            after_id, next_page = batch_last_id, 1
+
+    def _row(self, product: dict) -> dict:
+        attrs = {attr.get("attribute_code"): attr.get("value") for attr in product.get("custom_attributes") or [] if isinstance(attr, dict)}
+        image_path = ""
+        for entry in product.get("media_gallery_entries") or []:
+            if isinstance(entry, dict) and (not image_path or "image" in (entry.get("types") or [])):
+                image_path = entry.get("file") or ""
+                if "image" in (entry.get("types") or []): break
+        description = attrs.get("short_description")
+        row = {
+            "id": product.get("id"), "sku": product.get("sku"), "name": product.get("name"), "price": product.get("price"),
+            "special_price": attrs.get("special_price"), "status": product.get("status"), "updated_at": product.get("updated_at"),
+            "short_description": strip_html(description) if isinstance(description, str) else "",
+            "image_url": f"{self.media_base_url}{image_path}" if image_path else "",
+        }
+        for code in self.attributes: row[code] = attrs.get(code)
+        return row
+
+    def _new_rows(self, items: list) -> list[dict]:
+        # Page offsets can move while the export runs (products edited in or out of the filter);
+        # ids are emitted in increasing order, so anything at or below the last one is a repeat.
+        rows = []
+        for product in items:
+            if not isinstance(product, dict) or product.get("id") is None: continue
+            if self.last_id is not None and product["id"] <= self.last_id: continue
+            self.last_id = product["id"]
+            rows.append(self._row(product))
+        return rows
+
+    async def stream(self) -> AsyncIterator[str]:
+        """The export body, one chunk per page. A CSV export that fails partway raises instead of ending early."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.columns, extrasaction="ignore")
+        if self.fmt == "csv":
+            writer.writeheader()
+            yield buffer.getvalue()
+        try:
+            async for items in self.pages():
+                rows = self._new_rows(items)
+                if not rows: continue
+                if self.fmt == "csv":
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerows(rows)
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+        except Exception as e:
+            # Headers (and the 200) are long gone. NDJSON ends with an error line carrying the
+            # cursor; CSV has no room for one, so the error propagates and the server aborts the
+            # chunked response instead of ending it cleanly, and clients see a failed download.
+            logger.warning(f"Export stopped after product id {self.last_id}. Error: {e}")
+            if self.fmt == "ndjson": yield json.dumps({"error": str(e), "cursor": self.last_id}) + "\n"
+            else: raise
@@ -0,0 +1,239 @@
+# backend/app/services/catalog_import.py
+import asyncio
+import csv
+import logging
+import random
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+import httpx
+from app.services.magento_client import magento_client
+from app.services.magento_wrapper import magento_service
+from app.services.attribute_cache import AttributeOptions
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Columns that map to top-level product fields rather than custom attributes.
+PRODUCT_FIELDS = {"name": str, "price": float, "weight": float, "status": int, "visibility": int}
+STOCK_FIELDS = {"qty": float, "is_in_stock": bool}
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+MAX_REPORTED_ERRORS = 50
+_TRUE, _FALSE = {"1", "true", "yes", "y", "in stock"}, {"0", "false", "no", "n", "out of stock"}
+
+def _parse(kind, value: str):
+    if kind is bool:
+        lowered = value.casefold()
+        if lowered in _TRUE: return True
+        if lowered in _FALSE: return False
+        raise ValueError(f"expected yes/no, got '{value}'")
+    if kind is str: return value
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"expected a number, got '{value}'")
+    if number < 0: raise ValueError(f"must not be negative, got '{value}'")
+    if kind is int:
+        if not number.is_integer(): raise ValueError(f"expected a whole number, got '{value}'")
+        return int(number)
+    return number
+
+class RowValidator:
+    """
+    Turns CSV rows into product payloads for the bulk API. `sku` is required, empty
+    cells are left untouched, and custom attribute columns are checked against the
+    store's attribute schema (select labels are resolved to option ids).
+    """
+    def __init__(self, attributes: dict[str, tuple[dict, AttributeOptions | None]]):
+        self.attributes = attributes
+
+    def __call__(self, row: dict) -> dict:
+        sku = (row.get("sku") or "").strip()
+        if not sku: raise ValueError("missing sku")
+        product, stock, custom = {"sku": sku}, {}, []
+        for column, raw in row.items():
+            value = (raw or "").strip() if isinstance(raw, str) else ""
+            if column == "sku" or column is None or not value: continue
+            try:
+                if column in PRODUCT_FIELDS: product[column] = _parse(PRODUCT_FIELDS[column], value)
+                elif column in STOCK_FIELDS: stock[column] = _parse(STOCK_FIELDS[column], value)
+                else: custom.append({"attribute_code": column, "value": self._attribute_value(column, value)})
+            except ValueError as e:
+                raise ValueError(f"{column}: {e}")
+        if stock: product["extension_attributes"] = {"stock_item": stock}
+        if custom: product["custom_attributes"] = custom
+        return {"product": product}
+
+    def _attribute_value(self, code: str, value: str) -> str:
+        metadata, options = self.attributes[code]
+        if options is not None:
+            labels = [part.strip() for part in value.split(",")] if metadata.get("frontend_input") == "multiselect" else [value]
+            ids = []
+            for label in labels:
+                option_id = options.resolve(label)
+                if option_id is None: raise ValueError(f"unknown option '{label}'")
+                ids.append(option_id)
+            return ",".join(ids)
+        if metadata.get("backend_type") in ("decimal", "int"):
+            return str(_parse(int if metadata["backend_type"] == "int" else float, value))
+        return value
+
+async def load_validator(columns: list[str], credentials: dict) -> RowValidator:
+    """Fetches the schema of every custom attribute column; unknown columns fail the whole import up front."""
+    if "sku" not in columns: raise ValueError("The CSV needs a 'sku' column.")
+    custom = [c for c in columns if c and c != "sku" and c not in PRODUCT_FIELDS and c not in STOCK_FIELDS]
+
+    async def describe(code: str):
+        metadata = await magento_service.get_product_attribute(code, credentials)
+        if metadata is None: raise ValueError(f"Unknown attribute column '{code}'.")
+        options = await magento_service.get_attribute_options(code, credentials) if metadata.get("frontend_input") in ("select", "multiselect") else None
+        return code, (metadata, options)
+    return RowValidator(dict(await asyncio.gather(*(describe(code) for code in custom))))
+
+
+class ImportJob:
+    """Progress of one CSV import, as reported by the job-status endpoint."""
+    def __init__(self, filename: str, path: Path, credentials: dict):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.path = path
+        self.credentials = credentials
+        self.status = "queued"  # queued -> running -> completed | failed
+        self.message = ""
+        self.rows_read = self.rows_invalid = self.rows_accepted = self.rows_failed = 0
+        self.batches_sent = self.retries = 0
+        self.bulk_uuids: list[str] = []
+        self.errors: list[str] = []
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+
+    def add_error(self, error: str):
+        if len(self.errors) < MAX_REPORTED_ERRORS: self.errors.append(error)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> dict:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.id, "filename": self.filename, "status": self.status, "message": self.message,
+            "rows_read": self.rows_read, "rows_invalid": self.rows_invalid, "rows_accepted": self.rows_accepted, "rows_failed": self.rows_failed,
+            "batches_sent": self.batches_sent, "retries": self.retries, "rows_per_sec": round(self.rows_read / elapsed, 1) if elapsed > 0 else 0.0,
+            "bulk_uuids": self.bulk_uuids, "errors": self.errors,
+        }
+
+
+class CatalogImporter:
+    """
+    Runs CSV imports in the background. The file is read one batch at a time (in a
+    worker thread), so memory stays flat regardless of its size, and at most
+    IMPORT_MAX_CONCURRENCY bulk requests per job are in flight. Magento queues each
+    accepted batch and applies it asynchronously; its bulk uuids are kept on the job.
+    """
+    def __init__(self):
+        self.jobs: OrderedDict[str, ImportJob] = OrderedDict()
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def get(self, job_id: str) -> ImportJob | None:
+        return self.jobs.get(job_id)
+
+    def start(self, filename: str, path: Path, credentials: dict) -> ImportJob:
+        job = ImportJob(filename, path, credentials)
+        self.jobs[job.id] = job
+        for old_id in [i for i, j in self.jobs.items() if j.finished][:max(0, len(self.jobs) - settings.IMPORT_MAX_JOBS)]:
+            del self.jobs[old_id]
+        task = self._tasks[job.id] = asyncio.create_task(self._run(job), name=f"catalog-import:{job.id}")
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        return job
+
+    @staticmethod
+    def _read_batch(reader: csv.DictReader, validate: RowValidator, job: ImportJob, size: int) -> list[dict]:
+        batch = []
+        for row in reader:
+            job.rows_read += 1
+            try:
+                batch.append(validate(row))
+            except ValueError as e:
+                job.rows_invalid += 1
+                job.add_error(f"line {reader.line_num}: {e}")
+            if len(batch) >= size: break
+        return batch
+
+    async def _run(self, job: ImportJob):
+        job.status = "running"
+        try:
+            with open(job.path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.DictReader(f)
+                validate = await load_validator([c.strip() for c in reader.fieldnames or []], job.credentials)
+                reader.fieldnames = [c.strip() for c in reader.fieldnames]
+                slots = asyncio.Semaphore(settings.IMPORT_MAX_CONCURRENCY)
+                in_flight: set[asyncio.Task] = set()
+                while True:
+                    # Waiting for a free slot before reading on is what bounds memory.
+                    await slots.acquire()
+                    batch = await asyncio.to_thread(self._read_batch, reader, validate, job, settings.IMPORT_BATCH_SIZE)
+                    if not batch:
+                        slots.release()
+                        break
+                    task = asyncio.create_task(self._submit(job, batch))
+                    in_flight.add(task)
+                    task.add_done_callback(lambda t: (in_flight.discard(t), slots.release()))
+                await asyncio.gather(*in_flight)
+            job.status = "completed"
+            job.message = f"{job.rows_accepted} of {job.rows_read} rows accepted by Magento."
+            if job.rows_accepted: magento_service.refresh_catalog(job.credentials)
+        except Exception as e:
+            job.status, job.message = "failed", str(e)
+            logger.warning(f"Import {job.id} ({job.filename}) failed. Error: {e}")
+        finally:
+            job.finished_at = time.time()
+            job.path.unlink(missing_ok=True)
+
+    async def _submit(self, job: ImportJob, batch: list[dict]):
+        """POSTs one batch to the bulk endpoint, retrying throttling, 5xx and network errors with backoff."""
+        for attempt in range(settings.IMPORT_MAX_RETRIES + 1):
+            retry_reason = None
+            try:
+                response = await magento_client.request("POST", "/products", job.credentials, json=batch, api="async/bulk/V1")
+                if response.status_code in RETRYABLE_STATUS: retry_reason = f"HTTP {response.status_code}"
+                else:
+                    response.raise_for_status()
+                    self._record(job, batch, response.json())
+                    return
+            except httpx.RequestError as e:
+                retry_reason = f"{type(e).__name__}: {e}"
+            except (httpx.HTTPStatusError, ValueError) as e:
+                job.rows_failed += len(batch)
+                job.add_error(f"batch starting at sku {batch[0]['product']['sku']}: {e}")
+                return
+            if attempt < settings.IMPORT_MAX_RETRIES:
+                job.retries += 1
+                delay = min(settings.IMPORT_RETRY_MAX_DELAY, settings.IMPORT_RETRY_BASE_DELAY * 2 ** attempt)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        job.rows_failed += len(batch)
+        job.add_error(f"batch starting at sku {batch[0]['product']['sku']}: gave up after {settings.IMPORT_MAX_RETRIES + 1} attempts ({retry_reason})")
+
+    @staticmethod
+    def _record(job: ImportJob, batch: list[dict], result: dict):
+        job.batches_sent += 1
+        if result.get("bulk_uuid"): job.bulk_uuids.append(result["bulk_uuid"])
+        items = result.get("request_items") or []
+        if not items:
+            job.rows_accepted += len(batch)
+            return
+        for item in items:
+            if item.get("status") == "accepted": job.rows_accepted += 1
+            else:
+                job.rows_failed += 1
+                index = item.get("id")
+                sku = batch[index]["product"]["sku"] if isinstance(index, int) and 0 <= index < len(batch) else "?"
+                job.add_error(f"sku {sku}: {item.get('error_message') or item.get('status')}")
+
+    async def aclose(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+catalog_importer = CatalogImporter()
@@ -0,0 +1,202 @@
+# backend/app/services/catalog_mirror.py
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Awaitable, Callable
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# The fields product_query's formatter needs, plus updated_at for incremental sync.
+MIRROR_FIELDS = "items[id,sku,name,price,special_price,updated_at,custom_attributes,media_gallery_entries[id,file,types]],total_count"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY, sku TEXT, name TEXT, short_description TEXT, manufacturer TEXT,
+    price REAL, special_price REAL, updated_at TEXT, generation INTEGER NOT NULL, data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_manufacturer ON products(manufacturer);
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name, sku, short_description, content='products', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts(rowid, name, sku, short_description) VALUES (new.id, new.name, new.sku, new.short_description);
+END;
+CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, sku, short_description) VALUES ('delete', old.id, old.name, old.sku, old.short_description);
+END;
+CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, sku, short_description) VALUES ('delete', old.id, old.name, old.sku, old.short_description);
+    INSERT INTO products_fts(rowid, name, sku, short_description) VALUES (new.id, new.name, new.sku, new.short_description);
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+def _float_or_none(value) -> float | None:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+def _row_for(product: dict, generation: int) -> tuple:
+    attrs = {attr.get('attribute_code'): attr.get('value') for attr in product.get('custom_attributes') or [] if isinstance(attr, dict)}
+    special_price = product.get('special_price') if product.get('special_price') is not None else attrs.get('special_price')
+    data = {key: product.get(key) for key in ('id', 'sku', 'name', 'price', 'custom_attributes', 'media_gallery_entries')}
+    data['special_price'] = special_price
+    return (
+        int(product['id']), product.get('sku'), product.get('name'), attrs.get('short_description'),
+        str(attrs['manufacturer']) if attrs.get('manufacturer') not in (None, '') else None,
+        _float_or_none(product.get('price')), _float_or_none(special_price), product.get('updated_at'),
+        generation, json.dumps(data),
+    )
+
+
+class MirrorStore:
+    """SQLite file holding one store's products, with a trigram FTS5 index over name/sku/short_description."""
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            # Sync bookkeeping is tiny, so it is kept in memory and written through.
+            self._meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+
+    def get_meta(self, key: str, default: str | None = None) -> str | None:
+        return self._meta.get(key, default)
+
+    def set_meta(self, **values):
+        values = {k: str(v) for k, v in values.items()}
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", list(values.items()))
+        self._meta.update(values)
+
+    def upsert(self, products: list, generation: int) -> str | None:
+        """Stores one page of products; returns the newest updated_at in the page."""
+        rows = [_row_for(p, generation) for p in products if isinstance(p, dict) and p.get('id') is not None]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO products (id, sku, name, short_description, manufacturer, price, special_price, updated_at, generation, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "sku=excluded.sku, name=excluded.name, short_description=excluded.short_description, manufacturer=excluded.manufacturer, "
+                "price=excluded.price, special_price=excluded.special_price, updated_at=excluded.updated_at, generation=excluded.generation, data=excluded.data",
+                rows,
+            )
+        return max((row[7] for row in rows if row[7]), default=None)
+
+    def delete_older_generations(self, generation: int) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM products WHERE generation < ?", (generation,)).rowcount
+
+    def query(self, keywords: str | None, brand_id: str | None, on_sale: bool, limit: int | None) -> tuple[list[dict], int]:
+        """Same semantics as product_query's live filters: LIKE %kw% on name/sku/short_description, AND brand, AND on_sale."""
+        conditions, args = [], []
+        if keywords:
+            if len(keywords) >= 3:
+                # A trigram phrase match is a case-insensitive substring match, i.e. LIKE %kw%.
+                conditions.append("p.id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)")
+                args.append('"' + keywords.replace('"', '""') + '"')
+            else:
+                conditions.append("(p.name LIKE ? OR p.sku LIKE ? OR p.short_description LIKE ?)")
+                args.extend([f"%{keywords}%"] * 3)
+        if brand_id:
+            conditions.append("p.manufacturer = ?")
+            args.append(str(brand_id))
+        if on_sale:
+            conditions.append("p.special_price IS NOT NULL")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            total_count = self._conn.execute(f"SELECT COUNT(*) FROM products p {where}", args).fetchone()[0]
+            rows = [] if limit is None else self._conn.execute(f"SELECT p.data FROM products p {where} ORDER BY p.id LIMIT ?", [*args, limit]).fetchall()
+        return [json.loads(row[0]) for row in rows], total_count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CatalogMirror:
+    """
+    Optional per-store local copy of the catalog. The first use of a store starts a
+    paginated bulk load in the background; later syncs only fetch products whose
+    `updated_at` moved, with a periodic full reload to drop deleted products.
+    product_query answers from the mirror only while it is fresh.
+    """
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._stores: dict[str, MirrorStore] = {}
+        self._syncs: dict[str, asyncio.Task] = {}
+
+    def _store(self, store_url: str) -> MirrorStore:
+        store = self._stores.get(store_url)
+        if store is None:
+            name = hashlib.sha1(store_url.encode()).hexdigest()[:16]
+            store = self._stores[store_url] = MirrorStore(self.directory / f"{name}.sqlite3")
+        return store
+
+    def is_fresh(self, store_url: str) -> bool:
+        store = self._store(store_url)
+        if store.get_meta("full_synced_at") is None: return False
+        return time.time() - float(store.get_meta("synced_at", "0")) <= settings.CATALOG_MIRROR_MAX_STALENESS
+
+    def schedule_sync(self, store_url: str, fetch_page: Callable[[str], Awaitable[dict]], force: bool = False):
+        """Starts a background sync for the store if one is due (or `force`d, e.g. after an import) and none is running."""
+        running = self._syncs.get(store_url)
+        if running is not None and not running.done(): return
+        store = self._store(store_url)
+        now = time.time()
+        full_due = now - float(store.get_meta("full_synced_at", "0")) >= settings.CATALOG_MIRROR_FULL_SYNC_INTERVAL
+        incremental_due = force or now - float(store.get_meta("synced_at", "0")) >= settings.CATALOG_MIRROR_SYNC_INTERVAL
+        if full_due or incremental_due:
+            self._syncs[store_url] = asyncio.create_task(self._sync(store_url, fetch_page, full=full_due), name=f"catalog-sync:{store_url}")
+
+    async def _sync(self, store_url: str, fetch_page: Callable[[str], Awaitable[dict]], full: bool):
+        store = self._store(store_url)
+        started_at = time.time()
+        since = None if full else store.get_meta("max_updated_at")
+        generation = int(store.get_meta("generation", "0")) + (1 if full else 0)
+        newest = store.get_meta("max_updated_at")
+        page, page_size, fetched = 1, settings.CATALOG_MIRROR_PAGE_SIZE, 0
+        try:
+            while True:
+                query = [f"searchCriteria[pageSize]={page_size}", f"searchCriteria[currentPage]={page}", f"fields={MIRROR_FIELDS}"]
+                if since:
+                    query += ["searchCriteria[filter_groups][0][filters][0][field]=updated_at", f"searchCriteria[filter_groups][0][filters][0][value]={urllib.parse.quote(since)}", "searchCriteria[filter_groups][0][filters][0][condition_type]=gteq"]
+                sort_field = "entity_id" if full else "updated_at"
+                query += [f"searchCriteria[sortOrders][0][field]={sort_field}", "searchCriteria[sortOrders][0][direction]=ASC"]
+                result = await fetch_page("?" + "&".join(query))
+                items = (result.get('items') or []) if isinstance(result, dict) else []
+                page_newest = await asyncio.to_thread(store.upsert, items, generation)
+                if page_newest and (newest is None or page_newest > newest): newest = page_newest
+                fetched += len(items)
+                total_count = result.get('total_count', 0) if isinstance(result, dict) else 0
+                if not items or page * page_size >= total_count: break
+                page += 1
+            removed = await asyncio.to_thread(store.delete_older_generations, generation) if full else 0
+            meta = {"synced_at": started_at, "generation": generation}
+            if newest: meta["max_updated_at"] = newest
+            if full: meta["full_synced_at"] = started_at
+            await asyncio.to_thread(store.set_meta, **meta)
+            logger.info(f"Catalog mirror {'full' if full else 'incremental'} sync for {store_url}: {fetched} products, {removed} removed.")
+        except Exception as e:
+            logger.warning(f"Catalog mirror sync for {store_url} failed, live API stays in use. Error: {e}")
+
+    async def query(self, store_url: str, keywords: str | None, brand_id: str | None, on_sale: bool, limit: int | None) -> tuple[list[dict], int]:
+        return await asyncio.to_thread(self._store(store_url).query, keywords, brand_id, on_sale, limit)
+
+    async def aclose(self):
+        for task in self._syncs.values():
+            task.cancel()
+        await asyncio.gather(*self._syncs.values(), return_exceptions=True)
+        for store in self._stores.values():
+            store.close()
+        self._syncs, self._stores = {}, {}
+
+catalog_mirror = CatalogMirror(settings.CATALOG_MIRROR_DIR)
@@ -0,0 +1,221 @@
+# backend/app/services/intent_cache.py
+import asyncio
+import copy
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable
+
+_PUNCTUATION = re.compile(r"[^\w\s\-./]")
+
+def normalize_message(message: str) -> str:
+    """Lower-cased, punctuation-light, whitespace-collapsed form of a chat message."""
+    return " ".join(_PUNCTUATION.sub(" ", message.casefold()).split())
+
+def _trigrams(text: str) -> frozenset[str]:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+# Words that never change what a message asks for. Negations ("not", "without"), brands,
+# numbers and "how many" are deliberately kept: they are exactly what separates near-duplicates.
+_FILLER_WORDS = frozenset("a an the please me show find list get give i we need want looking some are is there do you have currently".split())
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or word.endswith("ss") or any(ch.isdigit() for ch in word): return word
+    if word.endswith("ies"): return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "xes")): return word[:-2]
+    return word[:-1] if word.endswith("s") else word
+
+def _content_words(text: str) -> frozenset[str]:
+    """What a near-duplicate must agree on exactly: the normalized message minus filler, plurals folded."""
+    return frozenset(_singular(word) for word in text.split() if word not in _FILLER_WORDS)
+
+def _reusable(arguments: dict) -> bool:
+    # A details answer depends on the exact question, so only the exact tier may return it.
+    return arguments.get("task") != "details" and not arguments.get("question")
+
+
+class MemoryIntentBackend:
+    """In-process LRU of cache key -> tool-call arguments."""
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, dict] = OrderedDict()
+
+    async def get(self, key: str) -> dict | None:
+        value = self._data.get(key)
+        if value is not None: self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def clear(self):
+        self._data.clear()
+
+
+class SQLiteIntentBackend:
+    """On-disk backend so classifications survive restarts and are shared by workers on one host."""
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS intents (key TEXT PRIMARY KEY, arguments TEXT NOT NULL, created_at REAL NOT NULL)")
+
+    def _get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT arguments FROM intents WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, value: dict):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO intents (key, arguments, created_at) VALUES (?, ?, ?)", (key, json.dumps(value), time.time()))
+
+    def _clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM intents")
+
+    async def get(self, key: str) -> dict | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: dict):
+        await asyncio.to_thread(self._set, key, value)
+
+    async def clear(self):
+        await asyncio.to_thread(self._clear)
+
+
+class _SimilarityIndex:
+    """
+    Bounded character-trigram index used to find near-duplicate messages (Jaccard
+    similarity). A candidate is only reused when its content words are the same set,
+    so word order, filler and plurals may differ but "not on sale", "indoor" vs
+    "outdoor" or another brand never match.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[frozenset, frozenset, dict]] = OrderedDict()  # key -> (trigrams, content words, arguments)
+        self._postings: dict[str, set[str]] = {}
+
+    def add(self, key: str, text: str, arguments: dict):
+        if key in self._entries: self._remove(key)
+        if not _reusable(arguments): return
+        grams = _trigrams(text)
+        self._entries[key] = (grams, _content_words(text), arguments)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        grams, _, _ = self._entries.pop(key)
+        for gram in grams:
+            keys = self._postings.get(gram)
+            if keys is None: continue
+            keys.discard(key)
+            if not keys: del self._postings[gram]
+
+    def best_match(self, text: str, scope: str, threshold: float) -> dict | None:
+        grams, words = _trigrams(text), _content_words(text)
+        overlaps: dict[str, int] = {}
+        for gram in grams:
+            for key in self._postings.get(gram, ()):
+                overlaps[key] = overlaps.get(key, 0) + 1
+        best_score, best_args = threshold, None
+        for key, overlap in overlaps.items():
+            if not key.startswith(scope): continue
+            other_grams, other_words, arguments = self._entries[key]
+            if other_words != words: continue
+            score = overlap / (len(grams) + len(other_grams) - overlap)
+            if score >= best_score:
+                best_score, best_args = score, arguments
+        return best_args
+
+    def clear(self):
+        self._entries.clear()
+        self._postings.clear()
+
+
+class IntentCache:
+    """
+    Cache in front of the LLM intent classifier. Lookups go through an exact
+    tier (in-process LRU, then the optional SQLite backend) keyed on the
+    normalized message + model + tool schema, and an optional n-gram
+    similarity tier that reuses the arguments of a near-duplicate message
+    (same content words; never for details questions).
+    """
+    def __init__(self, memory: MemoryIntentBackend, disk: SQLiteIntentBackend | None = None, similarity_threshold: float = 0.0, schema: object = None):
+        self.memory = memory
+        self.disk = disk
+        self.similarity_threshold = similarity_threshold
+        self._similar = _SimilarityIndex(memory.maxsize) if similarity_threshold > 0 else None
+        self._schema_hash = hashlib.sha1(json.dumps(schema, sort_keys=True).encode()).hexdigest()[:12]
+        self.hits = {"memory": 0, "disk": 0, "similar": 0}
+        self.misses = 0
+
+    def _scope(self, model: str) -> str:
+        return f"{model}:{self._schema_hash}:"
+
+    def _key(self, normalized: str, model: str) -> str:
+        return self._scope(model) + hashlib.sha1(normalized.encode()).hexdigest()
+
+    async def get(self, message: str, model: str) -> dict | None:
+        normalized = normalize_message(message)
+        key = self._key(normalized, model)
+
+        arguments = await self.memory.get(key)
+        if arguments is not None:
+            self.hits["memory"] += 1
+            return copy.deepcopy(arguments)
+
+        if self.disk is not None:
+            arguments = await self.disk.get(key)
+            if arguments is not None:
+                self.hits["disk"] += 1
+                await self.memory.set(key, arguments)
+                if self._similar is not None: self._similar.add(key, normalized, arguments)
+                return copy.deepcopy(arguments)
+
+        if self._similar is not None:
+            arguments = self._similar.best_match(normalized, self._scope(model), self.similarity_threshold)
+            if arguments is not None:
+                self.hits["similar"] += 1
+                return copy.deepcopy(arguments)
+
+        self.misses += 1
+        return None
+
+    async def set(self, message: str, model: str, arguments: dict):
+        normalized = normalize_message(message)
+        key = self._key(normalized, model)
+        arguments = copy.deepcopy(arguments)
+        await self.memory.set(key, arguments)
+        if self.disk is not None: await self.disk.set(key, arguments)
+        if self._similar is not None: self._similar.add(key, normalized, arguments)
+
+    async def get_or_classify(self, message: str, model: str, classify: Callable[[str], Awaitable[dict]]) -> dict:
+        cached = await self.get(message, model)
+        if cached is not None: return cached
+        arguments = await classify(message)
+        # Never cache failures; the next attempt should reach the LLM again.
+        if arguments.get("task") != "error":
+            await self.set(message, model, arguments)
+        return arguments
+
+    async def clear(self):
+        await self.memory.clear()
+        if self.disk is not None: await self.disk.clear()
+        if self._similar is not None: self._similar.clear()
+
+    def stats(self) -> dict:
+        lookups = sum(self.hits.values()) + self.misses
+        return {"hits": dict(self.hits), "misses": self.misses, "hit_rate": (sum(self.hits.values()) / lookups) if lookups else 0.0}
@@ -0,0 +1,110 @@
+# backend/app/services/intent_parser.py
+"""
+Deterministic fast path for messages that don't need the LLM to understand:
+bare SKUs, "count <keywords>", "show 20 <keywords>", "<brand> <keywords> on sale".
+Produces the same argument dict as the `product_query` tool in nlu_service.
+"""
+import re
+from app.services.attribute_cache import AttributeOptions, normalize_label
+
+SKU_PATTERN = re.compile(r"^(?=[A-Za-z0-9._/-]*\d)[A-Za-z0-9][A-Za-z0-9._/-]{2,63}$")
+_COUNT_PREFIX = re.compile(r"^(?:count|how many)(?:\s+of)?(?:\s+the)?\b\s*", re.I)
+_SEARCH_PREFIX = re.compile(r"^(?:show|find|list|get|search(?:\s+for)?|look\s+for)(?:\s+me)?(?:\s+(?:all|the|some))?\b\s*", re.I)
+_EXPORT_PREFIX = re.compile(r"^(?:export|download)(?:\s+(?:all|the|every))?\b\s*", re.I)
+_EXPORT_SUFFIX = re.compile(r"\s*\b(?:as|to|in)\s+(?:an?\s+)?(?:csv|spreadsheet|file)(?:\s+file)?$", re.I)
+_LIMIT = re.compile(r"^(?:top\s+|first\s+)?(\d{1,3})\b\s*", re.I)
+_ON_SALE = re.compile(r"\s*\b(?:(?:that\s+)?(?:are|is)\s+)?(?:on\s+sale|on\s+special|discounted|with\s+(?:a\s+)?special\s+price)\b\s*", re.I)
+# Anything that hints at a question, comparison or attribute filter is left to the LLM.
+# Prepositions and modifiers ("bulbs from osram", "new arrivals") change what the other words mean, so they go there too.
+_NEEDS_LLM = re.compile(r"[?$%<>]|\b(?:what|which|why|when|where|who|does|do|is|are|can|could|should|tell|explain|compare|difference|between|under|over|below|above|cheap\w*|than|less|more|price|cost|details?|spec\w*|colou?r|size|with|without|category|in|of|on|at|from|by|via|made|not|and|or|new|newest|latest|recent\w*|best\w*|top|popular|featured|trending|similar|other|arrivals?)\b", re.I)
+_QUESTION = re.compile(r"\?|^(?:what|which|why|how|when|where|who|does|do|is|are|can|could|will|would|should|tell|explain|describe|compare)\b", re.I)
+_GENERIC_WORDS = {"product", "products", "item", "items", "results"}
+# Conversational words that are never keywords; a message that needs them is phrased freely enough to go to the LLM.
+_FILLER_WORDS = frozenset("hi hello hey thanks please i i'm im we need want like looking help me my us find show get see just some any a an the for to you your got".split())
+_TRAILING_PUNCTUATION = ".!,;: "
+
+CONFIDENCE_SKU = 1.0
+CONFIDENCE_COMMAND = 0.9
+CONFIDENCE_BRAND_OR_SALE_PHRASE = 0.85
+CONFIDENCE_PHRASE = 0.75
+MAX_PHRASE_WORDS = 6
+
+def _singular(word: str) -> str:
+    # Keywords become LIKE %kw% filters. Only ever cut letters off the end, so the filter stays a
+    # superset of the plural: "batteries" -> %batteri% matches "battery", where %battery% would miss "batteries".
+    lower = word.lower()
+    if len(word) > 4 and lower.endswith("ies"): return word[:-2]
+    if len(word) > 3 and lower.endswith("s") and not lower.endswith(("ss", "us", "is")): return word[:-1]
+    return word
+
+def _extract_brand(words: list[str], brands: AttributeOptions) -> tuple[str | None, list[str], list[str]]:
+    """Splits out the longest run of words that is a known brand label (one brand per message): (brand, before, after)."""
+    for size in range(min(brands.max_label_words, len(words)), 0, -1):
+        for start in range(len(words) - size + 1):
+            label = brands.canonical_label(" ".join(words[start:start + size]))
+            if label:
+                return label, words[:start], words[start + size:]
+    return None, words, []
+
+def parse_intent(message: str, brands: AttributeOptions | None) -> tuple[dict | None, float]:
+    """
+    Returns (arguments, confidence). `arguments` is None when the message doesn't fit the
+    grammar. Without a brand dictionary only bare SKUs are accepted, since any word could be a brand.
+    """
+    text = " ".join(message.split()).strip(_TRAILING_PUNCTUATION)
+    if not text: return None, 0.0
+
+    if " " not in text and SKU_PATTERN.match(text):
+        return {"task": "search", "sku": text}, CONFIDENCE_SKU
+    if brands is None: return None, 0.0
+
+    arguments: dict = {}
+    confidence = CONFIDENCE_PHRASE
+    if match := _COUNT_PREFIX.match(text):
+        arguments["task"], confidence = "count", CONFIDENCE_COMMAND
+        text = text[match.end():].rstrip("?").strip()
+    elif match := _EXPORT_PREFIX.match(text):
+        arguments["task"], confidence = "export", CONFIDENCE_COMMAND
+        text = _EXPORT_SUFFIX.sub("", text[match.end():])
+    elif match := _SEARCH_PREFIX.match(text):
+        arguments["task"], confidence = "search", CONFIDENCE_COMMAND
+        text = text[match.end():]
+        if limit_match := _LIMIT.match(text):
+            arguments["limit"] = int(limit_match.group(1))
+            text = text[limit_match.end():]
+    else:
+        arguments["task"] = "search"
+
+    text, sale_hits = _ON_SALE.subn(" ", text)
+    if sale_hits: arguments["on_sale"] = True
+
+    if _NEEDS_LLM.search(text): return None, 0.0
+    words = [word for word in text.split() if word.strip(_TRAILING_PUNCTUATION)]
+    if len(words) > MAX_PHRASE_WORDS: return None, 0.0
+
+    brand, before, after = _extract_brand(words, brands)
+    if brand: arguments["brand"] = brand
+    words = before + after
+    content = [word for word in words if normalize_label(word) not in _FILLER_WORDS]
+    if len(content) < len(words) or (before and after):
+        # Words outside the grammar are left ("I need philips bulbs"), or the brand sat between
+        # other words ("LED philips bulbs"); a brand doesn't make either a sure parse.
+        words, confidence = content, min(confidence, CONFIDENCE_PHRASE)
+    elif (brand or sale_hits) and confidence < CONFIDENCE_BRAND_OR_SALE_PHRASE:
+        confidence = CONFIDENCE_BRAND_OR_SALE_PHRASE
+
+    words = [word for word in words if normalize_label(word) not in _GENERIC_WORDS]
+    if words:
+        words[-1] = _singular(words[-1])
+        arguments["keywords"] = " ".join(words)
+    elif not brand and not sale_hits and arguments["task"] != "export":
+        return None, 0.0
+    return arguments, confidence
+
+def fast_parse(message: str, brands: AttributeOptions | None, min_confidence: float) -> dict | None:
+    arguments, confidence = parse_intent(message, brands)
+    return arguments if arguments is not None and confidence >= min_confidence else None
+
+def looks_like_question(message: str) -> bool:
+    """True for messages phrased as a question, e.g. a follow-up about the product just shown."""
+    return bool(_QUESTION.search(message.strip()))
@@ -0,0 +1,193 @@
+# backend/app/services/llm_gateway.py
+import asyncio
+import time
+from collections import Counter, defaultdict, deque
+import openai
+from openai import AsyncOpenAI
+from app.core.config import settings
+from app.core.resilience import AdaptiveRateLimiter, backoff_delay
+from app.core.telemetry import LLM_FAILURES, LLM_SECONDS, LLM_TOKENS
+from app.services.store_metadata import store_metadata
+
+class LLMDeadlineExceeded(Exception):
+    """The call (queueing, retries and hedges included) did not finish within its deadline."""
+
+def _retry_after(error: openai.APIStatusError) -> float | None:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] if ordered else 0.0
+
+def _tenant_label(tenant: str) -> str:
+    return tenant if tenant == "default" else store_metadata.metric_label(tenant)
+
+class LLMGateway:
+    """
+    Single entry point for chat.completions.create. Every call is bounded by a global
+    and a per-tenant (store) concurrency limit and an adaptive request rate that halves
+    on 429s. Each call gets an overall deadline (for streams, reading every chunk
+    included), bounded retries on throttling, connection errors and 5xx, and
+    (non-streaming only) a hedged second request once the first is slower than the
+    recent p95, if a rate token and a global and tenant slot are free. Tokens, latencies
+    and outcomes are counted per tenant for stats(). A stream holds its slots until it
+    is exhausted or aclose()d, which also closes the provider connection.
+
+        response = await llm_gateway.create(tenant=store_url, model=..., messages=...)
+    """
+    def __init__(self, client: AsyncOpenAI):
+        self.client = client
+        self.limiter = AdaptiveRateLimiter(settings.LLM_RATE_LIMIT, settings.LLM_RATE_BURST, settings.LLM_MIN_RATE, settings.LLM_RATE_RECOVERY)
+        self._global = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        self._tenants: defaultdict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY_PER_TENANT))
+        self._latencies: defaultdict[tuple, deque] = defaultdict(lambda: deque(maxlen=500))  # (model, uses tools) -> seconds
+        self.counters: defaultdict[str, Counter] = defaultdict(Counter)  # tenant -> requests, tokens, errors, ...
+
+    async def create(self, tenant: str | None = None, deadline: float | None = None, **kwargs):
+        """Same arguments and result as client.chat.completions.create (streams included)."""
+        tenant = tenant or "default"
+        deadline = settings.LLM_DEADLINE if deadline is None else deadline
+        self.counters[tenant]["requests"] += 1
+        try:
+            return await asyncio.wait_for(self._create(tenant, kwargs, time.perf_counter() + deadline), deadline)
+        except asyncio.TimeoutError:
+            raise self._deadline_exceeded(tenant, deadline)
+        except Exception as e:
+            self.counters[tenant]["failed"] += 1
+            LLM_FAILURES.inc(_tenant_label(tenant), type(e).__name__)
+            raise
+
+    def _deadline_exceeded(self, tenant: str, deadline: float) -> LLMDeadlineExceeded:
+        self.counters[tenant]["deadline_exceeded"] += 1
+        LLM_FAILURES.inc(_tenant_label(tenant), "deadline")
+        return LLMDeadlineExceeded(f"No answer from the LLM within {deadline:.0f}s")
+
+    async def _create(self, tenant: str, kwargs: dict, expires: float):
+        started = time.perf_counter()
+        tenant_slots = self._tenants[tenant]
+        await tenant_slots.acquire()
+        try:
+            await self._global.acquire()
+        except BaseException:
+            tenant_slots.release()
+            raise
+        def release():
+            self._global.release()
+            tenant_slots.release()
+        handed_off = False
+        try:
+            if kwargs.get("stream"):
+                if settings.LLM_STREAM_USAGE: kwargs.setdefault("stream_options", {"include_usage": True})
+                stream = await self._with_retries(tenant, kwargs, hedge=False)
+                handed_off = True
+                return self._stream(stream, tenant, kwargs, started, expires, release)  # Slots are held until the stream ends
+            response = await self._with_retries(tenant, kwargs, hedge=settings.LLM_HEDGE_ENABLED)
+            self._record(tenant, kwargs, started, getattr(response, "usage", None))
+            return response
+        finally:
+            if not handed_off: release()
+
+    async def _with_retries(self, tenant: str, kwargs: dict, hedge: bool):
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            await self.limiter.acquire()
+            try:
+                response = await (self._hedged(tenant, kwargs) if hedge else self.client.chat.completions.create(**kwargs))
+                self.limiter.on_success()
+                return response
+            except openai.RateLimitError as e:
+                self.counters[tenant]["throttled"] += 1
+                if e.code == "insufficient_quota": raise  # Waiting won't help
+                self.limiter.on_throttle(_retry_after(e))
+                if attempt == settings.LLM_MAX_RETRIES: raise
+            except (openai.APIConnectionError, openai.InternalServerError):  # APITimeoutError is an APIConnectionError
+                self.counters[tenant]["errors"] += 1
+                if attempt == settings.LLM_MAX_RETRIES: raise
+            await asyncio.sleep(backoff_delay(attempt, settings.LLM_RETRY_BASE_DELAY, settings.LLM_RETRY_MAX_DELAY))
+
+    def _hedge_delay(self, kwargs: dict) -> float | None:
+        latencies = self._latencies[(kwargs.get("model"), bool(kwargs.get("tools")))]
+        if len(latencies) < settings.LLM_HEDGE_MIN_SAMPLES: return None
+        return max(settings.LLM_HEDGE_MIN_DELAY, _percentile(latencies, settings.LLM_HEDGE_PERCENTILE))
+
+    async def _hedged(self, tenant: str, kwargs: dict):
+        """Sends a duplicate request if the first is slower than usual and spare capacity exists; first answer wins."""
+        primary = asyncio.create_task(self.client.chat.completions.create(**kwargs))
+        tasks = [primary]
+        try:
+            delay = self._hedge_delay(kwargs)
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+            # The hedge is a real request: it needs a rate token and a global and tenant slot, but never waits for them.
+            tenant_slots = self._tenants[tenant]
+            if delay is None or primary.done() or self._global.locked() or tenant_slots.locked() or not self.limiter.try_acquire():
+                return await primary
+            await self._global.acquire()  # Not locked, so these don't wait
+            await tenant_slots.acquire()
+            try:
+                self.counters[tenant]["hedges"] += 1
+                tasks.append(asyncio.create_task(self.client.chat.completions.create(**kwargs)))
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if task is not primary: self.counters[tenant]["hedge_wins"] += 1
+                            return task.result()
+                raise primary.exception()
+            finally:
+                tenant_slots.release()
+                self._global.release()
+        finally:
+            for task in tasks:
+                if not task.done(): task.cancel()
+
+    async def _stream(self, stream, tenant: str, kwargs: dict, started: float, expires: float, release):
+        usage, first_token = None, None
+        chunks = stream.__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, expires - time.perf_counter()))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise self._deadline_exceeded(tenant, expires - started)
+                if first_token is None: first_token = time.perf_counter() - started
+                if getattr(chunk, "usage", None): usage = chunk.usage
+                yield chunk
+            self._record(tenant, kwargs, started, usage, first_token)
+        finally:
+            try:
+                await stream.close()  # Frees the HTTP connection now rather than when the stream is garbage-collected
+            finally:
+                release()
+
+    def _record(self, tenant: str, kwargs: dict, started: float, usage, first_token: float | None = None):
+        elapsed = time.perf_counter() - started
+        if not kwargs.get("stream"): self._latencies[(kwargs.get("model"), bool(kwargs.get("tools")))].append(elapsed)
+        LLM_SECONDS.observe(elapsed, kwargs.get("model"), bool(kwargs.get("stream")))
+        counters = self.counters[tenant]
+        counters["completed"] += 1
+        counters["latency_ms_total"] += round(elapsed * 1000)
+        if first_token is not None: counters["first_token_ms_total"] += round(first_token * 1000)
+        if usage is not None:
+            prompt_tokens, completion_tokens = getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+            counters["prompt_tokens"] += prompt_tokens
+            counters["completion_tokens"] += completion_tokens
+            label = _tenant_label(tenant)
+            LLM_TOKENS.inc(label, "prompt", amount=prompt_tokens)
+            LLM_TOKENS.inc(label, "completion", amount=completion_tokens)
+
+    def stats(self) -> dict:
+        latency = {f"{model}{':tools' if tools else ''}": {"p50_ms": round(_percentile(v, 50) * 1000), "p95_ms": round(_percentile(v, 95) * 1000), "samples": len(v)} for (model, tools), v in self._latencies.items()}
+        return {"rate_limit": round(self.limiter.rate, 2), "latency": latency, "tenants": {tenant: dict(c) for tenant, c in self.counters.items()}}
+
+llm_gateway = LLMGateway(AsyncOpenAI(
+    api_key=settings.LLM_API_KEY,
+    base_url=settings.LLM_BASE_URL or None,
+    timeout=settings.LLM_REQUEST_TIMEOUT,
+    max_retries=0,  # Retries happen in the gateway, where they count against the rate limit
+))
@@ -0,0 +1,230 @@
+# backend/app/services/magento_client.py
+import asyncio
+import email.utils
+import time
+import httpx
+import urllib.parse
+from collections import OrderedDict
+from oauthlib.oauth1 import Client as OAuth1Client, SIGNATURE_HMAC_SHA256
+from app.core.cache import AsyncTTLCache
+from app.core.config import settings
+from app.core.resilience import CircuitBreaker, TokenBucket, backoff_delay
+from app.core.telemetry import MAGENTO_ERRORS, MAGENTO_SECONDS
+from app.services.store_metadata import store_metadata
+
+try:
+    import h2  # noqa: F401  (optional, enables HTTP/2 on stores that negotiate it)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+RETRYABLE_STATUS = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class StoreUnavailableError(httpx.RequestError):
+    """The request was not sent: the store's circuit is open or its concurrency cap stayed full."""
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value: return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value) if value else None
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+class StoreGuard:
+    """Per-store limits: request rate, requests in flight, and a circuit breaker for outages."""
+    def __init__(self):
+        self.bucket = TokenBucket(settings.MAGENTO_RATE_LIMIT, settings.MAGENTO_RATE_BURST)
+        self.slots = asyncio.Semaphore(settings.MAGENTO_MAX_CONCURRENCY_PER_STORE)
+        self.breaker = CircuitBreaker(settings.MAGENTO_BREAKER_FAILURE_THRESHOLD, settings.MAGENTO_BREAKER_RESET_TIMEOUT)
+        self.in_use = 0  # request() calls currently holding the store's client; the store isn't evicted while > 0
+        self.last_error: str | None = None  # Why the last failed request failed, shown while the circuit is open
+
+
+class MagentoOAuth1(httpx.Auth):
+    """
+    Signs each request with OAuth1 HMAC-SHA256, the same scheme Postman and
+    requests_oauthlib use. Signing is pure CPU work, so it runs inline in the
+    event loop without blocking on any I/O.
+    """
+    def __init__(self, credentials: dict):
+        self._client = OAuth1Client(
+            client_key=credentials['consumer_key'],
+            client_secret=credentials['consumer_secret'],
+            resource_owner_key=credentials['access_token'],
+            resource_owner_secret=credentials['access_token_secret'],
+            signature_method=SIGNATURE_HMAC_SHA256,
+        )
+
+    def auth_flow(self, request: httpx.Request):
+        # Only the URL and method are signed; JSON bodies are not part of the signature.
+        _, headers, _ = self._client.sign(str(request.url), http_method=request.method)
+        request.headers['Authorization'] = headers['Authorization']
+        yield request
+
+
+class MagentoClient:
+    """
+    Async Magento REST client that keeps one pooled, keep-alive httpx.AsyncClient
+    per store, so concurrent chats reuse TCP/TLS connections instead of opening
+    a new one for every call. Every store also gets a StoreGuard, so a slow or
+    failing store is rate limited, capped and eventually short-circuited without
+    taking capacity from the others. At most MAGENTO_MAX_STORES stores are kept;
+    beyond that the least recently used idle store is closed and forgotten.
+    """
+    def __init__(self):
+        self._clients: OrderedDict[str, httpx.AsyncClient] = OrderedDict()
+        self._guards: dict[str, StoreGuard] = {}
+        self._closing: set[asyncio.Task] = set()
+        # Signers are stateless between requests (nonce and timestamp are per signature), so one per credential set is enough.
+        self._signers = AsyncTTLCache(maxsize=settings.MAGENTO_SIGNER_CACHE_MAX_ENTRIES, ttl=float("inf"))
+
+    @staticmethod
+    def base_url(credentials: dict) -> str:
+        return credentials['store_url'].rstrip('/')
+
+    @staticmethod
+    def _encode_query(query_params: str) -> str:
+        # searchCriteria keys contain '[' and ']', which must be percent-encoded
+        # for the OAuth1 signature base string (requests used to do this for us).
+        query = query_params.lstrip('?')
+        if not query: return ""
+        pairs = urllib.parse.parse_qsl(query, keep_blank_values=True)
+        return "?" + urllib.parse.urlencode(pairs, quote_via=urllib.parse.quote)
+
+    def _get_client(self, base_url: str) -> httpx.AsyncClient:
+        client = self._clients.get(base_url)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=settings.MAGENTO_HTTP2 and HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(
+                    settings.MAGENTO_READ_TIMEOUT,
+                    connect=settings.MAGENTO_CONNECT_TIMEOUT,
+                    pool=settings.MAGENTO_POOL_TIMEOUT,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.MAGENTO_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.MAGENTO_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.MAGENTO_KEEPALIVE_EXPIRY,
+                ),
+                headers={'Content-Type': 'application/json'},
+            )
+            self._clients[base_url] = client
+            self._evict_idle()
+        else:
+            self._clients.move_to_end(base_url)
+        return client
+
+    def _evict_idle(self):
+        # Store URLs come from the client, so without a bound every distinct one would keep a pool open.
+        excess = len(self._clients) - settings.MAGENTO_MAX_STORES
+        for base_url in list(self._clients):
+            if excess <= 0: break
+            guard = self._guards.get(base_url)
+            if guard is not None and guard.in_use: continue
+            client = self._clients.pop(base_url)
+            self._guards.pop(base_url, None)
+            excess -= 1
+            task = asyncio.get_running_loop().create_task(client.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    def _signer(self, credentials: dict) -> MagentoOAuth1:
+        key = (credentials['consumer_key'], credentials['consumer_secret'], credentials['access_token'], credentials['access_token_secret'])
+        signer = self._signers.get(key)
+        if signer is None:
+            signer = MagentoOAuth1(credentials)
+            self._signers.set(key, signer)
+        return signer
+
+    def guard(self, base_url: str) -> StoreGuard:
+        guard = self._guards.get(base_url)
+        if guard is None: guard = self._guards[base_url] = StoreGuard()
+        return guard
+
+    async def request(self, method: str, endpoint: str, credentials: dict, query_params: str = "", json=None, api: str = "V1") -> httpx.Response:
+        """
+        Sends a signed request to `{store_url}/index.php/rest/{api}{endpoint}{query_params}`
+        and returns the raw response. Callers decide how to handle HTTP errors.
+        `api="async/bulk/V1"` targets Magento's bulk asynchronous endpoints.
+
+        Idempotent requests are retried (with jittered backoff, honouring Retry-After)
+        on 429/502/503/504 and network errors; others are sent once. Raises
+        StoreUnavailableError, an httpx.RequestError, when the store's circuit is open.
+        """
+        if not credentials: raise ValueError("Magento credentials are required.")
+        base_url = self.base_url(credentials)
+        full_request_url = f"{base_url}/index.php/rest/{api}{endpoint}{self._encode_query(query_params)}"
+        client = self._get_client(base_url)
+        guard = self.guard(base_url)
+        auth = self._signer(credentials)
+        guard.in_use += 1
+        try:
+            return await self._send(client, guard, base_url, method, full_request_url, auth, json)
+        finally:
+            guard.in_use -= 1
+
+    async def _send(self, client: httpx.AsyncClient, guard: StoreGuard, base_url: str, method: str, full_request_url: str, auth: MagentoOAuth1, json) -> httpx.Response:
+        attempts = 1 + (settings.MAGENTO_MAX_RETRIES if method.upper() in IDEMPOTENT_METHODS else 0)
+        store = store_metadata.metric_label(base_url)
+        # The breaker sees one outcome per request, after its retries: a request that fails three
+        # times is one failure, and while half-open the whole request, retries included, is the probe.
+        if not guard.breaker.allow():
+            MAGENTO_ERRORS.inc(store, "circuit_open")
+            raise StoreUnavailableError(f"{base_url} is failing ({guard.last_error}), requests paused for {guard.breaker.retry_after():.1f}s")
+
+        for attempt in range(attempts):
+            try:
+                await asyncio.wait_for(guard.slots.acquire(), settings.MAGENTO_POOL_TIMEOUT)
+            except asyncio.TimeoutError:
+                MAGENTO_ERRORS.inc(store, "no_slot")
+                raise StoreUnavailableError(f"{base_url} has {settings.MAGENTO_MAX_CONCURRENCY_PER_STORE} requests in flight already")
+            try:
+                await guard.bucket.acquire()
+                started = time.perf_counter()
+                response = await client.request(method, full_request_url, auth=auth, json=json)
+            except httpx.RequestError as e:
+                MAGENTO_SECONDS.observe(time.perf_counter() - started, store, method, "error")
+                MAGENTO_ERRORS.inc(store, type(e).__name__)
+                if attempt + 1 >= attempts:
+                    guard.last_error = f"{type(e).__name__}: {e}"
+                    guard.breaker.record_failure()
+                    raise
+                delay = backoff_delay(attempt, settings.MAGENTO_RETRY_BASE_DELAY, settings.MAGENTO_RETRY_MAX_DELAY)
+            else:
+                MAGENTO_SECONDS.observe(time.perf_counter() - started, store, method, response.status_code)
+                if response.status_code not in RETRYABLE_STATUS:
+                    guard.breaker.record_success()  # Any other answer, 4xx included, means the store is up
+                    return response
+                MAGENTO_ERRORS.inc(store, response.status_code)
+                retry_after = _retry_after(response)
+                if response.status_code == 429:
+                    # Throttling isn't an outage; slow every request to this store down instead.
+                    guard.bucket.pause(retry_after if retry_after is not None else settings.MAGENTO_RETRY_BASE_DELAY)
+                if attempt + 1 >= attempts:
+                    if response.status_code == 429:
+                        guard.breaker.record_success()
+                    else:
+                        guard.last_error = f"HTTP {response.status_code}"
+                        guard.breaker.record_failure()
+                    return response
+                await response.aclose()
+                delay = min(settings.MAGENTO_RETRY_MAX_DELAY, retry_after) if retry_after is not None else backoff_delay(attempt, settings.MAGENTO_RETRY_BASE_DELAY, settings.MAGENTO_RETRY_MAX_DELAY)
+            finally:
+                guard.slots.release()
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), OrderedDict()
+        self._guards = {}
+        for client in clients:
+            await client.aclose()
+        if self._closing: await asyncio.gather(*self._closing)
+
+magento_client = MagentoClient()
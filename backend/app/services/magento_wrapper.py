@@ -1,45 +1,89 @@
 # backend/app/services/magento_wrapper.py
-import requests
+import httpx
+import logging
 import urllib.parse
-from requests_oauthlib import OAuth1
-import re
+from app.services.magento_client import magento_client
+from app.services.attribute_cache import AttributeOptions, attribute_option_cache, normalize_label
+from app.services.search_cache import search_cache_key, search_result_cache
+from app.services.catalog_mirror import catalog_mirror
+from app.services.product_formatter import ProductFormatter
+from app.services.store_metadata import store_metadata
+from app.core.config import settings
+from app.services.task_planner import TaskPlanner
+
+logger = logging.getLogger(__name__)
 
 class MagentoService:
-    def _make_request(self, method: str, endpoint: str, credentials: dict, query_params: str = ""):
-        if not credentials: raise ValueError("Magento credentials are required.")
-        base_url = credentials['store_url'].rstrip('/')
-        full_request_url = f"{base_url}/index.php/rest/V1{endpoint}{query_params}"
-        
-        auth = OAuth1(client_key=credentials['consumer_key'], client_secret=credentials['consumer_secret'], resource_owner_key=credentials['access_token'], resource_owner_secret=credentials['access_token_secret'], signature_method='HMAC-SHA256')
+    async def _make_request(self, method: str, endpoint: str, credentials: dict, query_params: str = ""):
+        try:
+            response = await magento_client.request(method, endpoint, credentials, query_params=query_params)
+        except httpx.RequestError as e:
+            raise Exception(f"Magento API Error: store unreachable - {e}")
         try:
-            response = requests.request(method, full_request_url, auth=auth, headers={'Content-Type': 'application/json'})
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.HTTPError as e:
-            error_message = e.response.json().get("message", e.response.reason) if e.response.text else e.response.reason
+        except httpx.HTTPStatusError as e:
+            try:
+                error_message = e.response.json().get("message", e.response.reason_phrase) if e.response.text else e.response.reason_phrase
+            except ValueError:  # An HTML error page from a proxy in front of the store
+                error_message = e.response.reason_phrase
             raise Exception(f"Magento API Error: {e.response.status_code} - {error_message}")
 
-    def _get_brand_id(self, brand_name: str, credentials: dict) -> str | None:
-        attribute_code_for_brand = "manufacturer"
-        endpoint = f"/products/attributes/{attribute_code_for_brand}/options"
+    async def get_attribute_options(self, attribute_code: str, credentials: dict) -> AttributeOptions:
+        """Returns the cached label -> option id index for an attribute, loading it once per TTL."""
+        key = (magento_client.base_url(credentials), attribute_code)
+        async def load():
+            safe_code = urllib.parse.quote(attribute_code, safe='')
+            return AttributeOptions(await self._make_request("GET", f"/products/attributes/{safe_code}/options", credentials))
+        return await attribute_option_cache.get_or_load(key, load)
+
+    async def get_brand_options(self, credentials: dict) -> AttributeOptions | None:
+        """Brand dictionary for the intent fast path; None when the store's options can't be loaded."""
         try:
-            options = self._make_request("GET", endpoint, credentials)
-            if isinstance(options, list):
-                for option in options:
-                    if isinstance(option, dict) and option.get('label', '').strip().lower() == brand_name.strip().lower():
-                        return option.get('value')
+            return await self.get_attribute_options("manufacturer", credentials)
+        except Exception as e:
+            logger.info(f"Could not load brand options, intent fast path limited to SKUs. Error: {e}")
             return None
+
+    async def _resolve_option_id(self, attribute_code: str, label: str, credentials: dict) -> str | None:
+        try:
+            options = await self.get_attribute_options(attribute_code, credentials)
+            return options.resolve(label)
         except Exception as e:
-            print(f"INFO: Could not get brand options for '{brand_name}', will fall back to text search. Error: {e}")
+            logger.info(f"Could not get '{attribute_code}' options for '{label}', will fall back to text search. Error: {e}")
             return None
 
-    def product_query(self, params: dict, credentials: dict) -> dict:
-        print(f"UNIFIED QUERY with params: {params}")
-        
-        endpoint = "/products"
+    async def _get_brand_id(self, brand_name: str, credentials: dict) -> str | None:
+        attribute_code_for_brand = "manufacturer"
+        return await self._resolve_option_id(attribute_code_for_brand, brand_name, credentials)
+
+    def _plan_option_lookups(self, params: dict, credentials: dict, planner: TaskPlanner, stage: str) -> list[str]:
+        # Start every option lookup up front; they only depend on the params.
+        resolution_stages = []
+        if params.get("brand"):
+            planner.add(f"{stage}.brand", lambda: self._get_brand_id(params["brand"], credentials))
+            resolution_stages.append(f"{stage}.brand")
+        attributes_to_filter = params.get("attributes")
+        if isinstance(attributes_to_filter, dict):
+            base_url = magento_client.base_url(credentials)
+            for attr_code, attr_value in attributes_to_filter.items():
+                # Text/number attributes (per the schema loaded at connect) have no options; they go straight to the LIKE filter.
+                if not store_metadata.has_options(base_url, attr_code): continue
+                # attr_code comes from the LLM, so every lookup shares one stage label in the metrics.
+                planner.add(f"{stage}.attribute.{attr_code}", lambda code=attr_code, value=attr_value: self._resolve_option_id(code, str(value), credentials), metric=f"{stage}.attribute")
+                resolution_stages.append(f"{stage}.attribute.{attr_code}")
+        planner.start()
+        return resolution_stages
+
+    async def _search_filters(self, params: dict, planner: TaskPlanner, stage: str) -> tuple[list[str], dict, int] | None:
+        """
+        searchCriteria filter groups for the params, the resolved criteria (used as the cache
+        key) and the next free group index. None when the brand doesn't exist in the store.
+        """
         query_parts = []
         filter_group_index = 0
-        
+        criteria = {}  # Resolved, order-independent form of the query, used as the cache key
+
         # --- THE FINAL STRATEGY: UNIFIED searchCriteria ---
 
         # Group 1: Keywords (Searches multiple fields with OR logic)
@@ -50,32 +94,70 @@ class MagentoService:
             fields_to_search = ["name", "sku", "short_description"]
             for i, field in enumerate(fields_to_search):
                 query_parts.append(f"searchCriteria[filter_groups][{filter_group_index}][filters][{i}][field]={field}")
-                query_parts.append(f"searchCriteria[filter_groups][{filter_group_index}][filters][{i}][value]=%{encoded_kw}%")
+                query_parts.append(f"searchCriteria[filter_groups][{filter_group_index}][filters][{i}][value]=%25{encoded_kw}%25")
                 query_parts.append(f"searchCriteria[filter_groups][{filter_group_index}][filters][{i}][condition_type]=like")
             filter_group_index += 1
+            criteria["keywords"] = normalize_label(search_string)
 
         # Subsequent groups are for all other filters, combined with AND logic.
         if params.get("brand"):
-            brand_id = self._get_brand_id(params["brand"], credentials)
+            brand_id = await planner.get(f"{stage}.brand")
             if brand_id:
                 query_parts.append(f"searchCriteria[filter_groups][{filter_group_index}][filters][0][field]=manufacturer&searchCriteria[filter_groups][{filter_group_index}][filters][0][value]={brand_id}&searchCriteria[filter_groups][{filter_group_index}][filters][0][condition_type]=eq")
                 filter_group_index += 1
+                criteria["brand_id"] = brand_id
             else:
-                return {"items": [], "total_count": 0}
+                return None
 
         if params.get("on_sale"):
             query_parts.append(f"searchCriteria[filter_groups][{filter_group_index}][filters][0][field]=special_price&searchCriteria[filter_groups][{filter_group_index}][filters][0][condition_type]=notnull")
             filter_group_index += 1
+            criteria["on_sale"] = True
         
         # This attribute search is now more reliable within this structure
+        attributes_to_filter = params.get("attributes")
         if params.get("attributes"):
-            attributes_to_filter = params["attributes"]
             if isinstance(attributes_to_filter, dict):
                 for attr_code, attr_value in attributes_to_filter.items():
-                    encoded_value = urllib.parse.quote(str(attr_value))
-                    query_parts.append(f"searchCriteria[filter_groups][{filter_group_index}][filters][0][field]={attr_code}&searchCriteria[filter_groups][{filter_group_index}][filters][0][value]=%{encoded_value}%&searchCriteria[filter_groups][{filter_group_index}][filters][0][condition_type]=like")
+                    # Select-type attributes filter on the option id; anything else falls back to a LIKE match.
+                    lookup = f"{stage}.attribute.{attr_code}"
+                    option_id = await planner.get(lookup) if lookup in planner else None
+                    if option_id:
+                        query_parts.append(f"searchCriteria[filter_groups][{filter_group_index}][filters][0][field]={attr_code}&searchCriteria[filter_groups][{filter_group_index}][filters][0][value]={urllib.parse.quote(option_id)}&searchCriteria[filter_groups][{filter_group_index}][filters][0][condition_type]=eq")
+                        criteria.setdefault("attributes", {})[attr_code] = ["eq", option_id]
+                    else:
+                        encoded_value = urllib.parse.quote(str(attr_value))
+                        query_parts.append(f"searchCriteria[filter_groups][{filter_group_index}][filters][0][field]={attr_code}&searchCriteria[filter_groups][{filter_group_index}][filters][0][value]=%25{encoded_value}%25&searchCriteria[filter_groups][{filter_group_index}][filters][0][condition_type]=like")
+                        criteria.setdefault("attributes", {})[attr_code] = ["like", normalize_label(attr_value)]
                     filter_group_index += 1
 
+        return query_parts, criteria, filter_group_index
+
+    async def search_filters(self, params: dict, credentials: dict) -> tuple[list[str], int] | None:
+        """product_query's filter groups for callers that page through the results themselves (e.g. exports)."""
+        planner = TaskPlanner("filters")
+        self._plan_option_lookups(params, credentials, planner, "filters")
+        filters = await self._search_filters(params, planner, "filters")
+        if filters is None: return None
+        query_parts, _, next_group_index = filters
+        return query_parts, next_group_index
+
+    async def product_query(self, params: dict, credentials: dict, planner: TaskPlanner | None = None, stage: str = "search") -> dict:
+        """
+        Runs a searchCriteria query. Brand and attribute option lookups are added to `planner`
+        as `{stage}.brand` / `{stage}.attribute.<code>` so they resolve concurrently. Results
+        are served from the search result cache when the same resolved query ran recently.
+        """
+        logger.info(f"UNIFIED QUERY with params: {params}")
+        
+        endpoint = "/products"
+        planner = planner or TaskPlanner(stage)
+        resolution_stages = self._plan_option_lookups(params, credentials, planner, stage)
+        filters = await self._search_filters(params, planner, stage)
+        if filters is None: return {"items": [], "total_count": 0}
+        query_parts, criteria, _ = filters
+        search_string = params.get("sku") or params.get("keywords")
+
         # --- Assemble the final query string ---
         task = params.get("task", "search")
         limit = params.get("limit", 10)
@@ -89,60 +171,75 @@ class MagentoService:
 
         query_string = "&".join(query_parts)
         query_params = f"?{query_string}"
+        criteria["task"] = task
+        if task != "count": criteria["limit"] = str(limit)
 
-        raw_result = self._make_request("GET", endpoint, credentials, query_params=query_params)
-        
-        # Data formatting part is correct and unchanged
-        items = raw_result.get('items', []) if isinstance(raw_result, dict) else []
-        if not isinstance(items, list): items = []
-        total_count = raw_result.get('total_count', 0) if isinstance(raw_result, dict) else 0
-            
-        if task == "count": 
-            return {"total_count": total_count}
-
-        formatted_products = []
-        for product in items:
-            if not isinstance(product, dict): continue
-            description = "No description available."
-            description_html, short_description_html = "", ""
-            custom_attrs = product.get('custom_attributes', [])
-            if isinstance(custom_attrs, list):
-                for attr in custom_attrs:
-                    if not isinstance(attr, dict): continue
-                    if attr.get('attribute_code') == 'short_description': short_description_html = attr.get('value', '')
-                    if attr.get('attribute_code') == 'description': description_html = attr.get('value', '')
-            final_html = short_description_html or description_html
-            if final_html and isinstance(final_html, str):
-                clean_desc = re.sub('<[^<]+?>', '', final_html); clean_desc = re.sub('&[a-zA-Z0-9]+;', ' ', clean_desc).strip()
-                if clean_desc: description = clean_desc
-            image_path = ""
-            gallery = product.get('media_gallery_entries', [])
-            if isinstance(gallery, list) and gallery:
-                for entry in gallery:
-                    if isinstance(entry, dict):
-                        types = entry.get('types', [])
-                        if isinstance(types, list) and 'image' in types: image_path = entry.get('file'); break
-                if not image_path and gallery and isinstance(gallery[0], dict): image_path = gallery[0].get('file', '')
-            display_price = "Price not available"
-            try:
-                special_price_val, price_val = product.get('special_price'), product.get('price')
-                if special_price_val is not None and float(special_price_val) < float(price_val):
-                    display_price = f"<del>${float(price_val):.2f}</del> <strong>${float(special_price_val):.2f}</strong>"
-                elif price_val is not None:
-                    display_price = f"${float(price_val):.2f}"
-            except (ValueError, TypeError, AttributeError): pass
-            formatted_products.append({"id": product.get('id'), "sku": product.get('sku'), "name": product.get('name'), "price": display_price, "image_url": f"{credentials['store_url'].rstrip('/')}/media/catalog/product{image_path}" if image_path else "", "description": description})
-            
-        return {"items": formatted_products, "total_count": total_count}
-
-    def get_product_details_by_sku(self, sku: str, credentials: dict) -> dict | None:
-        print(f"Getting full details for SKU: {sku}")
+        base_url = magento_client.base_url(credentials)
+        # The mirror has no attribute columns, so attribute-filtered queries always go live.
+        use_mirror = settings.CATALOG_MIRROR_ENABLED and "attributes" not in criteria
+        if settings.CATALOG_MIRROR_ENABLED:
+            catalog_mirror.schedule_sync(base_url, self._mirror_page_fetcher(credentials))
+
+        async def load():
+            if use_mirror and catalog_mirror.is_fresh(base_url):
+                with planner.measure(f"{stage}.mirror", after=resolution_stages):
+                    items, total_count = await catalog_mirror.query(base_url, search_string, criteria.get("brand_id"), bool(params.get("on_sale")), None if task == "count" else int(limit))
+                if task == "count":
+                    return {"total_count": total_count}
+                return {"items": ProductFormatter(store_metadata.media_base_url(base_url)).format_many(items), "total_count": total_count}
+
+            with planner.measure(f"{stage}.magento", after=resolution_stages):
+                raw_result = await self._make_request("GET", endpoint, credentials, query_params=query_params)
+
+            # Format the raw Magento payload into product cards
+            items = raw_result.get('items', []) if isinstance(raw_result, dict) else []
+            if not isinstance(items, list): items = []
+            total_count = raw_result.get('total_count', 0) if isinstance(raw_result, dict) else 0
+
+            if task == "count":
+                return {"total_count": total_count}
+
+            with planner.measure(f"{stage}.format", after=[f"{stage}.magento"]):
+                formatted_products = ProductFormatter(store_metadata.media_base_url(base_url)).format_many(items)
+
+            return {"items": formatted_products, "total_count": total_count}
+
+        cache_key = search_cache_key(base_url, criteria)
+        return await search_result_cache.get_or_load(cache_key, load, ttl=search_result_cache.ttl_for(task))
+
+    def invalidate_search_cache(self, credentials: dict):
+        """Forgets cached search/count results for this store so the next query hits Magento."""
+        search_result_cache.invalidate_store(magento_client.base_url(credentials))
+
+    def _mirror_page_fetcher(self, credentials: dict):
+        return lambda page_query: self._make_request("GET", "/products", credentials, query_params=page_query)
+
+    def refresh_catalog(self, credentials: dict):
+        """Call after writing products: drops cached results and resyncs the mirror if it is enabled."""
+        self.invalidate_search_cache(credentials)
+        if settings.CATALOG_MIRROR_ENABLED:
+            catalog_mirror.schedule_sync(magento_client.base_url(credentials), self._mirror_page_fetcher(credentials), force=True)
+
+    async def get_product_attribute(self, attribute_code: str, credentials: dict) -> dict | None:
+        """Attribute metadata (backend_type, frontend_input, ...), or None if the store has no such attribute."""
+        safe_code = urllib.parse.quote(attribute_code, safe='')
+        response = await magento_client.request("GET", f"/products/attributes/{safe_code}", credentials)
+        if response.status_code == 404: return None
+        response.raise_for_status()
+        return response.json()
+
+    def format_product(self, product: dict, credentials: dict) -> dict:
+        """Turns a raw Magento product into the card shape the frontend renders."""
+        return ProductFormatter(store_metadata.media_base_url(credentials['store_url'])).format(product)
+
+    async def get_product_details_by_sku(self, sku: str, credentials: dict) -> dict | None:
+        logger.info(f"Getting full details for SKU: {sku}")
         try:
             safe_sku = urllib.parse.quote(sku, safe='')
             endpoint = f"/products/{safe_sku}"
-            return self._make_request("GET", endpoint, credentials)
+            return await self._make_request("GET", endpoint, credentials)
         except Exception as e:
-            print(f"Error getting details for SKU {sku}: {e}")
+            logger.warning(f"Error getting details for SKU {sku}: {e}")
             return None
 
 magento_service = MagentoService()
\ No newline at end of file
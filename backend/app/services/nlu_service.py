@@ -1,21 +1,25 @@
 # backend/app/services/nlu_service.py
 import json
-from openai import AsyncOpenAI
+import logging
 from app.core.config import settings
+from app.services.intent_cache import IntentCache, MemoryIntentBackend, SQLiteIntentBackend
+from app.services.intent_parser import fast_parse
+from app.services.attribute_cache import AttributeOptions
+from app.services.llm_gateway import llm_gateway
 from typing import Any
 
-client = AsyncOpenAI(api_key=settings.LLM_API_KEY)
+logger = logging.getLogger(__name__)
 
 tools = [
     {
         "type": "function",
         "function": {
             "name": "product_query",
-            "description": "The primary tool to handle any user request about finding, counting, or getting details about products.",
+            "description": "The primary tool to handle any user request about finding, counting, exporting, or getting details about products.",
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "task": { "type": "string", "enum": ["search", "count", "details"]},
+                    "task": { "type": "string", "enum": ["search", "count", "details", "export"], "description": "Use 'export' when the user wants a downloadable file (CSV) of the matching products."},
                     "keywords": { "type": "string", "description": "The main subject of the user's search, like 'LED bulb' or 'pendant lights'."},
                     "sku": { "type": "string", "description": "The specific product SKU, if mentioned."},
                     "brand": { "type": "string", "description": "The brand name, if mentioned."},
@@ -35,9 +39,33 @@ tools = [
     }
 ]
 
-async def classify_intent(user_message: str) -> dict:
+intent_cache = IntentCache(
+    memory=MemoryIntentBackend(settings.INTENT_CACHE_MAX_ENTRIES),
+    disk=SQLiteIntentBackend(settings.INTENT_CACHE_SQLITE_PATH) if settings.INTENT_CACHE_SQLITE_PATH else None,
+    similarity_threshold=settings.INTENT_CACHE_SIMILARITY_THRESHOLD,
+    schema=tools,
+)
+
+fast_path_stats = {"parsed": 0, "fallback": 0}
+
+async def classify_intent(user_message: str, brands: AttributeOptions | None = None, tenant: str | None = None) -> dict:
+    """
+    Resolves a message to `product_query` arguments: the rule-based fast path first
+    (`brands` is the store's manufacturer option index), then the cached LLM classifier.
+    `tenant` (the store URL) is who the LLM call is accounted and limited against.
+    """
+    if settings.FAST_INTENT_PARSER_ENABLED:
+        arguments = fast_parse(user_message, brands, settings.FAST_INTENT_MIN_CONFIDENCE)
+        if arguments is not None:
+            fast_path_stats["parsed"] += 1
+            return arguments
+        fast_path_stats["fallback"] += 1
+    return await intent_cache.get_or_classify(user_message, settings.LLM_MODEL_NAME, lambda message: _classify_with_llm(message, tenant))
+
+async def _classify_with_llm(user_message: str, tenant: str | None = None) -> dict:
     try:
-        response = await client.chat.completions.create(
+        response = await llm_gateway.create(
+            tenant=tenant,
             model=settings.LLM_MODEL_NAME,
             messages=[{"role": "user", "content": user_message}],
             tools=tools,
@@ -55,5 +83,5 @@ async def classify_intent(user_message: str) -> dict:
         else:
             return {"task": "search", "keywords": user_message}
     except Exception as e:
-        print(f"Error in LLM classification: {e}")
+        logger.warning(f"Error in LLM classification: {e}")
         return {"task": "error", "details": str(e)}
\ No newline at end of file
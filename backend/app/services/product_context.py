@@ -0,0 +1,122 @@
+# backend/app/services/product_context.py
+import json
+import re
+from app.core.cache import AsyncTTLCache
+from app.core.config import settings
+from app.services.product_formatter import strip_html
+
+# Storefront plumbing that never answers a shopper's question.
+NOISE_CODES = frozenset((
+    "url_key", "url_path", "options_container", "required_options", "has_options", "tax_class_id",
+    "category_ids", "image", "small_image", "thumbnail", "swatch_image", "image_label", "small_image_label",
+    "thumbnail_label", "page_layout", "gift_message_available", "quantity_and_stock_status", "is_returnable",
+    "msrp_display_actual_price_type", "links_purchased_separately", "links_title", "samples_title",
+    "news_from_date", "news_to_date", "special_from_date", "special_to_date", "visibility", "status",
+))
+NOISE_PREFIXES = ("meta_", "custom_design", "custom_layout")
+DESCRIPTION_CODES = ("short_description", "description")
+STOP_WORDS = frozenset("the and for with this that what which does can how are was its has have you your about tell give product item".split())
+_WORD = re.compile(r"[a-z0-9]+")
+_SPACE = re.compile(r"\s+")
+_BLOCK_TAG = re.compile(r"</?(?:p|div|br|li|ul|ol|h[1-6]|tr|td|table)\b[^>]*>", re.I)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English and JSON)."""
+    return len(text) // 4 + 1
+
+def _words(text: str) -> frozenset:
+    return frozenset(w for w in _WORD.findall(text.lower()) if w not in STOP_WORDS and (len(w) > 2 or w.isdigit()))
+
+def _clean_value(value, max_chars: int) -> str:
+    if isinstance(value, list): value = ", ".join(str(v) for v in value if v not in (None, ""))
+    text = str(value)
+    if "<" in text: text = _BLOCK_TAG.sub(" ", text)  # Keep paragraphs and list items apart once tags are gone
+    if "<" in text or "&" in text: text = strip_html(text)
+    text = _SPACE.sub(" ", text).strip()
+    if len(text) > max_chars: text = text[:max_chars].rsplit(" ", 1)[0] + "…"
+    return text
+
+class ProductFact:
+    """One key/value of the compacted product with what relevance scoring and budgeting need."""
+    __slots__ = ("key", "value", "key_words", "value_words", "cost")
+
+    def __init__(self, key: str, value: str):
+        self.key = key
+        self.value = value
+        self.key_words = _words(key.replace("_", " "))
+        self.value_words = _words(value)
+        self.cost = estimate_tokens(json.dumps({key: value}, ensure_ascii=False, separators=(",", ":")))
+
+class ProductContext:
+    """
+    A product reduced to the facts worth showing an LLM: HTML stripped, storefront
+    plumbing dropped, long values truncated. `core` facts (name, SKU, price, stock)
+    always go into the prompt, `details` compete for the remaining token budget.
+    """
+    __slots__ = ("updated_at", "core", "details")
+
+    def __init__(self, product: dict, max_value_chars: int):
+        self.updated_at = product.get("updated_at")
+        special_price = None
+        attributes = {}
+        for attr in product.get("custom_attributes") or []:
+            if not isinstance(attr, dict): continue
+            code, value = attr.get("attribute_code"), attr.get("value")
+            if not code or value in (None, "", []): continue
+            if code == "special_price": special_price = value
+            elif code not in NOISE_CODES and not code.startswith(NOISE_PREFIXES): attributes[code] = value
+
+        core = {"name": product.get("name"), "sku": product.get("sku"), "price": product.get("price"), "special_price": special_price}
+        stock = (product.get("extension_attributes") or {}).get("stock_item")
+        if isinstance(stock, dict) and "is_in_stock" in stock: core["in_stock"] = bool(stock["is_in_stock"])
+        self.core = {key: value for key, value in core.items() if value not in (None, "")}
+
+        details = []
+        short_description = None
+        for code, value in attributes.items():
+            text = _clean_value(value, max_value_chars)
+            if not text: continue
+            if code == "short_description": short_description = text
+            # The long description often just repeats the short one.
+            if code == "description" and short_description and text.startswith(short_description.rstrip("…")): continue
+            details.append(ProductFact(code, text))
+        self.details = details
+
+    def select(self, question: str, max_tokens: int) -> dict:
+        """Core facts plus the details most relevant to `question` that fit in `max_tokens`."""
+        question_words = _words(question)
+        def score(fact: ProductFact) -> int:
+            return 3 * len(question_words & fact.key_words) + len(question_words & fact.value_words)
+        scores = {id(fact): score(fact) for fact in self.details}
+        # Relevant facts first, then descriptions (they answer most general questions), then the rest in store order.
+        ranked = sorted(self.details, key=lambda f: (-scores[id(f)], f.key not in DESCRIPTION_CODES))
+        budget = max_tokens - estimate_tokens(json.dumps(self.core, ensure_ascii=False, separators=(",", ":")))
+        chosen = set()
+        for fact in ranked:
+            if fact.cost <= budget:
+                chosen.add(id(fact))
+                budget -= fact.cost
+        return {**self.core, **{fact.key: fact.value for fact in self.details if id(fact) in chosen}}
+
+class ProductContextBuilder:
+    """
+    Builds the details-answer prompt. The compacted product is cached per store and
+    SKU and rebuilt when Magento reports a different `updated_at`, so follow-up
+    questions about the same product only re-rank its facts.
+    """
+    def __init__(self):
+        self.cache = AsyncTTLCache(maxsize=settings.DETAILS_CONTEXT_CACHE_MAX_ENTRIES, ttl=settings.DETAILS_CONTEXT_CACHE_TTL)
+
+    def get(self, product: dict, store_url: str) -> ProductContext:
+        key = (store_url.rstrip("/"), product.get("sku"))
+        context = self.cache.get(key)
+        if context is None or context.updated_at != product.get("updated_at"):
+            context = ProductContext(product, settings.DETAILS_CONTEXT_MAX_VALUE_CHARS)
+            if key[1]: self.cache.set(key, context)
+        return context
+
+    def user_prompt(self, product: dict, question: str, store_url: str) -> str:
+        facts = self.get(product, store_url).select(question, settings.DETAILS_CONTEXT_MAX_TOKENS)
+        return f"PRODUCT DATA:\n{json.dumps(facts, ensure_ascii=False, separators=(',', ':'))}\n\nUSER QUESTION:\n{question}"
+
+product_context = ProductContextBuilder()
@@ -0,0 +1,68 @@
+# backend/app/services/product_formatter.py
+import re
+from typing import Iterable
+
+_HTML_TAG = re.compile(r"<[^<]+?>")
+_HTML_ENTITY = re.compile(r"&[a-zA-Z0-9]+;")
+_DESCRIPTION_CODES = frozenset(("short_description", "description"))
+
+def strip_html(html: str) -> str:
+    """Drops tags and replaces entities with a space, the same way the original formatter did."""
+    if "<" in html: html = _HTML_TAG.sub("", html)
+    if "&" in html: html = _HTML_ENTITY.sub(" ", html)
+    return html.strip()
+
+class ProductFormatter:
+    """
+    Turns raw Magento products into the card shape the frontend renders. Build one
+    per store with its product image base URL (store_metadata.media_base_url) and reuse
+    it for every item of a response.
+    """
+    def __init__(self, media_base_url: str):
+        self.media_base_url = media_base_url.rstrip('/')
+
+    def format(self, product: dict) -> dict:
+        # One pass over custom_attributes, reading attribute_code once per entry (last value wins, as before).
+        short_description_html = description_html = None
+        custom_attrs = product.get('custom_attributes')
+        if isinstance(custom_attrs, list):
+            for attr in custom_attrs:
+                if isinstance(attr, dict):
+                    code = attr.get('attribute_code')
+                    if code in _DESCRIPTION_CODES:
+                        if code == 'short_description': short_description_html = attr.get('value', '')
+                        else: description_html = attr.get('value', '')
+
+        description = "No description available."
+        final_html = short_description_html or description_html
+        if final_html and isinstance(final_html, str):
+            clean_desc = strip_html(final_html)
+            if clean_desc: description = clean_desc
+
+        image_path = ""
+        gallery = product.get('media_gallery_entries')
+        if isinstance(gallery, list) and gallery:
+            for entry in gallery:
+                if isinstance(entry, dict):
+                    types = entry.get('types')
+                    if isinstance(types, list) and 'image' in types: image_path = entry.get('file'); break
+            if not image_path and isinstance(gallery[0], dict): image_path = gallery[0].get('file', '')
+
+        display_price = "Price not available"
+        price_val, special_price_val = product.get('price'), product.get('special_price')
+        try:
+            if special_price_val is not None:
+                special_price, price = float(special_price_val), float(price_val)
+                if special_price < price:
+                    display_price = f"<del>${price:.2f}</del> <strong>${special_price:.2f}</strong>"
+                else:
+                    display_price = f"${price:.2f}"
+            elif price_val is not None:
+                display_price = f"${float(price_val):.2f}"
+        except (ValueError, TypeError, AttributeError): pass
+
+        return {"id": product.get('id'), "sku": product.get('sku'), "name": product.get('name'), "price": display_price, "image_url": f"{self.media_base_url}{image_path}" if image_path else "", "description": description}
+
+    def format_many(self, items: Iterable) -> list[dict]:
+        return [self.format(product) for product in items if isinstance(product, dict)]
+
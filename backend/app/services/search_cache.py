@@ -0,0 +1,31 @@
+# backend/app/services/search_cache.py
+import json
+from app.core.cache import AsyncTTLCache
+from app.core.config import settings
+
+def search_cache_key(store_url: str, criteria: dict) -> tuple[str, str]:
+    """(store_url, canonical JSON of the resolved searchCriteria) - equal searches map to the same key."""
+    return (store_url.rstrip('/'), json.dumps(criteria, sort_keys=True, default=str))
+
+def _json_size(value) -> int:
+    return len(json.dumps(value, default=str))
+
+class SearchResultCache(AsyncTTLCache):
+    """
+    Short-lived cache of formatted product_query results. Concurrent identical
+    queries are coalesced into one Magento call by get_or_load.
+    """
+    def ttl_for(self, task: str) -> float:
+        return settings.SEARCH_CACHE_TTL_COUNT if task == "count" else settings.SEARCH_CACHE_TTL_SEARCH
+
+    def invalidate_store(self, store_url: str):
+        """Drops every cached result for one store, e.g. after a catalog import."""
+        store_url = store_url.rstrip('/')
+        self.invalidate_where(lambda key: key[0] == store_url)
+
+search_result_cache = SearchResultCache(
+    maxsize=settings.SEARCH_CACHE_MAX_ENTRIES,
+    ttl=settings.SEARCH_CACHE_TTL_SEARCH,
+    max_bytes=settings.SEARCH_CACHE_MAX_BYTES,
+    sizeof=_json_size,
+)
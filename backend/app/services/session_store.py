@@ -0,0 +1,99 @@
+# backend/app/services/session_store.py
+import json
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class MemorySessionBackend:
+    """In-process backend: JSON blobs with a TTL, LRU-evicted past `max_entries`."""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()  # key -> (expires_at, json)
+
+    async def get(self, key: str) -> str | None:
+        entry = self._data.get(key)
+        if entry is None: return None
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: str, ex: int):
+        self._data[key] = (time.monotonic() + ex, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+class RedisSessionBackend:
+    """
+    Backend for any client with the redis.asyncio string API (`get`, `set(..., ex=)`, `delete`),
+    so sessions can be shared across workers. tests/test_session_store.py drives it with a dict-backed fake.
+    """
+    def __init__(self, client, prefix: str = "chat-session:"):
+        self._client = client
+        self._prefix = prefix
+
+    async def get(self, key: str) -> str | None:
+        value = await self._client.get(self._prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ex: int):
+        await self._client.set(self._prefix + key, value, ex=ex)
+
+    async def delete(self, key: str):
+        await self._client.delete(self._prefix + key)
+
+class SessionStore:
+    """
+    Server-side conversation state per chat session, so the client only sends back a
+    short `context_ref` instead of the previous turn's product data. State holds the
+    last intent, a compact copy of the last results and the product in focus.
+    """
+    def __init__(self, backend, ttl: int, max_results: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_results = max_results
+
+    async def load(self, user_id: str, context_ref: str | None) -> tuple[str, dict]:
+        """
+        Returns (context_ref, state); unknown, expired or foreign refs start a new session,
+        and so does a backend that can't be read, so the chat turn still goes ahead.
+        """
+        if context_ref:
+            try:
+                raw = await self.backend.get(context_ref)
+                state = json.loads(raw) if raw else None
+            except Exception as e:
+                logger.info(f"Could not load chat session {context_ref}, starting a new one. Error: {e}")
+                state = None
+            if isinstance(state, dict) and state.get("user_id") == user_id: return context_ref, state
+        return secrets.token_urlsafe(12), {"user_id": user_id}
+
+    async def save(self, context_ref: str, state: dict):
+        await self.backend.set(context_ref, json.dumps(state, separators=(",", ":")), ex=self.ttl)
+
+    def remember(self, state: dict, params: dict, products: list | None = None, sku: str | None = None):
+        """Records one turn: the intent, and either the results shown or the product discussed."""
+        state["last_intent"] = params
+        if products:
+            state["results"] = [{"sku": p.get("sku"), "name": p.get("name")} for p in products[:self.max_results]]
+            state["focus_sku"] = products[0].get("sku")
+        if sku:
+            state["focus_sku"] = sku
+            state["resolved_skus"] = ([sku] + [s for s in state.get("resolved_skus", []) if s != sku])[:self.max_results]
+
+def _build_backend():
+    if settings.SESSION_REDIS_URL:
+        import redis.asyncio as redis  # Optional dependency, only needed for the shared backend
+        return RedisSessionBackend(redis.from_url(settings.SESSION_REDIS_URL))
+    return MemorySessionBackend(settings.SESSION_MAX_ENTRIES)
+
+session_store = SessionStore(_build_backend(), ttl=settings.SESSION_TTL, max_results=settings.SESSION_MAX_RESULTS)
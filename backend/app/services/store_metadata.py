@@ -0,0 +1,49 @@
+# backend/app/services/store_metadata.py
+from app.core.cache import AsyncTTLCache
+from app.core.config import settings
+
+# frontend_input types whose values are option ids, resolved through /products/attributes/{code}/options
+OPTION_INPUTS = frozenset(("select", "multiselect", "boolean"))
+
+class StoreMetadata:
+    """
+    What /auth/connect learns about a store once: where its product images are served
+    from (storeConfigs' media URL, which may be a CDN) and its attribute schema
+    (code -> frontend_input). Either is None when the store didn't return it.
+    """
+    __slots__ = ("media_url", "attributes")
+
+    def __init__(self, store_config: dict | None, attributes: list | None):
+        config = store_config if isinstance(store_config, dict) else {}
+        self.media_url = config.get("secure_base_media_url") or config.get("base_media_url") or None
+        schema = {attr["attribute_code"]: attr.get("frontend_input") for attr in attributes or [] if isinstance(attr, dict) and attr.get("attribute_code")}
+        self.attributes = schema or None
+
+class StoreMetadataCache(AsyncTTLCache):
+    """StoreMetadata per store URL, filled by /auth/connect. Stores that never connected get the defaults."""
+    def media_base_url(self, store_url: str) -> str:
+        """Base URL of product images, i.e. what media_gallery_entries[].file is relative to."""
+        store_url = store_url.rstrip('/')
+        metadata = self.get(store_url)
+        media_url = metadata.media_url if metadata is not None else None
+        return f"{media_url.rstrip('/')}/catalog/product" if media_url else f"{store_url}/media/catalog/product"
+
+    def metric_label(self, store_url: str) -> str:
+        """
+        `store_url` as a metrics label if the store connected through /auth/connect. Any other URL
+        is unchecked client input, so all of them share "unregistered" to keep label cardinality bounded.
+        """
+        store_url = store_url.rstrip('/')
+        return store_url if self.get(store_url) is not None else "unregistered"
+
+    def has_options(self, store_url: str, attribute_code: str) -> bool:
+        """
+        False only when the store's schema lists the attribute with a non-option input, so a lookup
+        would be wasted. Codes the schema doesn't list (it is one page of the attribute list) get the lookup.
+        """
+        metadata = self.get(store_url.rstrip('/'))
+        if metadata is None or metadata.attributes is None or attribute_code not in metadata.attributes: return True
+        return metadata.attributes[attribute_code] in OPTION_INPUTS
+
+# Kept as long as the sessions that loaded it.
+store_metadata = StoreMetadataCache(maxsize=settings.STORE_SESSION_MAX_ENTRIES, ttl=settings.STORE_SESSION_TTL)
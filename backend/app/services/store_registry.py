@@ -0,0 +1,78 @@
+# backend/app/services/store_registry.py
+import secrets
+import time
+from app.core.cache import AsyncTTLCache
+from app.core.config import settings
+from app.services.magento_client import magento_client
+from app.services.magento_wrapper import magento_service
+from app.services.store_metadata import StoreMetadata, store_metadata
+from app.services.task_planner import TaskPlanner
+
+CREDENTIAL_FIELDS = ("store_url", "consumer_key", "consumer_secret", "access_token", "access_token_secret")
+# One page only: attributes past it are simply unknown, and store_metadata.has_options looks those up.
+ATTRIBUTE_SCHEMA_QUERY = "?searchCriteria[pageSize]=1000&fields=items[attribute_code,frontend_input]"
+
+class StoreSession:
+    """A validated store connection: the credentials plus metadata loaded when it was made."""
+    __slots__ = ("token", "credentials", "store_name", "store_views", "metadata", "connected_at")
+
+    def __init__(self, token: str, credentials: dict, store_views: list, metadata: StoreMetadata):
+        self.token = token
+        self.credentials = credentials
+        self.store_views = store_views
+        self.store_name = store_views[0].get("name", "Unknown Store") if store_views and isinstance(store_views[0], dict) else "Unknown Store"
+        self.metadata = metadata
+        self.connected_at = time.time()
+
+class StoreRegistry:
+    """
+    Validated store connections, keyed by an opaque session token. /auth/connect checks
+    the credentials and loads the store's metadata once, all concurrently: store views,
+    the media URL and attribute schema (into store_metadata, where product cards, exports
+    and attribute filters read them) and the brand options (into the attribute cache).
+    Chat requests then send the token instead of the five credential fields. Tokens live
+    in this process only, so with several workers a client falls back to sending
+    credentials (or reconnects).
+    """
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self._sessions = AsyncTTLCache(maxsize=max_entries, ttl=ttl)
+
+    async def connect(self, credentials: dict) -> StoreSession:
+        """Raises httpx.HTTPStatusError / httpx.RequestError when the store rejects the credentials or can't be reached."""
+        credentials = {field: credentials[field] for field in CREDENTIAL_FIELDS}
+        planner = TaskPlanner("connect")
+        planner.add("products", lambda: self._get(credentials, "/products", "?searchCriteria[pageSize]=1"))
+        planner.add("store_views", lambda: self._get(credentials, "/store/storeViews"))
+        planner.add("store_config", lambda: self._optional(credentials, "/store/storeConfigs"))
+        planner.add("attributes", lambda: self._optional(credentials, "/products/attributes", ATTRIBUTE_SCHEMA_QUERY))
+        planner.add("brands", lambda: magento_service.get_brand_options(credentials))  # Warms the attribute cache for the first chat
+        results = await planner.run()
+        store_config, attributes = results["store_config"], results["attributes"]
+        metadata = StoreMetadata(store_config[0] if isinstance(store_config, list) and store_config else None, attributes.get("items") if isinstance(attributes, dict) else None)
+        store_metadata.set(magento_client.base_url(credentials), metadata)
+        token = secrets.token_urlsafe(24)
+        session = StoreSession(token, credentials, results["store_views"] or [], metadata)
+        self._sessions.set(token, session)
+        return session
+
+    @staticmethod
+    async def _get(credentials: dict, endpoint: str, query_params: str = ""):
+        response = await magento_client.request("GET", endpoint, credentials, query_params=query_params)
+        response.raise_for_status()
+        return response.json()
+
+    async def _optional(self, credentials: dict, endpoint: str, query_params: str = ""):
+        # Metadata only; a store that hides it (or an integration without access) still connects.
+        try:
+            return await self._get(credentials, endpoint, query_params)
+        except Exception:
+            return None
+
+    def get(self, token: str | None) -> StoreSession | None:
+        return self._sessions.get(token) if token else None
+
+    def disconnect(self, token: str):
+        self._sessions.invalidate(token)
+
+store_registry = StoreRegistry(ttl=settings.STORE_SESSION_TTL, max_entries=settings.STORE_SESSION_MAX_ENTRIES)
@@ -0,0 +1,124 @@
+# backend/app/services/task_planner.py
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Sequence
+from app.core.telemetry import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+class TaskPlanner:
+    """
+    Dependency-aware runner for the I/O stages of one chat turn. Each stage is an
+    async callable that receives the results of the stages it runs `after` as
+    keyword arguments, and starts as soon as those finish, so independent lookups
+    overlap. Stages added after the plan has started are scheduled immediately,
+    so later steps can depend on earlier results. Per-stage timings are kept so
+    the critical path can be logged, and recorded in the stage latency histogram
+    under the part of `name` before the first ':' ("chat:<user>" -> "chat"). Stage
+    names built from request data pass a fixed `metric` label, so the number of
+    series stays bounded.
+
+        planner = TaskPlanner("chat")
+        planner.add("brands", load_brands)
+        planner.add("intent", lambda brands: classify_intent(message, brands), after=["brands"])
+        planner.add("prefetch", lambda: get_product_details_by_sku(sku, credentials))
+        params = await planner.get("intent")
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.pipeline = name.split(":", 1)[0]
+        self._stages: dict[str, Callable[..., Awaitable[Any]]] = {}
+        self._after: dict[str, tuple[str, ...]] = {}
+        self._metric: dict[str, str] = {}  # stage -> histogram label, when it differs from the name
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._started_at: float | None = None
+        self.timings: dict[str, dict[str, float]] = {}  # stage -> {"start", "end"} in ms since start()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._after
+
+    def add(self, name: str, fn: Callable[..., Awaitable[Any]], after: Sequence[str] = (), metric: str | None = None):
+        if name in self._after: raise ValueError(f"Stage '{name}' is already planned.")
+        # Dependencies must already be planned, which also rules out cycles.
+        missing = [dep for dep in after if dep not in self._stages]
+        if missing: raise ValueError(f"Stage '{name}' depends on unknown stage(s): {', '.join(missing)}")
+        self._stages[name] = fn
+        self._after[name] = tuple(after)
+        if metric is not None: self._metric[name] = metric
+        if self._started_at is not None:
+            self._schedule(name)
+
+    def _schedule(self, name: str):
+        self._tasks[name] = asyncio.create_task(self._run_stage(name), name=f"{self.name}:{name}")
+
+    def _elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started_at) * 1000
+
+    async def _run_stage(self, name: str):
+        dependencies = {dep: await self._tasks[dep] for dep in self._after[name]}
+        self.timings[name] = {"start": self._elapsed_ms()}
+        try:
+            return await self._stages[name](**dependencies)
+        finally:
+            self._finish(name)
+
+    @contextlib.contextmanager
+    def measure(self, name: str, after: Sequence[str] = ()):
+        """Records timing for work done inline (e.g. consuming a stream) as if it were a stage."""
+        self.start()
+        self._after[name] = tuple(after)
+        self.timings[name] = {"start": self._elapsed_ms()}
+        try:
+            yield
+        finally:
+            self._finish(name)
+
+    def _finish(self, name: str):
+        timing = self.timings[name]
+        timing["end"] = self._elapsed_ms()
+        STAGE_SECONDS.observe((timing["end"] - timing["start"]) / 1000, self.pipeline, self._metric.get(name, name))
+
+    def start(self):
+        """Schedules every planned stage. Safe to call more than once."""
+        if self._started_at is not None: return
+        self._started_at = time.perf_counter()
+        for name in self._stages:
+            self._schedule(name)
+
+    async def get(self, name: str) -> Any:
+        """Result of one stage, starting the plan if needed."""
+        self.start()
+        return await self._tasks[name]
+
+    async def run(self) -> dict[str, Any]:
+        """Runs every stage and returns their results by name. The first failure cancels the rest."""
+        self.start()
+        try:
+            results = await asyncio.gather(*self._tasks.values())
+        except BaseException:
+            self.cancel()
+            raise
+        return dict(zip(self._tasks, results))
+
+    def cancel(self):
+        """Cancels stages that are still running, e.g. a prefetch that turned out not to be needed."""
+        for task in self._tasks.values():
+            if not task.done(): task.cancel()
+            elif not task.cancelled(): task.exception()  # Don't warn about failures nobody awaited
+
+    def critical_path(self) -> list[str]:
+        """Chain of stages that determined the total time, ending at the last stage to finish."""
+        finished = {name: t for name, t in self.timings.items() if "end" in t}
+        if not finished: return []
+        path = [max(finished, key=lambda name: finished[name]["end"])]
+        while True:
+            deps = [dep for dep in self._after[path[-1]] if dep in finished]
+            if not deps: break
+            path.append(max(deps, key=lambda dep: finished[dep]["end"]))
+        return list(reversed(path))
+
+    def log(self):
+        stages = ", ".join(f"{name}={t['end'] - t['start']:.0f}ms@{t['start']:.0f}" for name, t in self.timings.items() if "end" in t)
+        logger.info(f"PLAN {self.name}: {stages} | critical path: {' -> '.join(self.critical_path())}")
@@ -0,0 +1,168 @@
+# backend/benchmarks/bench_chat.py
+"""
+End-to-end load test of /chatbot/chat. main.app is served by uvicorn in this process
+(so peak RSS is the app's). The mock Magento and fake OpenAI servers run as
+subprocesses on this machine. Concurrent workers send a mix of search, count, brand and
+details messages, authenticated with a /auth/connect session token (or, with
+--auth credentials, the full credentials on every request). The run reports throughput, error counts, p50/p95/p99 latency and peak
+RSS per workload and overall, then compares them with a stored baseline.
+
+    python -m benchmarks.bench_chat --requests 2000 --concurrency 32 --catalog-size 5000
+    python -m benchmarks.bench_chat --save-baseline          # Record this machine's numbers
+    python -m benchmarks.bench_chat --tolerance 0.15         # Exit code 1 on a >15% (and >50ms) regression
+
+Provider-side limits (LLM_RATE_LIMIT, MAGENTO_RATE_LIMIT) are off by default here, so
+the run measures the app rather than its throttles; set them in the environment to
+include them. All load comes from one store, so LLM_MAX_CONCURRENCY_PER_TENANT does
+apply and shows up as queueing in the details latency.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+import httpx
+from openai import AsyncOpenAI
+from benchmarks.common import DATA_DIR, peak_rss_mb, percentile, serve_app
+from benchmarks.mock_magento import ATTRIBUTES, run_mock_server
+from benchmarks.mock_openai import run_mock_openai
+
+os.environ.setdefault("LLM_RATE_LIMIT", "0")
+os.environ.setdefault("MAGENTO_RATE_LIMIT", "0")
+
+import main
+from app.services.llm_gateway import llm_gateway
+
+BASELINE = DATA_DIR / "baseline_chat.json"
+WORKLOADS = ("search", "count", "brand", "details")
+KEYWORDS = ["led product", "led product 1", "product 2", "led product 3", "product 4", "led", "product 5", "led product 6"]
+
+def message(workload: str, rng: random.Random, catalog_size: int) -> str:
+    keywords = rng.choice(KEYWORDS)
+    if workload == "search": return rng.choice(["", "show me ", "find "]) + keywords
+    if workload == "count": return f"how many {keywords} are there?"
+    if workload == "brand": return f"{rng.choice(ATTRIBUTES['manufacturer']['options'])} {keywords}"
+    return f"{rng.choice(['is', 'what is the warranty of', 'how bright is'])} SKU-{rng.randint(1, catalog_size):07d}?"
+
+async def connect(app_url: str, credentials: dict) -> dict:
+    """What each chat request sends to identify the store, for the chosen --auth mode."""
+    async with httpx.AsyncClient(base_url=app_url, timeout=60) as client:
+        response = await client.post("/api/v1/auth/connect", json=credentials)
+        response.raise_for_status()
+        return {"session_token": response.json()["session_token"]}
+
+async def drive(app_url: str, auth: dict, args, mix: list[str], requests: int, seed: int) -> dict:
+    """Sends `requests` chat messages from `args.concurrency` workers; returns latencies (ms) and errors per workload."""
+    rng = random.Random(seed)
+    jobs = [(workload, message(workload, rng, args.catalog_size)) for workload in rng.choices(mix, k=requests)]
+    latencies = {workload: [] for workload in WORKLOADS}
+    errors = {workload: 0 for workload in WORKLOADS}
+    async with httpx.AsyncClient(base_url=app_url, timeout=60, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        async def worker(worker_id: int):
+            for i in range(worker_id, len(jobs), args.concurrency):
+                workload, text = jobs[i]
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/api/v1/chatbot/chat", json={"user_id": f"bench-{worker_id}", "message": text, **auth})
+                    body = response.json()
+                    ok = response.status_code == 200 and "error occurred" not in body.get("response_text", "")
+                except (httpx.HTTPError, ValueError):
+                    ok = False
+                if ok: latencies[workload].append((time.perf_counter() - started) * 1000)
+                else: errors[workload] += 1
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    return {"latencies": latencies, "errors": errors, "elapsed": elapsed}
+
+def summarize(run: dict) -> dict:
+    def stats(values: list[float], errors: int) -> dict:
+        return {"requests": len(values) + errors, "errors": errors, "p50_ms": round(percentile(values, 50), 1), "p95_ms": round(percentile(values, 95), 1), "p99_ms": round(percentile(values, 99), 1)}
+    workloads = {w: stats(run["latencies"][w], run["errors"][w]) for w in WORKLOADS if run["latencies"][w] or run["errors"][w]}
+    overall = stats([v for w in WORKLOADS for v in run["latencies"][w]], sum(run["errors"].values()))
+    overall["throughput_rps"] = round(overall["requests"] / run["elapsed"], 1)
+    overall["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return {"overall": overall, "workloads": workloads}
+
+def print_summary(summary: dict):
+    overall = summary["overall"]
+    print(f"{'workload':<9} {'requests':>8} {'errors':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, s in [*summary["workloads"].items(), ("overall", overall)]:
+        print(f"{name:<9} {s['requests']:>8} {s['errors']:>6} {s['p50_ms']:>6.0f}ms {s['p95_ms']:>6.0f}ms {s['p99_ms']:>6.0f}ms")
+    print(f"throughput {overall['throughput_rps']:.1f} req/s, peak RSS {overall['peak_rss_mb']:.1f}MB")
+
+def compare(summary: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list[str]:
+    """
+    Lines describing metrics that got worse than the baseline by more than `tolerance`.
+    Latencies must also be `min_delta_ms` worse, since the tail of a few-ms path is noisy.
+    """
+    regressions = []
+    def check(label: str, new: float, old: float, higher_is_better: bool = False, floor: float = 0.0):
+        if not old: return
+        change = (new - old) / old
+        worse = change < -tolerance if higher_is_better else change > tolerance and new - old > floor
+        print(f"  {label:<24} {old:>9.1f} -> {new:>9.1f}  {change:+.0%}{'  REGRESSION' if worse else ''}")
+        if worse: regressions.append(f"{label} {old:.1f} -> {new:.1f} ({change:+.0%})")
+    if baseline.get("config") != summary.get("config"):
+        print(f"note: baseline was recorded with {baseline.get('config')}")
+    old, new = baseline["results"]["overall"], summary["overall"]
+    print(f"vs baseline ({BASELINE.name}, recorded {baseline.get('recorded_at', '?')}), tolerance {tolerance:.0%}:")
+    check("throughput_rps", new["throughput_rps"], old["throughput_rps"], higher_is_better=True)
+    check("peak_rss_mb", new["peak_rss_mb"], old["peak_rss_mb"])
+    for name, s in summary["workloads"].items():
+        base = baseline["results"]["workloads"].get(name)
+        if base is None: continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            check(f"{name}.{key}", s[key], base[key], floor=min_delta_ms)
+        if s["errors"] > base["errors"]: regressions.append(f"{name}.errors {base['errors']} -> {s['errors']}")
+    return regressions
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200, help="Requests sent before measuring (fills pools and caches)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", nargs="+", default=["search", "search", "count", "brand", "details"], choices=WORKLOADS, help="Workloads drawn uniformly from this list")
+    parser.add_argument("--catalog-size", type=int, default=5000)
+    parser.add_argument("--magento-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=150.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--auth", choices=["token", "credentials"], default="token", help="Send a session token or the full credentials with each chat")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Relative change that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=50.0, help="Smallest latency increase that counts as a regression")
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.WARNING)  # One log line per stage would dominate the run
+
+    config = {key: getattr(args, key) for key in ("requests", "concurrency", "mix", "catalog_size", "magento_latency_ms", "llm_latency_ms", "seed", "auth")}
+    print(f"chat load test: {config}")
+    with run_mock_server("--latency-ms", str(args.magento_latency_ms), "--catalog-size", str(args.catalog_size)) as store_url, \
+            run_mock_openai("--latency-ms", str(args.llm_latency_ms)) as llm_url, serve_app(main.app) as app_url:
+        llm_gateway.client = AsyncOpenAI(api_key="benchmark", base_url=f"{llm_url}/v1", max_retries=0)
+        credentials = {"store_url": store_url, "consumer_key": "k", "consumer_secret": "s", "access_token": "t", "access_token_secret": "ts"}
+        auth = asyncio.run(connect(app_url, credentials)) if args.auth == "token" else {"credentials": credentials}
+        if args.warmup: asyncio.run(drive(app_url, auth, args, args.mix, args.warmup, args.seed + 1))
+        summary = {"config": config, **summarize(asyncio.run(drive(app_url, auth, args, args.mix, args.requests, args.seed)))}
+    print_summary(summary)
+
+    if args.save_baseline:
+        summary_with_date = {"recorded_at": time.strftime("%Y-%m-%d"), "config": config, "results": {"overall": summary["overall"], "workloads": summary["workloads"]}}
+        args.baseline.write_text(json.dumps(summary_with_date, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline saved to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+    regressions = compare(summary, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance, args.min_delta_ms)
+    if regressions:
+        print("regressions: " + "; ".join(regressions))
+        sys.exit(1)
+    print("no regressions")
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,131 @@
+# backend/benchmarks/bench_details_context.py
+"""
+Compares the original details prompt (every custom attribute, indented JSON) with
+the compacted, question-aware one from product_context on a sample of realistic
+products and questions: prompt tokens, build time (cold and cached) and answer
+latency against the fake OpenAI server, whose latency grows with prompt size.
+
+    python -m benchmarks.bench_details_context --products 50 --ms-per-1k-prompt-tokens 120 --show
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from openai import AsyncOpenAI
+from benchmarks.common import percentile
+from benchmarks.mock_magento import synthetic_product
+from benchmarks.mock_openai import run_mock_openai
+
+from app.core.config import settings
+from app.services.llm_gateway import LLMGateway
+from app.services.product_context import ProductContextBuilder
+
+STORE_URL = "https://store.example.com"
+QUESTIONS = [
+    "Is it dimmable?",
+    "What IP rating does it have, can I use it in a bathroom?",
+    "How bright is it in lumens?",
+    "What is the warranty?",
+    "What colour temperature is the light?",
+    "Which lamp base does it take?",
+    "Tell me about this product",
+    "What are the dimensions?",
+    "Is it in stock and what does it cost?",
+    "What finish and material is it made of?",
+]
+
+def rich_product(product_id: int) -> dict:
+    """synthetic_product plus the attributes a real Magento product carries (SEO, layout, long HTML copy)."""
+    rng = random.Random(product_id)
+    product = synthetic_product(product_id)
+    specs = {
+        "wattage": f"{rng.choice([5, 7, 9, 12, 18])}W", "lumens": str(rng.choice([450, 800, 1100, 1600])), "colour_temperature": rng.choice(["2700K", "3000K", "4000K"]),
+        "ip_rating": rng.choice(["IP20", "IP44", "IP65"]), "beam_angle": f"{rng.choice([36, 60, 120])}°", "dimmable": rng.choice(["Yes", "No"]),
+        "warranty": f"{rng.choice([2, 3, 5])} years", "lamp_base": rng.choice(["E27", "B22", "GU10"]), "finish": rng.choice(["Matt White", "Brushed Chrome", "Black"]),
+        "material": rng.choice(["Aluminium", "Polycarbonate", "Glass"]), "dimensions": f"{rng.randint(60, 300)} x {rng.randint(60, 300)} mm", "country_of_manufacture": "CN",
+    }
+    paragraphs = "".join(f"<p>Paragraph {n}: this <strong>energy-efficient</strong> fitting delivers even, glare-free light&nbsp;for living spaces, kitchens and hallways, "
+                         f"with a {specs['warranty']} warranty and a rated life of {rng.choice([15000, 25000, 30000])} hours.</p>" for n in range(rng.randint(4, 10)))
+    noise = {
+        "url_key": f"led-product-{product_id}", "meta_title": f"LED Product {product_id} | Lumenco", "meta_keyword": "led, light, lamp, fitting, downlight, bulb",
+        "meta_description": f"Buy LED Product {product_id} online at Lumenco. Free delivery on orders over $99.", "options_container": "container2",
+        "required_options": "0", "has_options": "0", "tax_class_id": "2", "category_ids": ["3", "17", "42"], "gift_message_available": "2",
+        "msrp_display_actual_price_type": "0", "image": f"/l/e/{product_id}.jpg", "small_image": f"/l/e/{product_id}.jpg", "thumbnail": f"/l/e/{product_id}.jpg",
+        "custom_layout_update_file": "__no_update__", "page_layout": "product-full-width",
+        "description": f"<div class=\"product-description\"><h2>Overview</h2>{paragraphs}<ul>" + "".join(f"<li>{k.replace('_', ' ').title()}: {v}</li>" for k, v in specs.items()) + "</ul></div>",
+    }
+    product["custom_attributes"] += [{"attribute_code": code, "value": value} for code, value in {**specs, **noise}.items()]
+    product["extension_attributes"] = {"stock_item": {"qty": rng.randint(0, 500), "is_in_stock": rng.random() < 0.8}}
+    return product
+
+def legacy_user_prompt(product_data: dict, question: str) -> str:
+    """The prompt the details answer used before product_context."""
+    context_summary = {"name": product_data.get("name"), "sku": product_data.get("sku"), "price": product_data.get("price"), "attributes": { attr.get("attribute_code"): attr.get("value") for attr in product_data.get("custom_attributes", []) if isinstance(attr, dict) }}
+    return f"PRODUCT DATA:\n```json\n{json.dumps(context_summary, indent=2)}\n```\n\nUSER QUESTION:\n{question}"
+
+def token_counter():
+    try:
+        import tiktoken  # Optional: exact counts when installed
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken cl100k_base"
+    except ImportError:
+        from app.services.product_context import estimate_tokens
+        return estimate_tokens, "estimate (chars / 4)"
+
+def time_us(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat): fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+async def answer_latencies(url: str, prompts: list[str], concurrency: int) -> list[float]:
+    gateway = LLMGateway(AsyncOpenAI(api_key="benchmark", base_url=f"{url}/v1", max_retries=0))
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+    async def one(prompt: str):
+        async with gate:
+            started = time.perf_counter()
+            await gateway.create(model=settings.LLM_MODEL_NAME, messages=[{"role": "system", "content": "You are a product expert."}, {"role": "user", "content": prompt}], temperature=0.2)
+            latencies.append((time.perf_counter() - started) * 1000)
+    await asyncio.gather(*(one(p) for p in prompts))
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Fake LLM base latency")
+    parser.add_argument("--ms-per-1k-prompt-tokens", type=float, default=120.0, help="Fake LLM prompt processing time")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--show", action="store_true", help="Print one prompt of each kind")
+    args = parser.parse_args()
+    settings.LLM_RATE_LIMIT = 0
+    settings.LLM_HEDGE_ENABLED = False
+
+    count_tokens, counter_name = token_counter()
+    builder = ProductContextBuilder()
+    samples = [(rich_product(i), question) for i in range(1, args.products + 1) for question in QUESTIONS]
+    legacy = [legacy_user_prompt(product, question) for product, question in samples]
+    compact = [builder.user_prompt(product, question, STORE_URL) for product, question in samples]
+    if args.show:
+        print(f"--- legacy ---\n{legacy[0][:1500]}...\n--- compact ---\n{compact[0]}\n")
+
+    legacy_tokens, compact_tokens = [count_tokens(p) for p in legacy], [count_tokens(p) for p in compact]
+    saved = 1 - sum(compact_tokens) / sum(legacy_tokens)
+    print(f"{len(samples)} prompts ({args.products} products x {len(QUESTIONS)} questions), tokens by {counter_name}, budget {settings.DETAILS_CONTEXT_MAX_TOKENS}")
+    print(f"prompt tokens  legacy  mean {sum(legacy_tokens) / len(samples):7.0f}  p95 {percentile(legacy_tokens, 95):6.0f}")
+    print(f"               compact mean {sum(compact_tokens) / len(samples):7.0f}  p95 {percentile(compact_tokens, 95):6.0f}  saved {saved:.0%}")
+
+    product, question = samples[0]
+    def cold():
+        builder.cache.clear()
+        builder.user_prompt(product, question, STORE_URL)
+    print(f"build time     legacy {time_us(lambda: legacy_user_prompt(product, question), 2000):6.1f}us  compact cold {time_us(cold, 2000):6.1f}us  "
+          f"cached {time_us(lambda: builder.user_prompt(product, question, STORE_URL), 2000):6.1f}us")
+
+    with run_mock_openai("--latency-ms", str(args.latency_ms), "--ms-per-1k-prompt-tokens", str(args.ms_per_1k_prompt_tokens)) as url:
+        for label, prompts in (("legacy", legacy), ("compact", compact)):
+            latencies = asyncio.run(answer_latencies(url, prompts, args.concurrency))
+            print(f"answer latency {label:<7} p50 {percentile(latencies, 50):6.0f}ms  p95 {percentile(latencies, 95):6.0f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_export.py
+"""
+Streams a full catalog export from the app (served by uvicorn in this process, so
+its memory is what gets measured) against the mock Magento
+server and reports throughput, time to first byte and peak RSS, for a few levels
+of page parallelism. Also checks that resuming from a cursor picks up where a
+cut-off export stopped.
+
+    python -m benchmarks.bench_export --catalog-size 100000 --latency-ms 50 --concurrency 1 4 8
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+from benchmarks.common import peak_rss_mb, serve_app
+from benchmarks.mock_magento import run_mock_server
+
+import main
+from app.core.config import settings
+
+async def export(client: httpx.AsyncClient, credentials: dict, fmt: str, cursor: int | None = None, stop_after_lines: int | None = None) -> tuple[int, int, float, str]:
+    """Returns (lines, bytes, seconds to first byte, last line)."""
+    started = time.perf_counter()
+    lines = size = 0
+    first_byte = None
+    last_line = ""
+    async with client.stream("POST", "/api/v1/export/products", json={"credentials": credentials, "format": fmt, "cursor": cursor}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if first_byte is None: first_byte = time.perf_counter() - started
+            lines += 1
+            size += len(line) + 1
+            last_line = line
+            if stop_after_lines and lines >= stop_after_lines: break
+    return lines, size, first_byte or 0.0, last_line
+
+async def run(app_url: str, store_url: str, args) -> None:
+    credentials = {"store_url": store_url, "consumer_key": "k", "consumer_secret": "s", "access_token": "t", "access_token_secret": "ts"}
+    async with httpx.AsyncClient(base_url=app_url, timeout=None) as client:
+        for concurrency in args.concurrency:
+            settings.EXPORT_MAX_CONCURRENCY = concurrency
+            started = time.perf_counter()
+            lines, size, ttfb, _ = await export(client, credentials, args.format)
+            elapsed = time.perf_counter() - started
+            rows = lines - (1 if args.format == "csv" else 0)
+            print(f"concurrency={concurrency:<2} rows={rows} size={size / 1024 / 1024:.1f}MB elapsed={elapsed:.2f}s throughput={rows / elapsed:,.0f} rows/s first byte={ttfb * 1000:.0f}ms peak RSS={peak_rss_mb():.1f}MB")
+
+        # Cut an NDJSON export short, then resume from the last id received.
+        cut = min(1000, args.catalog_size // 2)
+        _, _, _, last = await export(client, credentials, "ndjson", stop_after_lines=cut)
+        cursor = json.loads(last)["id"]
+        lines, _, _, last = await export(client, credentials, "ndjson", cursor=cursor)
+        print(f"resume: cut after id {cursor}, resumed {lines} rows, total {cut + lines} of {args.catalog_size}, last id {json.loads(last)['id']}")
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog-size", type=int, default=100_000)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock Magento latency per request")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="EXPORT_MAX_CONCURRENCY values to compare")
+    parser.add_argument("--page-size", type=int, default=settings.EXPORT_PAGE_SIZE)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    args = parser.parse_args()
+    settings.EXPORT_PAGE_SIZE = args.page_size
+    print(f"catalog={args.catalog_size} page_size={args.page_size} latency={args.latency_ms:.0f}ms format={args.format} baseline RSS={peak_rss_mb():.1f}MB")
+    with run_mock_server("--latency-ms", str(args.latency_ms), "--catalog-size", str(args.catalog_size)) as store_url, serve_app(main.app) as app_url:
+        asyncio.run(run(app_url, store_url, args))
+
+if __name__ == "__main__":
+    main_()
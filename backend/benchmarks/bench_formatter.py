@@ -0,0 +1,98 @@
+# backend/benchmarks/bench_formatter.py
+"""
+Benchmarks ProductFormatter against the original inline formatting loop from
+product_query on synthetic Magento payloads. tests/test_product_formatter.py
+checks that both produce identical cards.
+
+    python -m benchmarks.bench_formatter --sizes 10 1000 100000
+"""
+import argparse
+import random
+import re
+import time
+from benchmarks.common import percentile
+
+from app.services.product_formatter import ProductFormatter
+from app.services.store_metadata import store_metadata
+
+STORE_URL = "https://store.example.com/"
+
+def synthetic_products(count: int, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        price = round(rng.uniform(5, 500), 2)
+        attrs = [{"attribute_code": code, "value": str(rng.randint(1, 999))} for code in ("url_key", "tax_class_id", "manufacturer", "color", "wattage", "ip_rating", "warranty", "country_of_manufacture")]
+        if rng.random() < 0.8:
+            attrs.append({"attribute_code": "short_description", "value": f"<p>Warm white <strong>LED</strong> fitting&nbsp;#{i} with a long life.</p>"})
+        attrs.append({"attribute_code": "description", "value": "<div><h2>Specs</h2><ul>" + "".join(f"<li>Feature {n}&amp;more</li>" for n in range(12)) + "</ul></div>"})
+        gallery = [{"id": n, "file": f"/a/b/{i}_{n}.jpg", "types": ["image", "small_image"] if n == 2 else []} for n in range(rng.randint(0, 4))]
+        products.append({
+            "id": i, "sku": f"SKU-{i:06d}", "name": f"LED Product {i}", "price": price,
+            "special_price": round(price * 0.8, 2) if rng.random() < 0.3 else None,
+            "custom_attributes": attrs, "media_gallery_entries": gallery,
+        })
+    return products
+
+def legacy_format(items: list, credentials: dict) -> list[dict]:
+    """The formatting loop product_query used before ProductFormatter, kept verbatim for comparison."""
+    formatted_products = []
+    for product in items:
+        if not isinstance(product, dict): continue
+        description = "No description available."
+        description_html, short_description_html = "", ""
+        custom_attrs = product.get('custom_attributes', [])
+        if isinstance(custom_attrs, list):
+            for attr in custom_attrs:
+                if not isinstance(attr, dict): continue
+                if attr.get('attribute_code') == 'short_description': short_description_html = attr.get('value', '')
+                if attr.get('attribute_code') == 'description': description_html = attr.get('value', '')
+        final_html = short_description_html or description_html
+        if final_html and isinstance(final_html, str):
+            clean_desc = re.sub('<[^<]+?>', '', final_html); clean_desc = re.sub('&[a-zA-Z0-9]+;', ' ', clean_desc).strip()
+            if clean_desc: description = clean_desc
+        image_path = ""
+        gallery = product.get('media_gallery_entries', [])
+        if isinstance(gallery, list) and gallery:
+            for entry in gallery:
+                if isinstance(entry, dict):
+                    types = entry.get('types', [])
+                    if isinstance(types, list) and 'image' in types: image_path = entry.get('file'); break
+            if not image_path and gallery and isinstance(gallery[0], dict): image_path = gallery[0].get('file', '')
+        display_price = "Price not available"
+        try:
+            special_price_val, price_val = product.get('special_price'), product.get('price')
+            if special_price_val is not None and float(special_price_val) < float(price_val):
+                display_price = f"<del>${float(price_val):.2f}</del> <strong>${float(special_price_val):.2f}</strong>"
+            elif price_val is not None:
+                display_price = f"${float(price_val):.2f}"
+        except (ValueError, TypeError, AttributeError): pass
+        formatted_products.append({"id": product.get('id'), "sku": product.get('sku'), "name": product.get('name'), "price": display_price, "image_url": f"{credentials['store_url'].rstrip('/')}/media/catalog/product{image_path}" if image_path else "", "description": description})
+    return formatted_products
+
+def timed(fn, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    credentials = {"store_url": STORE_URL}
+    formatter = ProductFormatter(store_metadata.media_base_url(STORE_URL))
+    print(f"{'items':>8} | {'legacy p50 ms':>13} | {'formatter p50 ms':>16} | speedup")
+    for size in args.sizes:
+        products = synthetic_products(size)
+        rounds = args.rounds if size < 100000 else max(1, args.rounds // 2)
+        legacy = percentile(timed(lambda: legacy_format(products, credentials), rounds), 50)
+        current = percentile(timed(lambda: formatter.format_many(products), rounds), 50)
+        print(f"{size:>8} | {legacy:>13.2f} | {current:>16.2f} | {legacy / current:.2f}x")
+
+if __name__ == "__main__":
+    main()
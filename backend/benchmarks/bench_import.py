@@ -0,0 +1,72 @@
+# backend/benchmarks/bench_import.py
+"""
+Runs the bulk CSV import pipeline end to end against the mock Magento server and
+reports throughput and peak RSS. The CSV is generated on disk first, so the RSS
+figure shows what the import itself holds in memory.
+
+    python -m benchmarks.bench_import --rows 100000 --latency-ms 20 --bulk-error-rate 0.02
+"""
+import argparse
+import asyncio
+import csv
+import random
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.common import peak_rss_mb
+from benchmarks.mock_magento import run_mock_server
+
+from app.core.config import settings
+from app.services.catalog_import import catalog_importer
+from app.services.magento_client import magento_client
+
+COLORS = ["Red", "Green", "Blue", "warm white", "Cool White"]
+
+def write_csv(path: Path, rows: int, invalid_rate: float, seed: int = 7):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sku", "price", "special_price", "qty", "is_in_stock", "color"])
+        for i in range(rows):
+            price = round(rng.uniform(5, 500), 2)
+            row = [f"SKU-{i:07d}", price, round(price * 0.8, 2) if rng.random() < 0.3 else "", rng.randint(0, 500), rng.choice(["1", "0"]), rng.choice(COLORS)]
+            if rng.random() < invalid_rate: row[1] = "n/a"
+            writer.writerow(row)
+
+async def run_import(path: Path, credentials: dict) -> dict:
+    job = catalog_importer.start(path.name, path, credentials)
+    while not job.finished:
+        await asyncio.sleep(0.1)
+    await magento_client.aclose()
+    return job.to_dict()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock Magento latency per request")
+    parser.add_argument("--bulk-error-rate", type=float, default=0.0, help="Share of bulk requests the mock fails with 503")
+    parser.add_argument("--invalid-rate", type=float, default=0.001, help="Share of rows with an invalid price")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=settings.IMPORT_MAX_CONCURRENCY)
+    args = parser.parse_args()
+    settings.IMPORT_BATCH_SIZE, settings.IMPORT_MAX_CONCURRENCY = args.batch_size, args.concurrency
+    settings.IMPORT_RETRY_BASE_DELAY = 0.05
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "import.csv"
+        write_csv(path, args.rows, args.invalid_rate)
+        size_mb = path.stat().st_size / 1024 / 1024
+        rss_before = peak_rss_mb()
+        with run_mock_server("--latency-ms", str(args.latency_ms), "--bulk-error-rate", str(args.bulk_error_rate)) as store_url:
+            credentials = {"store_url": store_url, "consumer_key": "k", "consumer_secret": "s", "access_token": "t", "access_token_secret": "ts"}
+            started = time.perf_counter()
+            result = asyncio.run(run_import(path, credentials))
+            elapsed = time.perf_counter() - started
+
+    print(f"rows={args.rows} csv={size_mb:.1f}MB batch={args.batch_size} concurrency={args.concurrency} latency={args.latency_ms:.0f}ms error_rate={args.bulk_error_rate}")
+    print(f"status={result['status']} accepted={result['rows_accepted']} invalid={result['rows_invalid']} failed={result['rows_failed']} batches={result['batches_sent']} retries={result['retries']}")
+    print(f"elapsed={elapsed:.2f}s throughput={args.rows / elapsed:,.0f} rows/s")
+    print(f"peak RSS: {rss_before:.1f}MB before, {peak_rss_mb():.1f}MB after")
+
+if __name__ == "__main__":
+    main()
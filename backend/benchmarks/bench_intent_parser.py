@@ -0,0 +1,73 @@
+# backend/benchmarks/bench_intent_parser.py
+"""
+Compares intent classification latency with and without the rule-based fast path
+on the recorded query corpus, using a simulated LLM round trip. Every fast-path
+parse is checked against the hand-labelled answers in data/fast_path_expected.json,
+so "LLM calls avoided" only counts as a win together with "wrong: 0".
+
+    python -m benchmarks.bench_intent_parser --llm-latency-ms 600 --repeat 3
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from benchmarks.common import DATA_DIR, percentile, read_lines
+
+from app.services.attribute_cache import AttributeOptions
+from app.services.intent_parser import fast_parse
+from app.core.config import settings
+
+async def fake_llm(message: str, latency: float, jitter: float) -> dict:
+    await asyncio.sleep(max(0.0, random.gauss(latency, jitter)))
+    return {"task": "search", "keywords": message}
+
+async def run(queries: list[str], brands: AttributeOptions, use_fast_path: bool, latency: float, jitter: float):
+    timings, llm_calls = [], 0
+    for message in queries:
+        start = time.perf_counter()
+        arguments = fast_parse(message, brands, settings.FAST_INTENT_MIN_CONFIDENCE) if use_fast_path else None
+        if arguments is None:
+            llm_calls += 1
+            await fake_llm(message, latency, jitter)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, llm_calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Mean simulated LLM round trip")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus")
+    args = parser.parse_args()
+
+    random.seed(7)
+    queries = read_lines("query_corpus.txt") * args.repeat
+    brands = AttributeOptions([{"label": label, "value": str(i)} for i, label in enumerate(read_lines("brands.txt"), start=1)])
+    latency, jitter = args.llm_latency_ms / 1000, args.llm_latency_ms / 4000
+
+    # Parser cost on its own, in microseconds.
+    parse_us = []
+    for message in queries:
+        start = time.perf_counter()
+        fast_parse(message, brands, settings.FAST_INTENT_MIN_CONFIDENCE)
+        parse_us.append((time.perf_counter() - start) * 1e6)
+
+    # A skipped LLM call is only a win if the fast path got the arguments right.
+    expected = json.loads((DATA_DIR / "fast_path_expected.json").read_text(encoding="utf-8"))
+    wrong = []
+    for message in dict.fromkeys(queries):
+        arguments = fast_parse(message, brands, settings.FAST_INTENT_MIN_CONFIDENCE)
+        if arguments is not None and arguments != expected.get(message): wrong.append((message, arguments))
+
+    baseline, baseline_calls = asyncio.run(run(queries, brands, False, latency, jitter))
+    fast, fast_calls = asyncio.run(run(queries, brands, True, latency, jitter))
+
+    print(f"queries: {len(queries)}  simulated LLM latency: {args.llm_latency_ms:.0f} ms")
+    print(f"fast parser alone:  p50 {percentile(parse_us, 50):8.1f} us   p99 {percentile(parse_us, 99):8.1f} us")
+    print(f"LLM only:           p50 {percentile(baseline, 50):8.1f} ms   p99 {percentile(baseline, 99):8.1f} ms   LLM calls {baseline_calls}")
+    print(f"fast path + LLM:    p50 {percentile(fast, 50):8.1f} ms   p99 {percentile(fast, 99):8.1f} ms   LLM calls {fast_calls}")
+    print(f"LLM calls avoided:  {1 - fast_calls / baseline_calls:.1%}   wrong: {len(wrong)}")
+    for message, arguments in wrong:
+        print(f"  {message!r}: got {arguments}, labelled {expected.get(message)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# backend/benchmarks/bench_llm_gateway.py
+"""
+Fires a burst of intent classifications at the fake OpenAI server, once with a bare
+AsyncOpenAI client (library defaults: 2 retries, no limits) and once through the LLM
+gateway, and compares latency percentiles, failures and how often the provider
+answered 429. The fake has a slow tail and a concurrency cap, like a busy provider.
+
+    python -m benchmarks.bench_llm_gateway --requests 400 --concurrency 100 --latency-ms 300 --tail-rate 0.05 --max-concurrency 24
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from openai import AsyncOpenAI
+from benchmarks.common import percentile
+from benchmarks.mock_openai import run_mock_openai
+
+from app.core.config import settings
+from app.services.llm_gateway import LLMGateway
+from app.services.nlu_service import tools
+
+async def burst(call, requests: int, concurrency: int) -> tuple[list[float], int, float]:
+    """Returns (latencies of successful calls, failures, wall time)."""
+    gate = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+    async def one(i: int):
+        nonlocal failures
+        async with gate:
+            started = time.perf_counter()
+            try:
+                await call(model=settings.LLM_MODEL_NAME, messages=[{"role": "user", "content": f"show me led bulbs {i}"}], tools=tools, tool_choice={"type": "function", "function": {"name": "product_query"}})
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                failures += 1
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, failures, time.perf_counter() - started
+
+async def provider_stats(url: str) -> dict:
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{url}/stats")).json()
+
+def report(label: str, latencies: list[float], failures: int, wall: float, before: dict, after: dict, extra: str = ""):
+    ms = [value * 1000 for value in latencies]
+    print(f"{label:<9} ok={len(latencies):<4} failed={failures:<3} wall={wall:5.1f}s  p50 {percentile(ms, 50):6.0f}ms  p95 {percentile(ms, 95):6.0f}ms  p99 {percentile(ms, 99):6.0f}ms  "
+          f"provider calls={after['requests'] - before['requests']} 429s={after['throttled'] - before['throttled']} {extra}")
+
+async def run(url: str, args):
+    bare = AsyncOpenAI(api_key="benchmark", base_url=f"{url}/v1")
+    before = await provider_stats(url)
+    result = await burst(bare.chat.completions.create, args.requests, args.concurrency)
+    report("bare", *result, before, await provider_stats(url))
+
+    gateway = LLMGateway(AsyncOpenAI(api_key="benchmark", base_url=f"{url}/v1", max_retries=0, timeout=settings.LLM_REQUEST_TIMEOUT))
+    # Warm the latency window so hedging has a p95 to work from.
+    await burst(gateway.create, settings.LLM_HEDGE_MIN_SAMPLES, 4)
+    before = await provider_stats(url)
+    result = await burst(lambda **kw: gateway.create(tenant="bench", **kw), args.requests, args.concurrency)
+    counters = gateway.counters["bench"]
+    report("gateway", *result, before, await provider_stats(url), f"hedges={counters['hedges']} (won {counters['hedge_wins']}) rate={gateway.limiter.rate:.1f}/s tokens={counters['prompt_tokens']}+{counters['completion_tokens']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100, help="Callers in flight")
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--tail-factor", type=float, default=8.0)
+    parser.add_argument("--max-concurrency", type=int, default=24, help="Provider-side limit before 429s")
+    parser.add_argument("--gateway-concurrency", type=int, default=20, help="LLM_MAX_CONCURRENCY for the gateway run")
+    args = parser.parse_args()
+    settings.LLM_MAX_CONCURRENCY = args.gateway_concurrency
+    settings.LLM_MAX_CONCURRENCY_PER_TENANT = args.gateway_concurrency
+    settings.LLM_RATE_LIMIT = 0
+    print(f"requests={args.requests} callers={args.concurrency} latency={args.latency_ms:.0f}ms tail={args.tail_rate:.0%}x{args.tail_factor:g} provider cap={args.max_concurrency}")
+    with run_mock_openai("--latency-ms", str(args.latency_ms), "--tail-rate", str(args.tail_rate), "--tail-factor", str(args.tail_factor), "--max-concurrency", str(args.max_concurrency)) as url:
+        asyncio.run(run(url, args))
+
+if __name__ == "__main__":
+    main()
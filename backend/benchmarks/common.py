@@ -0,0 +1,71 @@
+# backend/benchmarks/common.py
+"""Shared helpers for the scripts in this folder. Run them from `backend/` with `python -m benchmarks.<name>`."""
+import os
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# The app reads its settings at import time; benchmarks never talk to a real store or LLM.
+for _name, _value in {"MAGENTO_STORE_URL": "http://mock-magento", "MAGENTO_API_TOKEN": "benchmark", "LLM_API_KEY": "benchmark", "LLM_MODEL_NAME": "mock-llm"}.items():
+    os.environ.setdefault(_name, _value)
+
+DATA_DIR = Path(__file__).parent / "data"
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; `pct` is 0-100."""
+    if not values: return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@contextmanager
+def run_server_process(module: str, *args: str):
+    """Runs `python -m <module> --port N *args` (so it doesn't count towards the caller's RSS) and yields its base URL."""
+    port = free_port()
+    process = subprocess.Popen([sys.executable, "-m", module, "--port", str(port), *args], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError(f"{module} did not start.")
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+@contextmanager
+def serve_app(app):
+    """Runs an ASGI app with uvicorn on a background thread (so its memory is this process's) and yields its base URL."""
+    import uvicorn
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started: time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+def read_lines(name: str) -> list[str]:
+    lines = (DATA_DIR / name).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
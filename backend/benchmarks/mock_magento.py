@@ -0,0 +1,159 @@
+# backend/benchmarks/mock_magento.py
+"""
+Minimal stand-in for the Magento REST API used by the benchmarks: a synthetic
+catalog of `--catalog-size` products behind searchCriteria paging (entity_id and
+LIKE name/sku filters), product by SKU, a fixed attribute schema, store views and
+configs (media under /pub/media/) and the bulk endpoint. It adds a configurable latency to every call and can fail a share of
+bulk requests with 503 so retries are exercised. It does not check OAuth signatures.
+
+    python -m benchmarks.mock_magento --port 8799 --latency-ms 20 --bulk-error-rate 0.02 --catalog-size 100000
+"""
+import argparse
+import asyncio
+import random
+import re
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from benchmarks.common import run_server_process
+
+ATTRIBUTES = {
+    "special_price": {"backend_type": "decimal", "frontend_input": "price"},
+    "cost": {"backend_type": "decimal", "frontend_input": "price"},
+    "color": {"backend_type": "int", "frontend_input": "select", "options": ["Red", "Green", "Blue", "Warm White", "Cool White"]},
+    "manufacturer": {"backend_type": "int", "frontend_input": "select", "options": ["Lumenco", "Philips", "Osram", "Ledvance"]},
+}
+
+_FILTER = re.compile(r"searchCriteria\[filter_groups\]\[(\d+)\]\[filters\]\[(\d+)\]\[(field|value|condition_type)\]")
+
+def synthetic_product(product_id: int) -> dict:
+    """Deterministic product for an id, shaped like a Magento /products item."""
+    rng = random.Random(product_id)
+    price = round(rng.uniform(5, 500), 2)
+    attrs = [
+        {"attribute_code": "short_description", "value": f"<p>Warm white <strong>LED</strong> fitting #{product_id}&nbsp;with a long life.</p>"},
+        {"attribute_code": "manufacturer", "value": str(100 + product_id % 4)},
+        {"attribute_code": "color", "value": str(100 + product_id % 5)},
+    ]
+    if product_id % 3 == 0: attrs.append({"attribute_code": "special_price", "value": f"{price * 0.8:.2f}"})
+    return {
+        "id": product_id, "sku": f"SKU-{product_id:07d}", "name": f"LED Product {product_id}", "price": price, "status": 1,
+        "updated_at": f"2025-01-01 00:{product_id // 60 % 60:02d}:{product_id % 60:02d}", "custom_attributes": attrs,
+        "media_gallery_entries": [{"id": product_id, "file": f"/l/e/{product_id}.jpg", "types": ["image", "small_image", "thumbnail"]}],
+    }
+
+def _matches(product: dict, groups: dict) -> bool:
+    # Filters within a group are ORed, groups are ANDed, as in Magento.
+    for filters in groups.values():
+        hit = False
+        for f in filters.values():
+            field, value, condition = f.get("field"), f.get("value", ""), f.get("condition_type", "eq")
+            if field == "entity_id": actual = product["id"]
+            else: actual = product.get(field, next((a["value"] for a in product["custom_attributes"] if a["attribute_code"] == field), None))
+            if condition == "gt": hit = actual is not None and float(actual) > float(value)
+            elif condition == "notnull": hit = actual not in (None, "")
+            elif condition == "like": hit = value.strip("%").lower() in str(actual or "").lower()
+            elif condition == "eq": hit = str(actual) == value
+            else: hit = True  # Conditions the mock doesn't model don't filter
+            if hit: break
+        if not hit: return False
+    return True
+
+def create_app(latency: float = 0.0, bulk_error_rate: float = 0.0, catalog_size: int = 1000) -> FastAPI:
+    app = FastAPI()
+    catalog: list[dict] = []  # Built on the first filtered search, so filter scans don't regenerate products
+    app.state.bulk_requests = 0
+    app.state.bulk_products = 0
+
+    @app.middleware("http")
+    async def add_latency(request: Request, call_next):
+        if latency: await asyncio.sleep(latency)
+        return await call_next(request)
+
+    @app.get("/index.php/rest/V1/products/attributes/{code}/options")
+    async def attribute_options(code: str):
+        attribute = ATTRIBUTES.get(code)
+        if attribute is None: return JSONResponse({"message": "Attribute not found"}, status_code=404)
+        return [{"label": " ", "value": ""}] + [{"label": label, "value": str(100 + i)} for i, label in enumerate(attribute.get("options", []))]
+
+    @app.get("/index.php/rest/V1/products/attributes/{code}")
+    async def attribute(code: str):
+        attribute = ATTRIBUTES.get(code)
+        if attribute is None: return JSONResponse({"message": "Attribute not found"}, status_code=404)
+        return {"attribute_code": code, "backend_type": attribute["backend_type"], "frontend_input": attribute["frontend_input"]}
+
+    @app.post("/index.php/rest/async/bulk/V1/products")
+    async def bulk_products(request: Request):
+        if bulk_error_rate and random.random() < bulk_error_rate:
+            return JSONResponse({"message": "Service Unavailable"}, status_code=503)
+        body = await request.json()
+        app.state.bulk_requests += 1
+        app.state.bulk_products += len(body)
+        items = [{"id": i, "data_hash": None, "status": "accepted"} for i in range(len(body))]
+        return {"bulk_uuid": str(uuid.uuid4()), "request_items": items, "errors": False}
+
+    @app.get("/index.php/rest/V1/products")
+    async def search_products(request: Request):
+        groups: dict = {}
+        for key, value in request.query_params.multi_items():
+            if match := _FILTER.fullmatch(key):
+                groups.setdefault(match[1], {}).setdefault(match[2], {})[match[3]] = value
+        page_size = int(request.query_params.get("searchCriteria[pageSize]", 20))
+        current_page = max(1, int(request.query_params.get("searchCriteria[currentPage]", 1)))
+        # An entity_id lower bound (export cursors) is applied by skipping ids instead of scanning them.
+        start_id = 1
+        for filters in groups.values():
+            for f in filters.values():
+                if f.get("field") == "entity_id" and f.get("condition_type") == "gt": start_id = max(start_id, int(f["value"]) + 1)
+        if all(f.get("field") == "entity_id" for filters in groups.values() for f in filters.values()):
+            total_count = max(0, catalog_size - start_id + 1)
+            if page_size == 0: return {"items": [], "total_count": total_count}
+            last_page = max(1, -(-total_count // page_size))
+            first = start_id + (min(current_page, last_page) - 1) * page_size  # Magento repeats the last page past the end
+            items = [synthetic_product(i) for i in range(first, min(first + page_size, catalog_size + 1))]
+            return {"items": items, "total_count": total_count}
+        if not catalog: catalog.extend(synthetic_product(i) for i in range(1, catalog_size + 1))
+        matches = [p for p in catalog[start_id - 1:] if _matches(p, groups)]
+        if page_size == 0: return {"items": [], "total_count": len(matches)}
+        last_page = max(1, -(-len(matches) // page_size))
+        offset = (min(current_page, last_page) - 1) * page_size
+        return {"items": matches[offset:offset + page_size], "total_count": len(matches)}
+
+    @app.get("/index.php/rest/V1/products/attributes")
+    async def attribute_schema():
+        items = [{"attribute_code": code, "frontend_input": attribute["frontend_input"]} for code, attribute in ATTRIBUTES.items()]
+        return {"items": items, "total_count": len(items)}
+
+    @app.get("/index.php/rest/V1/products/{sku}")
+    async def product_by_sku(sku: str):
+        match = re.fullmatch(r"SKU-(\d+)", sku)
+        if not match or not 1 <= int(match[1]) <= catalog_size: return JSONResponse({"message": "The product that was requested doesn't exist."}, status_code=404)
+        return synthetic_product(int(match[1]))
+
+    @app.get("/index.php/rest/V1/store/storeViews")
+    async def store_views():
+        return [{"id": 1, "code": "default", "name": "Mock Store"}]
+
+    @app.get("/index.php/rest/V1/store/storeConfigs")
+    async def store_configs(request: Request):
+        media_url = f"{str(request.base_url).rstrip('/')}/pub/media/"
+        return [{"id": 1, "code": "default", "base_media_url": media_url, "secure_base_media_url": media_url}]
+
+    return app
+
+def run_mock_server(*args: str):
+    """Runs the mock in a subprocess and yields its base URL."""
+    return run_server_process("benchmarks.mock_magento", *args)
+
+def main():
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added to every response")
+    parser.add_argument("--bulk-error-rate", type=float, default=0.0, help="Share of bulk requests answered with 503")
+    parser.add_argument("--catalog-size", type=int, default=1000, help="Products in the synthetic catalog")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms / 1000, args.bulk_error_rate, args.catalog_size), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
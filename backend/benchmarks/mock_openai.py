@@ -0,0 +1,109 @@
+# backend/benchmarks/mock_openai.py
+"""
+Fake OpenAI-compatible server for the benchmarks (point LLM_BASE_URL at `<url>/v1`).
+/v1/chat/completions answers tool calls with a `product_query` call (details for a
+message naming a SKU, count for "how many"/"count", search for the rest) and plain
+or streamed (SSE) text otherwise, with usage counts. Latency
+is log-normal around `--latency-ms`, a `--tail-rate` share of calls is `--tail-factor`
+times slower, `--ms-per-1k-prompt-tokens` adds prompt processing time, and requests
+beyond `--max-concurrency` in flight get a 429.
+
+    python -m benchmarks.mock_openai --port 8798 --latency-ms 300 --tail-rate 0.05 --max-concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from benchmarks.common import run_server_process
+
+_SKU = re.compile(r"\bSKU-\d+\b", re.I)
+_COUNT = re.compile(r"^\s*(?:how many|count)\b", re.I)
+_FILLER = frozenset("show me find search for list how many count are there do you have the a an any all please what is of in stock".split())
+
+def product_query_arguments(message: str) -> dict:
+    """What a well-behaved model would extract from `message`, by rule."""
+    sku = _SKU.search(message)
+    if sku: return {"task": "details", "sku": sku[0].upper(), "question": message}
+    keywords = " ".join(w for w in re.findall(r"[\w-]+", message.lower()) if w not in _FILLER)
+    return {"task": "count" if _COUNT.match(message) else "search", "keywords": keywords}
+
+ANSWER = "This fitting uses a warm white LED with a long rated life, and it is dimmable with a compatible trailing-edge dimmer."
+
+def create_app(latency: float = 0.3, tail_rate: float = 0.0, tail_factor: float = 10.0, max_concurrency: int = 0, prefill: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    state = {"in_flight": 0, "requests": 0, "throttled": 0}
+
+    def delay(prompt_tokens: int) -> float:
+        seconds = random.lognormvariate(0, 0.25) * latency
+        if random.random() < tail_rate: seconds *= tail_factor
+        return seconds + prompt_tokens / 1000 * prefill
+
+    @app.get("/stats")
+    async def stats():
+        return state
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        state["requests"] += 1
+        if max_concurrency and state["in_flight"] >= max_concurrency:
+            state["throttled"] += 1
+            return JSONResponse({"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}, status_code=429, headers={"retry-after": "1"})
+        prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+        state["in_flight"] += 1
+        try:
+            await asyncio.sleep(delay(prompt_tokens))
+        finally:
+            state["in_flight"] -= 1
+        model, created, completion_id = body.get("model", "mock"), int(time.time()), f"chatcmpl-{uuid.uuid4().hex}"
+        user_message = next((m.get("content") for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "")
+
+        if body.get("tools"):
+            arguments = json.dumps(product_query_arguments(user_message or ""))
+            message = {"role": "assistant", "content": None, "tool_calls": [{"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function", "function": {"name": "product_query", "arguments": arguments}}]}
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(arguments) // 4, "total_tokens": prompt_tokens + len(arguments) // 4}
+            return {"id": completion_id, "object": "chat.completion", "created": created, "model": model, "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls"}], "usage": usage}
+
+        words = ANSWER.split(" ")
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words), "total_tokens": prompt_tokens + len(words)}
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": ANSWER}
+            return {"id": completion_id, "object": "chat.completion", "created": created, "model": model, "choices": [{"index": 0, "message": message, "finish_reason": "stop"}], "usage": usage}
+
+        async def events():
+            base = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+            for i, word in enumerate(words):
+                delta = {"role": "assistant", "content": word} if i == 0 else {"content": " " + word}
+                yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})}\n\n"
+                await asyncio.sleep(0.005)
+            yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+def run_mock_openai(*args: str):
+    """Runs the fake in a subprocess and yields its base URL (without /v1)."""
+    return run_server_process("benchmarks.mock_openai", *args)
+
+def main():
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Median response time")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Share of slow responses")
+    parser.add_argument("--tail-factor", type=float, default=10.0, help="How much slower the slow responses are")
+    parser.add_argument("--ms-per-1k-prompt-tokens", type=float, default=0.0, help="Added per 1000 prompt tokens")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Requests in flight before answering 429; 0 = unlimited")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms / 1000, args.tail_rate, args.tail_factor, args.max_concurrency, args.ms_per_1k_prompt_tokens / 1000), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,30 @@
 # backend/main.py
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import api_router
+from app.services.magento_client import magento_client
+from app.services.catalog_mirror import catalog_mirror
+from app.services.catalog_import import catalog_importer
+from app.core.telemetry import RequestContextMiddleware, configure_logging, metrics
 import os # <--- IMPORT os
 
+configure_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop background imports and catalog syncs, then close the pooled Magento connections
+    await catalog_importer.aclose()
+    await catalog_mirror.aclose()
+    await magento_client.aclose()
+
 app = FastAPI(
     title="Magento AI Operator",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # --- START: CORS CONFIGURATION ---
@@ -33,10 +50,19 @@ app.add_middleware(
 
 # --- END: CORS CONFIGURATION ---
 
+# Request id for the logs plus per-route latency; outermost, so it times the whole request
+app.add_middleware(RequestContextMiddleware)
+
 
 # Include the API router
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/", tags=["Health Check"])
 def read_root():
-    return {"status": "ok", "message": "Welcome to the Magento AI Operator API"}
\ No newline at end of file
+    return {"status": "ok", "message": "Welcome to the Magento AI Operator API"}
+
+@app.get("/metrics", tags=["Health Check"], response_class=PlainTextResponse)
+def read_metrics():
+    """Prometheus text exposition of the counters and histograms in app/core/telemetry.py."""
+    if not metrics.enabled: raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
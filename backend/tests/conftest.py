@@ -0,0 +1,7 @@
+# backend/tests/conftest.py
+"""Run from `backend/` with `python -m pytest -q`. Tests never talk to a real store or LLM."""
+import os
+
+# The app reads its settings at import time.
+for _name, _value in {"MAGENTO_STORE_URL": "http://test-magento", "MAGENTO_API_TOKEN": "test", "LLM_API_KEY": "test", "LLM_MODEL_NAME": "test-llm"}.items():
+    os.environ.setdefault(_name, _value)
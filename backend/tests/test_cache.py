@@ -0,0 +1,34 @@
+# backend/tests/test_cache.py
+import asyncio
+import pytest
+from app.core.cache import AsyncTTLCache
+
+def test_cancelled_owner_does_not_fail_coalesced_callers():
+    cache = AsyncTTLCache(maxsize=10, ttl=60)
+    calls = []
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+    async def run():
+        owner = asyncio.create_task(cache.get_or_load("key", load))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load("key", load))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        with pytest.raises(asyncio.CancelledError): await owner
+        return await waiter
+    assert asyncio.run(run()) == "value"
+    assert len(calls) == 1
+    assert cache.get("key") == "value"
+
+def test_failed_load_reaches_every_caller_and_is_not_cached():
+    cache = AsyncTTLCache(maxsize=10, ttl=60)
+    async def load():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("store down")
+    async def run():
+        return await asyncio.gather(cache.get_or_load("key", load), cache.get_or_load("key", load), return_exceptions=True)
+    results = asyncio.run(run())
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert cache.get("key") is None
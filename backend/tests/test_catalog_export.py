@@ -0,0 +1,50 @@
+# backend/tests/test_catalog_export.py
+import asyncio
+import json
+import pytest
+from app.core.config import settings
+from app.services.catalog_export import CatalogExport, ExportError
+
+CREDENTIALS = {"store_url": "https://store.test", "consumer_key": "k", "consumer_secret": "s", "access_token": "t", "access_token_secret": "ts"}
+
+def failing_export(monkeypatch, fmt: str) -> CatalogExport:
+    """Three pages; the third fails."""
+    monkeypatch.setattr(settings, "EXPORT_PAGE_SIZE", 2)
+    export = CatalogExport(CREDENTIALS, ([], 0), fmt=fmt)
+    async def fetch_page(page: int, after_id: int | None) -> dict:
+        if page == 3: raise ExportError("Magento API Error: 503 - Service Unavailable")
+        return {"total_count": 6, "items": [{"id": page * 10 + i, "sku": f"SKU-{page}{i}", "name": "Bulb"} for i in range(2)]}
+    export._fetch_page = fetch_page
+    return export
+
+async def collect(export: CatalogExport, chunks: list[str]):
+    async for chunk in export.stream(): chunks.append(chunk)
+
+def test_failed_csv_export_raises_instead_of_ending_cleanly(monkeypatch):
+    export, chunks = failing_export(monkeypatch, "csv"), []
+    with pytest.raises(ExportError):
+        asyncio.run(collect(export, chunks))
+    assert "".join(chunks).count("SKU-") == 4
+    assert export.last_id == 21
+
+def test_failed_ndjson_export_ends_with_an_error_line_and_cursor(monkeypatch):
+    export, chunks = failing_export(monkeypatch, "ndjson"), []
+    asyncio.run(collect(export, chunks))
+    lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [line.get("sku") for line in lines[:-1]] == ["SKU-10", "SKU-11", "SKU-20", "SKU-21"]
+    assert lines[-1] == {"error": "Magento API Error: 503 - Service Unavailable", "cursor": 21}
+
+def test_products_removed_behind_the_export_do_not_shift_later_batches(monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_PAGE_SIZE", 2)
+    monkeypatch.setattr(settings, "EXPORT_MAX_CONCURRENCY", 2)
+    catalog = list(range(1, 13))
+    export = CatalogExport(CREDENTIALS, ([], 0), fmt="ndjson")
+    async def fetch_page(page: int, after_id: int | None) -> dict:
+        if after_id is not None and catalog[0] == 1: del catalog[:3]  # ids 1-3 are deleted once the first batch is read
+        matching = [i for i in catalog if after_id is None or i > after_id]
+        start = min(page - 1, max(0, -(-len(matching) // 2) - 1)) * 2  # past the end Magento repeats the last page
+        return {"total_count": len(matching), "items": [{"id": i, "sku": f"SKU-{i}"} for i in matching[start:start + 2]]}
+    export._fetch_page = fetch_page
+    chunks = []
+    asyncio.run(collect(export, chunks))
+    assert [json.loads(line)["id"] for line in "".join(chunks).splitlines()] == list(range(1, 13))
@@ -0,0 +1,38 @@
+# backend/tests/test_chatbot.py
+import asyncio
+from types import SimpleNamespace
+from app.api.v1.endpoints import chatbot
+from app.schemas.chatbot import ChatRequest
+from app.services.magento_wrapper import magento_service
+
+CREDENTIALS = {"store_url": "https://store.test", "consumer_key": "k", "consumer_secret": "s", "access_token": "t", "access_token_secret": "ts"}
+PRODUCT = {"sku": "LB-E27-9W", "name": "E27 LED bulb 9W", "price": 12.5, "custom_attributes": [{"attribute_code": "wattage", "value": "9W"}]}
+
+def answer(content: str):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def test_details_question_with_explicit_sku(monkeypatch):
+    fetched, prompts = [], []
+    async def classify_intent(message, brands=None, tenant=None):
+        return {"task": "details", "sku": "LB-E27-9W", "question": message}
+    async def get_brand_options(credentials):
+        return None
+    async def get_product_details_by_sku(sku, credentials):
+        fetched.append(sku)
+        return PRODUCT
+    async def create(tenant, **kwargs):
+        prompts.append(kwargs["messages"][-1]["content"])
+        return answer("It draws 9W.")
+    monkeypatch.setattr(chatbot, "classify_intent", classify_intent)
+    monkeypatch.setattr(magento_service, "get_brand_options", get_brand_options)
+    monkeypatch.setattr(magento_service, "get_product_details_by_sku", get_product_details_by_sku)
+    monkeypatch.setattr(chatbot.llm_gateway, "create", create)
+
+    request = ChatRequest(user_id="u1", message="what is the wattage of LB-E27-9W?", credentials=CREDENTIALS)
+    response = asyncio.run(chatbot.handle_chat(request))
+
+    assert response.response_text == "It draws 9W."
+    assert response.intent == "product_details"
+    assert response.data["sku"] == "LB-E27-9W"
+    assert fetched == ["LB-E27-9W"]
+    assert '"wattage":"9W"' in prompts[0]
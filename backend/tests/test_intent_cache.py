@@ -0,0 +1,52 @@
+# backend/tests/test_intent_cache.py
+import asyncio
+from app.services.intent_cache import IntentCache, MemoryIntentBackend
+
+class FakeLLM:
+    """Stands in for the LLM classifier: records each message it is asked about."""
+    def __init__(self, answers: dict[str, dict]):
+        self.answers = answers
+        self.calls = []
+
+    async def classify(self, message: str) -> dict:
+        self.calls.append(message)
+        return dict(self.answers[message])
+
+def classify_all(messages: list[str], answers: dict[str, dict]) -> tuple[list[dict], FakeLLM]:
+    llm = FakeLLM(answers)
+    cache = IntentCache(MemoryIntentBackend(100), similarity_threshold=0.85)
+    async def run():
+        return [await cache.get_or_classify(message, "test-llm", llm.classify) for message in messages]
+    return asyncio.run(run()), llm
+
+def test_near_duplicate_reuses_arguments():
+    on_sale = {"task": "count", "keywords": "LED pendant bulb", "brand": "philips", "on_sale": True}
+    results, llm = classify_all(
+        ["how many philips LED pendant bulbs are on sale", "How many Philips LED pendant bulb are on sale?"],
+        {"how many philips LED pendant bulbs are on sale": on_sale},
+    )
+    assert results == [on_sale, on_sale]
+    assert len(llm.calls) == 1
+
+def test_negation_is_not_a_near_duplicate():
+    on_sale = {"task": "count", "keywords": "LED pendant bulb", "brand": "philips", "on_sale": True}
+    not_on_sale = {"task": "count", "keywords": "LED pendant bulb", "brand": "philips", "on_sale": False}
+    results, llm = classify_all(
+        ["how many philips LED pendant bulbs are currently on sale", "how many philips LED pendant bulbs are currently not on sale"],
+        {"how many philips LED pendant bulbs are currently on sale": on_sale, "how many philips LED pendant bulbs are currently not on sale": not_on_sale},
+    )
+    assert results == [on_sale, not_on_sale]
+    assert len(llm.calls) == 2
+
+def test_different_words_are_not_near_duplicates():
+    answers = {"outdoor wall lights": {"task": "search", "keywords": "outdoor wall lights"}, "indoor wall lights": {"task": "search", "keywords": "indoor wall lights"}}
+    results, llm = classify_all(list(answers), answers)
+    assert results == list(answers.values())
+    assert len(llm.calls) == 2
+
+def test_details_questions_are_never_reused_by_similarity():
+    first, second = "is SKU-123 dimmable with a trailing edge dimmer", "is SKU-123 dimmable with a trailing-edge dimmer?"
+    answers = {message: {"task": "details", "sku": "SKU-123", "question": message} for message in (first, second)}
+    results, llm = classify_all([first, second, first], answers)
+    assert [r["question"] for r in results] == [first, second, first]
+    assert llm.calls == [first, second]  # The repeat is an exact hit
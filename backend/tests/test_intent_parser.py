@@ -0,0 +1,23 @@
+# backend/tests/test_intent_parser.py
+import pytest
+from app.services.attribute_cache import AttributeOptions
+from app.services.intent_parser import fast_parse
+
+BRANDS = AttributeOptions([{"label": label, "value": str(i)} for i, label in enumerate(["Philips", "Osram", "Domus"], start=1)])
+
+@pytest.mark.parametrize("message, expected", [
+    ("Philips LED bulbs on sale", {"task": "search", "on_sale": True, "brand": "Philips", "keywords": "LED bulb"}),
+    ("count Domus downlights", {"task": "count", "brand": "Domus", "keywords": "downlight"}),
+    ("show 5 philips bulbs", {"task": "search", "limit": 5, "brand": "Philips", "keywords": "bulb"}),
+    ("count batteries", {"task": "count", "keywords": "batteri"}),
+    ("show LED series", {"task": "search", "keywords": "LED seri"}),
+])
+def test_grammar_messages_skip_the_llm(message, expected):
+    assert fast_parse(message, BRANDS, 0.8) == expected
+
+@pytest.mark.parametrize("message", [
+    "I need philips bulbs", "help me find osram", "hi philips", "what is SKU-1?",
+    "show bulbs from osram", "count bulbs by philips", "count products in sale", "show me new arrivals", "LED philips bulbs",
+])
+def test_free_phrasing_goes_to_the_llm(message):
+    assert fast_parse(message, BRANDS, 0.8) is None
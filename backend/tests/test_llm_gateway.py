@@ -0,0 +1,79 @@
+# backend/tests/test_llm_gateway.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.core.config import settings
+from app.services.llm_gateway import LLMDeadlineExceeded, LLMGateway
+
+class FakeStream:
+    """Yields `chunks` and then hangs, like a provider that stops sending mid-answer."""
+    def __init__(self, chunks: int):
+        self.chunks = chunks
+        self.closed = False
+
+    async def __aiter__(self):
+        for i in range(self.chunks):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=f"t{i}"))], usage=None)
+        await asyncio.sleep(3600)
+
+    async def close(self):
+        self.closed = True
+
+class FakeLLM:
+    def __init__(self, latency: float = 0.0, stream: FakeStream | None = None):
+        self.latency = latency
+        self.stream = stream
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if kwargs.get("stream"): return self.stream
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(choices=[], usage=None)
+
+def free_slots(gateway: LLMGateway, tenant: str) -> tuple[int, int]:
+    return gateway._global._value, gateway._tenants[tenant]._value
+
+def test_stream_deadline_covers_reading_and_closes_the_provider_stream():
+    stream = FakeStream(chunks=2)
+    gateway = LLMGateway(FakeLLM(stream=stream))
+    async def run():
+        chunks = []
+        response = await gateway.create(tenant="store", deadline=0.1, model="m", messages=[], stream=True)
+        with pytest.raises(LLMDeadlineExceeded):
+            async for chunk in response: chunks.append(chunk)
+        return chunks
+    assert len(asyncio.run(run())) == 2
+    assert stream.closed
+    assert free_slots(gateway, "store") == (settings.LLM_MAX_CONCURRENCY, settings.LLM_MAX_CONCURRENCY_PER_TENANT)
+    assert gateway.counters["store"]["deadline_exceeded"] == 1
+
+def test_aclose_releases_a_stream_that_was_not_read_to_the_end():
+    stream = FakeStream(chunks=5)
+    gateway = LLMGateway(FakeLLM(stream=stream))
+    async def run():
+        response = await gateway.create(tenant="store", model="m", messages=[], stream=True)
+        await response.__anext__()
+        assert free_slots(gateway, "store")[1] == settings.LLM_MAX_CONCURRENCY_PER_TENANT - 1
+        await response.aclose()
+    asyncio.run(run())
+    assert stream.closed
+    assert free_slots(gateway, "store") == (settings.LLM_MAX_CONCURRENCY, settings.LLM_MAX_CONCURRENCY_PER_TENANT)
+
+@pytest.mark.parametrize("tenant_limit, rate_tokens, hedged", [(2, 5.0, True), (1, 5.0, False), (2, 0.0, False)])
+def test_hedge_needs_a_tenant_slot_and_a_rate_token(monkeypatch, tenant_limit, rate_tokens, hedged):
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY_PER_TENANT", tenant_limit)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY", 0.01)
+    llm = FakeLLM(latency=0.1)
+    gateway = LLMGateway(llm)
+    gateway._latencies[("m", False)].append(0.01)
+    async def run():
+        gateway.limiter._tokens = rate_tokens
+        gateway.limiter.acquire = lambda: asyncio.sleep(0)  # Let the primary through; only the hedge sees `rate_tokens`
+        await gateway.create(tenant="store", model="m", messages=[])
+    asyncio.run(run())
+    assert llm.calls == (2 if hedged else 1)
+    assert gateway.counters["store"]["hedges"] == (1 if hedged else 0)
+    assert free_slots(gateway, "store") == (settings.LLM_MAX_CONCURRENCY, tenant_limit)
@@ -0,0 +1,89 @@
+# backend/tests/test_magento_client.py
+import asyncio
+import httpx
+import pytest
+from app.core.config import settings
+from app.core.telemetry import MAGENTO_SECONDS, metrics
+from app.services.magento_client import MagentoClient, StoreUnavailableError
+from app.services.store_metadata import StoreMetadata, store_metadata
+
+def credentials(store_url: str) -> dict:
+    return {"store_url": store_url, "consumer_key": "ck", "consumer_secret": "cs", "access_token": "at", "access_token_secret": "ats"}
+
+def test_least_recently_used_idle_stores_are_closed_beyond_the_limit(monkeypatch):
+    monkeypatch.setattr(settings, "MAGENTO_MAX_STORES", 2)
+    magento = MagentoClient()
+    async def run():
+        first = magento._get_client("http://a")
+        magento.guard("http://a")
+        evicted = magento._get_client("http://b")
+        magento._get_client("http://a")  # a is now the most recently used
+        magento._get_client("http://c")
+        await asyncio.sleep(0)
+        assert evicted.is_closed and not first.is_closed
+        assert list(magento._clients) == ["http://a", "http://c"]
+        for n in range(50): magento._get_client(f"http://bogus-{n}")
+        assert len(magento._clients) == 2 and "http://a" not in magento._guards
+        await magento.aclose()
+        assert first.is_closed
+    asyncio.run(run())
+
+def test_a_store_with_a_request_in_flight_is_not_evicted(monkeypatch):
+    monkeypatch.setattr(settings, "MAGENTO_MAX_STORES", 1)
+    magento = MagentoClient()
+    async def run():
+        release = asyncio.Event()
+        async def slow(request):
+            await release.wait()
+            return httpx.Response(200, json={})
+        magento._clients["http://busy"] = httpx.AsyncClient(transport=httpx.MockTransport(slow))
+        pending = asyncio.create_task(magento.request("GET", "/store/storeViews", credentials("http://busy")))
+        await asyncio.sleep(0.01)
+        magento._get_client("http://other")
+        assert "http://busy" in magento._clients
+        release.set()
+        assert (await pending).status_code == 200
+        magento._get_client("http://third")
+        assert "http://busy" not in magento._clients
+        await magento.aclose()
+    asyncio.run(run())
+
+def test_breaker_counts_one_failure_per_request_after_its_retries(monkeypatch):
+    monkeypatch.setattr(settings, "MAGENTO_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(settings, "MAGENTO_BREAKER_FAILURE_THRESHOLD", 6)
+    magento = MagentoClient()
+    attempts = []
+    def refuse(request):
+        attempts.append(request.url.path)
+        raise httpx.ConnectError("connection refused", request=request)
+    async def run():
+        magento._clients["http://down"] = httpx.AsyncClient(transport=httpx.MockTransport(refuse))
+        # The five GETs /auth/connect sends: each one surfaces the real error, not a paused circuit.
+        results = await asyncio.gather(*(magento.request("GET", f"/path/{n}", credentials("http://down")) for n in range(5)), return_exceptions=True)
+        assert all(type(result) is httpx.ConnectError for result in results)
+        breaker = magento.guard("http://down").breaker
+        assert breaker.failures == 5 and breaker.state == "closed"
+        with pytest.raises(httpx.ConnectError):
+            await magento.request("GET", "/path", credentials("http://down"))
+        with pytest.raises(StoreUnavailableError, match="ConnectError: connection refused"):
+            await magento.request("GET", "/path", credentials("http://down"))
+        await magento.aclose()
+    asyncio.run(run())
+    assert len(attempts) == 6 * (1 + settings.MAGENTO_MAX_RETRIES)
+
+def test_only_registered_stores_get_their_own_metric_label(monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", True)
+    monkeypatch.setattr(MAGENTO_SECONDS, "_values", {})
+    magento = MagentoClient()
+    async def run():
+        for store_url in ("http://registered", "http://anything-1", "http://anything-2/"):
+            magento._clients[store_url.rstrip("/")] = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+        store_metadata.set("http://registered", StoreMetadata(None, None))
+        try:
+            for store_url in ("http://registered", "http://anything-1", "http://anything-2/"):
+                await magento.request("GET", "/store/storeViews", credentials(store_url))
+        finally:
+            store_metadata.invalidate("http://registered")
+        await magento.aclose()
+    asyncio.run(run())
+    assert sorted(labels[0] for labels in MAGENTO_SECONDS._values) == ["http://registered", "unregistered"]
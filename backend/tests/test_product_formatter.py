@@ -0,0 +1,22 @@
+# backend/tests/test_product_formatter.py
+import pytest
+from app.services.product_formatter import ProductFormatter
+from benchmarks.bench_formatter import legacy_format, synthetic_products
+
+STORE_URL = "https://store.example.com/"
+
+@pytest.mark.parametrize("seed", [1, 42])
+def test_formatter_matches_the_legacy_loop(seed):
+    products = synthetic_products(500, seed=seed)
+    formatter = ProductFormatter(f"{STORE_URL}media/catalog/product")
+    assert formatter.format_many(products) == legacy_format(products, {"store_url": STORE_URL})
+
+@pytest.mark.parametrize("product", [
+    {"id": 1, "price": "n/a", "special_price": 5},
+    {"id": 2, "price": 10, "special_price": 12},
+    {"id": 3, "price": None, "custom_attributes": "broken", "media_gallery_entries": [{"file": "/x.jpg", "types": None}]},
+    {"id": 4, "price": 9.5, "custom_attributes": [{"attribute_code": "description", "value": "<p>&nbsp;</p>"}, "junk"]},
+])
+def test_malformed_products_format_like_the_legacy_loop(product):
+    formatter = ProductFormatter(f"{STORE_URL}media/catalog/product")
+    assert formatter.format_many([product, "not a product"]) == legacy_format([product, "not a product"], {"store_url": STORE_URL})
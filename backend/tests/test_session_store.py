@@ -0,0 +1,82 @@
+# backend/tests/test_session_store.py
+import asyncio
+from app.services.session_store import RedisSessionBackend, SessionStore
+
+class FakeRedis:
+    """Dict-backed stand-in for the redis.asyncio string API, with a clock the test controls."""
+    def __init__(self):
+        self.now = 0.0
+        self._data: dict[str, tuple[float, bytes]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= self.now:
+            self._data.pop(key, None)
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: str, ex: int):
+        self._data[key] = (self.now + ex, value.encode())
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+def make_store() -> tuple[SessionStore, FakeRedis]:
+    redis = FakeRedis()
+    return SessionStore(RedisSessionBackend(redis), ttl=60, max_results=2), redis
+
+def test_save_and_load_round_trip():
+    store, redis = make_store()
+    async def run():
+        context_ref, state = await store.load("alice", None)
+        store.remember(state, {"task": "search", "keywords": "bulb"}, products=[{"sku": "A", "name": "a"}, {"sku": "B", "name": "b"}, {"sku": "C", "name": "c"}])
+        await store.save(context_ref, state)
+        return context_ref, await store.load("alice", context_ref)
+    context_ref, (loaded_ref, state) = asyncio.run(run())
+    assert loaded_ref == context_ref
+    assert state["last_intent"] == {"task": "search", "keywords": "bulb"}
+    assert state["results"] == [{"sku": "A", "name": "a"}, {"sku": "B", "name": "b"}]
+    assert state["focus_sku"] == "A"
+    assert any(key.startswith("chat-session:") for key in redis._data)
+
+def test_remember_puts_the_discussed_product_first():
+    store, _ = make_store()
+    state = {"user_id": "alice"}
+    for sku in ("A", "B", "A", "C"):
+        store.remember(state, {"task": "details", "sku": sku}, sku=sku)
+    assert state["focus_sku"] == "C"
+    assert state["resolved_skus"] == ["C", "A"]
+
+def test_expired_session_starts_over():
+    store, redis = make_store()
+    async def run():
+        context_ref, state = await store.load("alice", None)
+        await store.save(context_ref, {**state, "focus_sku": "A"})
+        redis.now += 61
+        return context_ref, await store.load("alice", context_ref)
+    context_ref, (new_ref, state) = asyncio.run(run())
+    assert new_ref != context_ref
+    assert state == {"user_id": "alice"}
+
+def test_another_users_context_ref_is_ignored():
+    store, _ = make_store()
+    async def run():
+        context_ref, state = await store.load("alice", None)
+        await store.save(context_ref, {**state, "focus_sku": "A"})
+        return context_ref, await store.load("mallory", context_ref)
+    context_ref, (new_ref, state) = asyncio.run(run())
+    assert new_ref != context_ref
+    assert state == {"user_id": "mallory"}
+
+def test_unreadable_session_starts_over():
+    store, redis = make_store()
+    async def broken_get(key):
+        raise ConnectionError("redis is down")
+    async def run():
+        redis._data["chat-session:corrupt"] = (60.0, b"{not json")
+        corrupt = await store.load("alice", "corrupt")
+        redis.get = broken_get
+        return corrupt, await store.load("alice", "any-ref")
+    (corrupt_ref, corrupt_state), (down_ref, down_state) = asyncio.run(run())
+    assert corrupt_ref != "corrupt" and corrupt_state == {"user_id": "alice"}
+    assert down_ref != "any-ref" and down_state == {"user_id": "alice"}
@@ -0,0 +1,53 @@
+# backend/tests/test_store_registry.py
+import asyncio
+from app.services.magento_wrapper import magento_service
+from app.services.store_metadata import store_metadata
+from app.services.store_registry import StoreRegistry
+from app.services.task_planner import TaskPlanner
+
+CREDENTIALS = {"store_url": "https://cdn-store.test/", "consumer_key": "k", "consumer_secret": "s", "access_token": "t", "access_token_secret": "ts"}
+RESPONSES = {
+    "/products": {"items": [], "total_count": 1},
+    "/store/storeViews": [{"id": 1, "code": "default", "name": "CDN Store"}],
+    "/store/storeConfigs": [{"base_media_url": "http://cdn-store.test/media/", "secure_base_media_url": "https://media.cdn.test/m/"}],
+    "/products/attributes": {"items": [{"attribute_code": "color", "frontend_input": "select"}, {"attribute_code": "wattage", "frontend_input": "text"}]},
+}
+
+def connect(monkeypatch, responses: dict):
+    async def get(credentials, endpoint, query_params=""):
+        if endpoint not in responses: raise RuntimeError("403 Forbidden")
+        return responses[endpoint]
+    async def get_brand_options(credentials):
+        return None
+    monkeypatch.setattr(StoreRegistry, "_get", staticmethod(get))
+    monkeypatch.setattr(magento_service, "get_brand_options", get_brand_options)
+    store_metadata.clear()
+    registry = StoreRegistry(ttl=60, max_entries=10)
+    return registry, asyncio.run(registry.connect(CREDENTIALS))
+
+def test_connect_keeps_media_url_and_attribute_schema(monkeypatch):
+    registry, session = connect(monkeypatch, RESPONSES)
+    assert registry.get(session.token) is session
+    assert session.store_name == "CDN Store"
+    assert session.metadata.attributes == {"color": "select", "wattage": "text"}
+    card = magento_service.format_product({"sku": "A", "media_gallery_entries": [{"file": "/a/b/a.jpg", "types": ["image"]}]}, CREDENTIALS)
+    assert card["image_url"] == "https://media.cdn.test/m/catalog/product/a/b/a.jpg"
+
+def test_store_without_metadata_access_still_connects_with_defaults(monkeypatch):
+    _, session = connect(monkeypatch, {key: RESPONSES[key] for key in ("/products", "/store/storeViews")})
+    assert session.metadata.media_url is None and session.metadata.attributes is None
+    assert store_metadata.media_base_url(CREDENTIALS["store_url"]) == "https://cdn-store.test/media/catalog/product"
+    assert store_metadata.has_options(CREDENTIALS["store_url"], "wattage")
+
+def test_schema_skips_option_lookups_for_text_attributes(monkeypatch):
+    connect(monkeypatch, RESPONSES)
+    async def resolve_option_id(code, label, credentials):
+        return "100"
+    monkeypatch.setattr(magento_service, "_resolve_option_id", resolve_option_id)
+    async def run():
+        planner = TaskPlanner("test")
+        stages = magento_service._plan_option_lookups({"attributes": {"color": "Red", "wattage": "9W", "finish": "Matte"}}, CREDENTIALS, planner, "search")
+        await planner.run()
+        return stages
+    # "finish" isn't in the (possibly truncated) schema, so it still gets its lookup.
+    assert asyncio.run(run()) == ["search.attribute.color", "search.attribute.finish"]
@@ -0,0 +1,22 @@
+# backend/tests/test_task_planner.py
+import asyncio
+from app.core.telemetry import STAGE_SECONDS
+from app.services.task_planner import TaskPlanner
+
+def test_stages_receive_dependency_results():
+    async def run():
+        planner = TaskPlanner("test")
+        planner.add("a", lambda: asyncio.sleep(0, result=1))
+        planner.add("b", lambda a: asyncio.sleep(0, result=a + 1), after=["a"])
+        return await planner.run()
+    assert asyncio.run(run()) == {"a": 1, "b": 2}
+
+def test_request_derived_stage_names_share_a_metric_label():
+    async def run():
+        planner = TaskPlanner("labels:u1")
+        for code in ("color", "ip_rating", "anything the llm says"):
+            planner.add(f"search.attribute.{code}", lambda: asyncio.sleep(0), metric="search.attribute")
+        await planner.run()
+    asyncio.run(run())
+    stages = {stage for pipeline, stage in STAGE_SECONDS._values if pipeline == "labels"}
+    assert stages == {"search.attribute"}
@@ -7,16 +7,41 @@ import { FaPaperPlane, FaPlus, FaFileUpload, FaUser, FaRobot, FaClipboardList, F
 
 // --- API Endpoints ---
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL
-const CHAT_API_URL = `${API_BASE_URL}/api/v1/chatbot/chat`;
+const CHAT_STREAM_API_URL = `${API_BASE_URL}/api/v1/chatbot/chat/stream`;
 const UPLOAD_API_URL = `${API_BASE_URL}/api/v1/files/upload`;
+const IMPORT_STATUS_API_URL = `${API_BASE_URL}/api/v1/files/imports`;
+const EXPORT_API_URL = `${API_BASE_URL}/api/v1/export/products`;
 const CONNECT_API_URL = `${API_BASE_URL}/api/v1/auth/connect`;
+const DISCONNECT_API_URL = `${API_BASE_URL}/api/v1/auth/disconnect`;
 
+// --- Streaming Chat ---
+// Reads the Server-Sent Events from /chat/stream and calls onEvent(event, data) for each one.
+const readChatStream = async (body, onEvent) => {
+  const response = await fetch(CHAT_STREAM_API_URL, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body) });
+  if (!response.ok || !response.body) throw new Error(`Chat request failed (${response.status}).`);
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message', data = '';
+      for (const line of rawEvent.split('\n')) { if (line.startsWith('event: ')) event = line.slice(7); else if (line.startsWith('data: ')) data += line.slice(6); }
+      onEvent(event, data ? JSON.parse(data) : {});
+    }
+  }
+};
 
 // --- Child Component Definitions ---
 const ProductCard = ({ product }) => ( <div className="product-card"> <img src={product.image_url ? product.image_url : "https://placehold.co/400x400/374151/F9FAFB?text=No+Image"} alt={product.name} className="product-card-image" /> <div className="product-card-content"> <h3 className="product-card-name">{product.name}</h3> <p className="product-card-price" dangerouslySetInnerHTML={{ __html: product.price || 'Price not available' }} /> <p className="product-card-description">{(product.description || '').substring(0, 100)}{(product.description || '').length > 100 ? '...' : ''}</p> </div> </div> );
 const ProductGrid = ({ products }) => ( <div className="product-grid-container"> {products.map(product => <ProductCard key={product.id || product.sku} product={product} />)} </div> );
 const ThinkingIndicator = () => ( <div className="message-wrapper bot"> <div className="message-icon"><FaRobot /></div> <div className="thinking-indicator"> <span></span><span></span><span></span> </div> </div> );
-const Message = ({ sender, text, data, intent }) => { const isBot = sender === 'bot'; const products = (intent === 'search_products_result' && Array.isArray(data)) ? data : null; return ( <div className={`message-wrapper ${sender}`}> <div className="message-icon">{isBot ? <FaRobot /> : <FaUser />}</div> <div className="message-content"> <p style={{ margin: 0, whiteSpace: 'pre-wrap' }} dangerouslySetInnerHTML={{ __html: text.replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>') }} /> {products && <ProductGrid products={products} />} </div> </div> ); };
+const Message = ({ sender, text, data, intent, onExport }) => { const isBot = sender === 'bot'; const products = (intent === 'search_products_result' && Array.isArray(data)) ? data : null; const exportRequest = intent === 'export_products' ? data : null; return ( <div className={`message-wrapper ${sender}`}> <div className="message-icon">{isBot ? <FaRobot /> : <FaUser />}</div> <div className="message-content"> <p style={{ margin: 0, whiteSpace: 'pre-wrap' }} dangerouslySetInnerHTML={{ __html: text.replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>') }} /> {products && <ProductGrid products={products} />} {exportRequest && <button className="connect-btn" onClick={() => onExport(exportRequest)}>Download CSV</button>} </div> </div> ); };
 const WelcomeScreen = () => ( <div className="welcome-container"> <div className="welcome-icon"><FaRobot /></div> <h1 className="welcome-title">Magento AI Operator</h1> <p className="welcome-subtitle">Your intelligent assistant for managing your e-commerce store.</p> </div> );
 const ConnectionPanel = ({ onConnect, isConnecting, connectionStatus }) => { const [details, setDetails] = useState({ store_url: '', consumer_key: '', consumer_secret: '', access_token: '', access_token_secret: '' }); const handleChange = (e) => { setDetails({ ...details, [e.target.name]: e.target.value }); }; const handleSubmit = (e) => { e.preventDefault(); onConnect(details); }; return ( <form onSubmit={handleSubmit} className="connection-panel"> <div className="form-group"> <label htmlFor="store_url">Store URL</label> <input type="text" id="store_url" name="store_url" value={details.store_url} onChange={handleChange} placeholder="https://your-magento.com" required /> </div> <div className="form-group"> <label htmlFor="consumer_key">Consumer Key</label> <input type="password" id="consumer_key" name="consumer_key" value={details.consumer_key} onChange={handleChange} required /> </div> <div className="form-group"> <label htmlFor="consumer_secret">Consumer Secret</label> <input type="password" id="consumer_secret" name="consumer_secret" value={details.consumer_secret} onChange={handleChange} required /> </div> <div className="form-group"> <label htmlFor="access_token">Access Token</label> <input type="password" id="access_token" name="access_token" value={details.access_token} onChange={handleChange} required /> </div> <div className="form-group"> <label htmlFor="access_token_secret">Access Token Secret</label> <input type="password" id="access_token_secret" name="access_token_secret" value={details.access_token_secret} onChange={handleChange} required /> </div> <button type="submit" className="connect-btn" disabled={isConnecting}> {isConnecting ? 'Connecting...' : 'Connect to Store'} </button> {connectionStatus.message && ( <div className={`connection-status ${connectionStatus.type}`}> {connectionStatus.message} </div> )} </form> ); };
 const ConnectionStatus = ({ storeName, onDisconnect }) => ( <div className="connection-status-display"> <p>Status: <span>Connected</span></p> <p>Store: <span>{storeName}</span></p> <button className="disconnect-btn" onClick={onDisconnect}>Disconnect</button> </div> );
@@ -27,7 +52,8 @@ export default function HomePage() {
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [credentials, setCredentials] = useState(null);
-  const [lastBotData, setLastBotData] = useState(null);
+  const [sessionToken, setSessionToken] = useState(null);
+  const [contextRef, setContextRef] = useState(null);
   const messagesEndRef = useRef(null);
   const fileInputRef = useRef(null);
   const [isConnected, setIsConnected] = useState(false);
@@ -38,10 +64,50 @@ export default function HomePage() {
   const scrollToBottom = () => { messagesEndRef.current?.scrollIntoView({ behavior: "smooth" }); };
   useEffect(scrollToBottom, [messages, isLoading]);
 
-  const handleConnect = async (creds) => { setIsConnecting(true); setConnectionStatus({ type: '', message: '' }); try { const response = await axios.post(CONNECT_API_URL, creds); setConnectionStatus({ type: 'success', message: response.data.message }); setStoreName(response.data.store_name); setCredentials(creds); setIsConnected(true); } catch (error) { const errorMsg = error.response?.data?.detail || "Failed to connect."; setConnectionStatus({ type: 'error', message: errorMsg }); setIsConnected(false); } finally { setIsConnecting(false); } };
-  const handleDisconnect = () => { setIsConnected(false); setStoreName(''); setCredentials(null); setLastBotData(null); setConnectionStatus({ type: '', message: '' }); setMessages([{ sender: 'bot', text: 'Successfully disconnected from the store.' }]); };
-  const handleSendMessage = async (userInput) => { if (!userInput.trim()) return; const newMessages = [...messages, { sender: 'user', text: userInput }]; setMessages(newMessages); setInput(''); setIsLoading(true); try { const response = await axios.post(CHAT_API_URL, { user_id: 'user_123', message: userInput, credentials: credentials, context: lastBotData, }); const { response_text, intent, data } = response.data; setLastBotData(data || null); setMessages([...newMessages, { sender: 'bot', text: response_text, intent: intent, data: data }]); } catch (error) { const errorText = error.response?.data?.detail || "An unexpected error occurred."; setMessages([...newMessages, { sender: 'bot', text: errorText }]); } finally { setIsLoading(false); } };
-  const handleFileUpload = async (event) => { const file = event.target.files[0]; if (!file) return; const newMessages = [...messages, { sender: 'user', text: `Uploading file: ${file.name}` }]; setMessages(newMessages); setIsLoading(true); const formData = new FormData(); formData.append('file', file); try { const response = await axios.post(UPLOAD_API_URL, formData, { headers: { 'Content-Type': 'multipart/form-data' } }); setMessages([...newMessages, { sender: 'bot', text: response.data.message }]); } catch (error) { const errorText = error.response?.data?.detail || "File upload failed."; setMessages([...newMessages, { sender: 'bot', text: errorText }]); } finally { setIsLoading(false); event.target.value = null; } };
+  const handleConnect = async (creds) => { setIsConnecting(true); setConnectionStatus({ type: '', message: '' }); try { const response = await axios.post(CONNECT_API_URL, creds); setConnectionStatus({ type: 'success', message: response.data.message }); setStoreName(response.data.store_name); setCredentials(creds); setSessionToken(response.data.session_token || null); setIsConnected(true); } catch (error) { const errorMsg = error.response?.data?.detail || "Failed to connect."; setConnectionStatus({ type: 'error', message: errorMsg }); setIsConnected(false); } finally { setIsConnecting(false); } };
+  const handleDisconnect = () => { if (sessionToken) axios.post(DISCONNECT_API_URL, { session_token: sessionToken }).catch(() => {}); setIsConnected(false); setStoreName(''); setCredentials(null); setSessionToken(null); setContextRef(null); setConnectionStatus({ type: '', message: '' }); setMessages([{ sender: 'bot', text: 'Successfully disconnected from the store.' }]); };
+  const handleSendMessage = async (userInput) => {
+    if (!userInput.trim()) return;
+    const newMessages = [...messages, { sender: 'user', text: userInput }];
+    setMessages(newMessages); setInput(''); setIsLoading(true);
+    // The bot message is built up as events arrive: text first, then product cards or answer tokens.
+    let botMessage = { sender: 'bot', text: '', intent: null, data: null };
+    const showBotMessage = (update) => { botMessage = { ...botMessage, ...update }; setIsLoading(false); setMessages([...newMessages, botMessage]); };
+    try {
+      // With a session token the server already holds the credentials; they are only sent when there is none.
+      await readChatStream({ user_id: 'user_123', message: userInput, ...(sessionToken ? { session_token: sessionToken } : { credentials }), context_ref: contextRef }, (event, payload) => {
+        if (event === 'message') showBotMessage({ text: payload.response_text, intent: payload.intent || null, data: payload.data || null });
+        else if (event === 'header') showBotMessage({ text: payload.response_text, intent: payload.intent, data: [] });
+        else if (event === 'items') showBotMessage({ data: [...(botMessage.data || []), ...payload.items] });
+        else if (event === 'card') showBotMessage({ data: payload.data });
+        else if (event === 'token') showBotMessage({ text: botMessage.text + payload.text });
+        else if (event === 'done' && payload.context_ref) setContextRef(payload.context_ref);
+      });
+    } catch (error) { setMessages([...newMessages, { sender: 'bot', text: error.message || "An unexpected error occurred." }]); } finally { setIsLoading(false); }
+  };
+  // CSV uploads start an import job on the server; its progress replaces the bot message until it finishes.
+  const pollImportJob = async (jobId, baseMessages) => {
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+      const { data: job } = await axios.get(`${IMPORT_STATUS_API_URL}/${jobId}`);
+      const progress = `Import ${job.status}: ${job.rows_read} rows read, ${job.rows_accepted} accepted, ${job.rows_invalid + job.rows_failed} rejected (${job.rows_per_sec} rows/s).`;
+      const errors = job.errors.length ? `\n${job.errors.slice(0, 5).join('\n')}` : '';
+      setMessages([...baseMessages, { sender: 'bot', text: `${job.message || progress}${job.status === 'running' ? '' : errors}` }]);
+      if (job.status === 'completed' || job.status === 'failed') return;
+    }
+  };
+  // The export is streamed by the server; the browser saves it once the download completes.
+  const handleExport = async ({ filters, format }) => {
+    try {
+      const response = await fetch(EXPORT_API_URL, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ credentials, filters, format }) });
+      if (!response.ok) throw new Error(`Export failed (${response.status}).`);
+      // A CSV export that fails partway is aborted by the server, which rejects blob().
+      const blob = await response.blob().catch(() => { throw new Error('The export was interrupted before it finished. Please try again.'); });
+      const url = URL.createObjectURL(blob);
+      const link = document.createElement('a'); link.href = url; link.download = `products.${format}`; link.click(); URL.revokeObjectURL(url);
+    } catch (error) { setMessages((current) => [...current, { sender: 'bot', text: error.message || "Export failed." }]); }
+  };
+  const handleFileUpload = async (event) => { const file = event.target.files[0]; if (!file) return; const newMessages = [...messages, { sender: 'user', text: `Uploading file: ${file.name}` }]; setMessages(newMessages); setIsLoading(true); const formData = new FormData(); formData.append('file', file); if (credentials) formData.append('credentials', JSON.stringify(credentials)); try { const response = await axios.post(UPLOAD_API_URL, formData, { headers: { 'Content-Type': 'multipart/form-data' } }); setMessages([...newMessages, { sender: 'bot', text: response.data.message }]); if (response.data.job_id) pollImportJob(response.data.job_id, newMessages).catch(() => {}); } catch (error) { const errorText = error.response?.data?.detail || "File upload failed."; setMessages([...newMessages, { sender: 'bot', text: errorText }]); } finally { setIsLoading(false); event.target.value = null; } };
 
   return (
     <div className="app-container">
@@ -55,7 +121,7 @@ export default function HomePage() {
       <main className="chat-area">
         {messages.length === 0 && !isLoading ? <WelcomeScreen /> : (
           <div className="chat-messages">
-            {messages.map((msg, index) => <Message key={index} {...msg} />)}
+            {messages.map((msg, index) => <Message key={index} {...msg} onExport={handleExport} />)}
             {isLoading && <ThinkingIndicator />}
             <div ref={messagesEndRef} />
           </div>